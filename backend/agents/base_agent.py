@@ -1,18 +1,45 @@
 from abc import ABC, abstractmethod
+from config.config import Config
 from models.groq_llm import GroqLLM
+from agents.budgeted_executor import BudgetedAgentExecutor
+from agents.example_selector import ExampleSelector
+from agents.scratchpad import ScratchpadCompactor
+from agents.session_state import SessionState, session_scope
+from agents.tool_calling_agent import TOOL_CALLING_NOTE, ToolCallingExecutor
+from models.deadline import Deadline, deadline_scope
 from langchain_core.prompts import PromptTemplate
 from langchain_core.tools import Tool
-from typing import List, Dict, Any
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Type, Union
 
 # Import agent functionality
-from langchain_classic.agents import AgentExecutor, create_react_agent
+from langchain_classic.agents import create_react_agent
+
+
+def latest_user_message(context: str) -> str:
+    """Pull the current message out of a context string built from history"""
+    marker = "\nUser: "
+    if marker in context:
+        return context.rsplit(marker, 1)[1]
+    return context
 
 
 class BaseAgent(ABC):
-    """Base class for all agents"""
+    """
+    Base class for all agents
+    
+    Agents are built once per process and shared by every session; per-session
+    state is passed to execute() and exposed to tools via current_session().
+    """
+    
+    # Key into Config.MODEL_ROLES selecting this agent's model settings
+    role: str = "qa"
     
     def __init__(self):
-        self.llm = GroqLLM()
+        self.llm = GroqLLM.for_role(self.role)
+        self.agent_mode = Config.AGENT_MODES.get(self.role, Config.AGENT_MODE)
+        self.max_iterations = Config.AGENT_MAX_ITERATIONS.get(self.role, Config.MAX_ITERATIONS)
+        self.example_selector = ExampleSelector.for_role(self.role)
         self.tools = self._create_tools()
         self.agent = self._create_agent()
     
@@ -26,8 +53,34 @@ class BaseAgent(ABC):
         """Get the prompt template for this agent"""
         pass
     
-    def _create_agent(self) -> AgentExecutor:
-        """Create the agent executor"""
+    def get_tool_args(self) -> Dict[str, Type[BaseModel]]:
+        """Argument models for tool-calling mode, by tool name (tools not listed take one string)"""
+        return {}
+    
+    def get_tool_calling_prompt(self) -> str:
+        """System prompt for tool-calling mode: the ReAct template without its tool list and output format"""
+        template = self.get_prompt_template()
+        end = template.find("You have access to")
+        instructions = template[:end] if end != -1 else template
+        return instructions.replace("{{", "{").replace("}}", "}").rstrip() + TOOL_CALLING_NOTE
+    
+    def _with_examples(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill the prompt's {examples} slot with the worked examples most relevant to this turn"""
+        if "examples" in input_data:
+            return input_data
+        return {**input_data, "examples": self.example_selector.render(input_data["input"])}
+    
+    def _create_agent(self) -> Union[BudgetedAgentExecutor, ToolCallingExecutor]:
+        """Create the agent executor for the configured agent mode"""
+        if self.agent_mode == "tools":
+            return ToolCallingExecutor(
+                llm=self.llm,
+                tools=self.tools,
+                system_prompt=self.get_tool_calling_prompt(),
+                tool_args=self.get_tool_args(),
+                max_iterations=self.max_iterations
+            )
+        
         prompt = PromptTemplate.from_template(self.get_prompt_template())
         
         agent = create_react_agent(
@@ -36,19 +89,52 @@ class BaseAgent(ABC):
             prompt=prompt
         )
         
-        return AgentExecutor(
+        return BudgetedAgentExecutor(
             agent=agent,
             tools=self.tools,
             verbose=True,
             handle_parsing_errors=True,
-            max_iterations=90,
-            early_stopping_method="generate"  # Stop and generate answer if parsing fails
+            max_iterations=self.max_iterations,
+            # Only the prompt sees the compacted steps; the executor keeps them all
+            trim_intermediate_steps=ScratchpadCompactor(),
+            # Out of iterations or time: answer from the steps taken so far, without another LLM call
+            early_stopping_method="force"
         )
     
-    def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the agent with given input"""
+    def execute(
+        self,
+        input_data: Dict[str, Any],
+        callbacks: Optional[list] = None,
+        session: Optional[SessionState] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Execute the agent with given input on behalf of a session, within the request's deadline"""
+        try:
+            with session_scope(session), deadline_scope(deadline):
+                result = self.agent.invoke(self._with_examples(input_data), config={"callbacks": callbacks})
+            return {
+                "success": True,
+                "output": result.get("output", ""),
+                "error": None
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "output": None,
+                "error": str(e)
+            }
+    
+    async def aexecute(
+        self,
+        input_data: Dict[str, Any],
+        callbacks: Optional[list] = None,
+        session: Optional[SessionState] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Execute the agent without blocking the event loop"""
         try:
-            result = self.agent.invoke(input_data)
+            with session_scope(session), deadline_scope(deadline):
+                result = await self.agent.ainvoke(self._with_examples(input_data), config={"callbacks": callbacks})
             return {
                 "success": True,
                 "output": result.get("output", ""),
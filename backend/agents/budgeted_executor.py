@@ -0,0 +1,69 @@
+"""
+AgentExecutor that stops at the request deadline and returns what it has so far
+"""
+from langchain_classic.agents import AgentExecutor
+from langchain_core.agents import AgentFinish
+from typing import Any, Iterable, List, Tuple
+
+from config.config import Config
+from models.deadline import current_deadline
+
+
+# Text AgentExecutor returns from early_stopping_method="force"
+STOPPED_OUTPUT = "Agent stopped due to iteration limit or time limit."
+
+# Observations that carry nothing worth showing the user
+_UNUSABLE_OBSERVATIONS = ("Invalid Format", "Invalid or incomplete response", "Error ", "Invalid arguments")
+
+
+def out_of_budget() -> bool:
+    """True when the current request can't afford another LLM call"""
+    deadline = current_deadline()
+    return deadline is not None and deadline.expired(margin=Config.LLM_MIN_CALL_SECONDS)
+
+
+def partial_answer(observations: Iterable[Any]) -> str:
+    """
+    Best-effort reply for an agent stopped before its final answer
+    
+    The latest usable tool result is what the user would most likely have
+    been shown (e.g. DisplayResults output), so it is returned as-is.
+    """
+    usable = [
+        str(observation) for observation in observations
+        if str(observation).strip()
+        and not str(observation).startswith(_UNUSABLE_OBSERVATIONS)
+        and "is not a valid tool" not in str(observation)
+    ]
+    if usable:
+        return f"I ran out of time before finishing, but here's what I found so far:\n\n{usable[-1]}"
+    return "Sorry, I couldn't finish that in time. Please try again, or ask something more specific."
+
+
+class BudgetedAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor bounded by the request deadline as well as max_iterations
+    
+    The executor is shared by every session, so the deadline is read from
+    the request context rather than set on the instance. When either limit
+    stops the loop, the reply is built from the steps already taken instead
+    of another LLM call.
+    """
+    
+    def _should_continue(self, iterations: int, time_elapsed: float) -> bool:
+        if out_of_budget():
+            print(f"[Agent] Deadline reached after {iterations} iteration(s)")
+            return False
+        return super()._should_continue(iterations, time_elapsed)
+    
+    def _partial(self, output: AgentFinish, intermediate_steps: List[Tuple[Any, str]]) -> AgentFinish:
+        if output.return_values.get("output") != STOPPED_OUTPUT:
+            return output
+        answer = partial_answer(observation for _, observation in intermediate_steps)
+        return AgentFinish({"output": answer}, output.log)
+    
+    def _return(self, output: AgentFinish, intermediate_steps: list, run_manager: Any = None) -> dict:
+        return super()._return(self._partial(output, intermediate_steps), intermediate_steps, run_manager=run_manager)
+    
+    async def _areturn(self, output: AgentFinish, intermediate_steps: list, run_manager: Any = None) -> dict:
+        return await super()._areturn(self._partial(output, intermediate_steps), intermediate_steps, run_manager=run_manager)
@@ -0,0 +1,108 @@
+"""
+Per-agent few-shot example library and a local selector for the prompt's {examples} slot
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+import json
+import os
+
+from config.config import Config
+from models.intent_classifier import featurize
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "agent_examples")
+
+# Placeholder in agent prompt templates where the selected examples go
+EXAMPLES_SLOT = "{examples}"
+
+# Similarity added to examples written for the conversation's current stage,
+# enough to outrank a slightly closer lexical match from the wrong stage
+STAGE_BONUS = 0.15
+
+
+@dataclass
+class FewShotExample:
+    """One worked example from an agent's library"""
+    
+    id: str
+    text: str  # what a matching conversation looks like; only used for scoring
+    example: str  # the worked example as it appears in the prompt
+    stages: Tuple[str, ...] = ("start", "ongoing")
+    features: Dict[int, float] = field(default_factory=dict, repr=False)
+
+
+def load_example_library(role: str, directory: str = EXAMPLES_DIR) -> List[FewShotExample]:
+    """Load an agent's examples from <directory>/<role>.jsonl (an empty list if it has none)"""
+    path = os.path.join(directory, f"{role}.jsonl")
+    if not os.path.exists(path):
+        return []
+    
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                examples.append(FewShotExample(
+                    id=record["id"],
+                    text=record["text"],
+                    example=record["example"],
+                    stages=tuple(record.get("stages", ("start", "ongoing"))),
+                    features=featurize(record["text"])
+                ))
+    return examples
+
+
+def conversation_stage(context: str) -> str:
+    """"start" for a conversation's first message, "ongoing" once there is history"""
+    return "ongoing" if "\nUser: " in context else "start"
+
+
+def _selection_query(context: str) -> str:
+    """The latest message plus the assistant turn it answers (usually the question just asked)"""
+    lines = context.rsplit("\nUser: ", 1)
+    if len(lines) == 1:
+        return context
+    previous = lines[0].rsplit("\nAssistant: ", 1)
+    return f"{previous[-1]}\n{lines[1]}" if len(previous) == 2 else lines[1]
+
+
+class ExampleSelector:
+    """
+    Pick the k examples most similar to the current turn
+    
+    Similarity is the cosine of the same hashed n-gram vectors the intent
+    classifier uses, so selection is local and takes well under a millisecond.
+    """
+    
+    def __init__(self, examples: List[FewShotExample], k: int = Config.FEW_SHOT_K):
+        self.examples = examples
+        self.k = k
+    
+    @classmethod
+    def for_role(cls, role: str) -> "ExampleSelector":
+        return cls(load_example_library(role))
+    
+    def select(self, context: str) -> List[FewShotExample]:
+        """
+        Get the examples to show for this turn, in library order
+        
+        Args:
+            context: Agent input (the current message, prefixed by history if any)
+        """
+        if not Config.FEW_SHOT_ENABLED or len(self.examples) <= self.k:
+            return list(self.examples)
+        
+        query = featurize(_selection_query(context))
+        stage = conversation_stage(context)
+        
+        def score(example: FewShotExample) -> float:
+            similarity = sum(value * example.features.get(index, 0.0) for index, value in query.items())
+            return similarity + (STAGE_BONUS if stage in example.stages else 0.0)
+        
+        chosen = {example.id for example in sorted(self.examples, key=score, reverse=True)[:self.k]}
+        # Library order keeps the prompt stable (and cacheable) when the same examples win again
+        return [example for example in self.examples if example.id in chosen]
+    
+    def render(self, context: str) -> str:
+        """Selected examples formatted for the prompt's {examples} slot"""
+        return "\n\n".join(example.example for example in self.select(context))
@@ -1,27 +1,74 @@
-from agents.base_agent import BaseAgent
+from agents.base_agent import BaseAgent, latest_user_message
+from agents.fallback_replies import CAPABILITIES, FallbackReplies
+from agents.session_state import SessionState
+from config.config import Config
 from langchain_core.tools import Tool
-from typing import List
+from models.deadline import Deadline
+from models.streaming import emit_answer
+from typing import Any, Dict, List, Optional
+import threading
 
 
 class FallbackAgent(BaseAgent):
-    """Fallback Agent for non-travel related queries"""
+    """
+    Fallback Agent for non-travel related queries
+    
+    Replies come from FallbackReplies templates unless FALLBACK_LLM_ENABLED,
+    in which case the ReAct agent below writes them. Its LLM, examples,
+    tools and executor are only built then, so templated replies cost none
+    of them.
+    """
+    
+    role = "fallback"
+    
+    def __init__(self):
+        self._built = False
+        self._build_lock = threading.Lock()
+        if Config.FALLBACK_LLM_ENABLED:
+            self._build()
+    
+    def _build(self) -> None:
+        """Set up what BaseAgent.__init__ creates, once"""
+        if self._built:
+            return
+        with self._build_lock:
+            if not self._built:
+                super().__init__()
+                self._built = True
+    
+    def _templated(self, input_data: Dict[str, Any], callbacks: Optional[list]) -> Optional[Dict[str, Any]]:
+        if Config.FALLBACK_LLM_ENABLED:
+            FallbackReplies.count("llm")
+            self._build()
+            return None
+        reply = FallbackReplies.reply(latest_user_message(input_data["input"]))
+        emit_answer(callbacks, reply)
+        return {"success": True, "output": reply, "error": None}
+    
+    def execute(
+        self,
+        input_data: Dict[str, Any],
+        callbacks: Optional[list] = None,
+        session: Optional[SessionState] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        return self._templated(input_data, callbacks) or super().execute(input_data, callbacks, session, deadline)
+    
+    async def aexecute(
+        self,
+        input_data: Dict[str, Any],
+        callbacks: Optional[list] = None,
+        session: Optional[SessionState] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        return self._templated(input_data, callbacks) or await super().aexecute(input_data, callbacks, session, deadline)
     
     def _create_tools(self) -> List[Tool]:
         """Create tools for fallback responses"""
         
         def get_capabilities(query: str = "") -> str:
             """Return what the travel assistant can help with"""
-            return """
-I'm specialized in travel assistance. I can help you with:
-
--Flight Bookings - Book one-way or round-trip flights
--Hotel Reservations - Find and book accommodations  
--Restaurant Reservations - Reserve dining experiences
--Complete Trip Planning - Book flights, hotels, and restaurants together
--Travel Information - Destinations, weather, travel tips, recommendations
-
-Please ask me about any of these travel-related topics!
-"""
+            return CAPABILITIES
         
         return [
             Tool(
@@ -46,21 +93,7 @@ Be friendly, brief, and helpful in redirecting them.
 
 EXAMPLES:
 
-User: "What's 2 + 2?"
-Thought: This is a math question, not travel-related.
-Final Answer: I appreciate your question! However, I'm a specialized travel assistant focused on helping with flight bookings, hotel reservations, restaurant reservations, and trip planning. I'm not able to help with math questions. Is there anything travel-related I can assist you with today?
-
-User: "Who won the Super Bowl?"
-Thought: This is a sports question, not travel-related.
-Final Answer: That's a great question about sports! However, I'm specifically designed to help with travel needs like booking flights, hotels, and restaurants, or planning complete trips. I can't help with sports questions. Would you like to plan a trip or make a travel reservation instead?
-
-User: "Write me a poem"
-Thought: This is a creative writing request, not travel-related.
-Final Answer: I'd love to help, but I'm a travel assistant specialized in flight bookings, hotel reservations, restaurant reservations, and trip planning. I'm not equipped to write poetry. However, if you're planning a trip somewhere, I'd be happy to help you with all your travel arrangements!
-
-User: "Tell me about AI"
-Thought: This is a general technology question, not travel-related.
-Final Answer: That's an interesting topic! However, I'm focused on travel assistance - booking flights, hotels, restaurants, and planning trips. For questions about AI or technology, you'd need a different assistant. Can I help you plan a trip or make a travel reservation instead?
+{examples}
 
 IMPORTANT RULES:
 - Always be polite and friendly
@@ -0,0 +1,107 @@
+"""
+Templated replies for non-travel messages, so fallback turns need no LLM call
+"""
+from typing import Any, Dict, Optional, Tuple
+import re
+import threading
+import zlib
+
+from config.config import Config
+
+
+CAPABILITIES = """
+I'm specialized in travel assistance. I can help you with:
+
+-Flight Bookings - Book one-way or round-trip flights
+-Hotel Reservations - Find and book accommodations
+-Restaurant Reservations - Reserve dining experiences
+-Complete Trip Planning - Book flights, hotels, and restaurants together
+-Travel Information - Destinations, weather, travel tips, recommendations
+
+Please ask me about any of these travel-related topics!
+"""
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# (topic, words that identify it, opener acknowledging it); the first match wins
+TOPICS: Tuple[Tuple[str, Tuple[str, ...], str], ...] = (
+    ("math", ("math", "calculate", "equation", "algebra", "sum", "multiply", "divide", "plus", "minus", "percent"),
+     "Math isn't my strong suit. "),
+    ("coding", ("code", "coding", "program", "python", "javascript", "java", "bug", "function", "sql", "debug"),
+     "I can't help with programming. "),
+    ("sports", ("sports", "football", "soccer", "basketball", "baseball", "nba", "nfl", "score", "won", "team", "game"),
+     "I'm not the one to ask about sports. "),
+    ("entertainment", ("movie", "film", "song", "music", "poem", "joke", "story", "tv", "show", "celebrity"),
+     "That's a fun one, but not my area. "),
+    ("science", ("science", "physics", "chemistry", "biology", "photosynthesis", "atom", "planet", "gravity", "dna"),
+     "Science questions are outside what I do. "),
+    # Last, so "hi, can you solve this equation" is still treated as math
+    ("greeting", ("hi", "hello", "hey", "howdy", "greetings", "morning", "evening"), "Hi there! "),
+    ("thanks", ("thanks", "thank", "thx", "cheers", "appreciate"), "You're welcome! "),
+)
+
+# {opener} acknowledges the detected topic (empty when none is recognised)
+REDIRECTS = (
+    "{opener}I'm a travel assistant, so I can't help with that one. I can book flights, hotels and restaurants, "
+    "plan a complete trip, or share destination tips. Where would you like to go?",
+    "{opener}I specialize in travel: finding and booking flights, hotels and restaurants, or planning a whole trip. "
+    "Is there a trip I can help you with?",
+    "{opener}I only handle travel questions. Try asking me to book a hotel, reserve a table, find a flight, "
+    "or suggest the best time to visit a destination.",
+    "{opener}I focus on travel, so I'll have to pass on that. I'd be glad to help you plan a trip, book a flight "
+    "or hotel, or recommend places to eat at your destination.",
+)
+
+# Replies for messages that are friendly rather than off-topic
+WELCOMES = (
+    "{opener}I'm your travel assistant. I can book flights, hotels and restaurants, or plan a complete trip. "
+    "Where are you headed?",
+    "{opener}I can help you find flights, book hotels, reserve restaurants, or plan a whole trip. "
+    "What would you like to do?",
+)
+
+
+def detect_topic(message: str) -> Optional[str]:
+    """Name the non-travel topic a message is about, if it matches one of TOPICS"""
+    words = set(_WORD.findall(message.lower()))
+    for topic, keywords, _ in TOPICS:
+        if words.intersection(keywords):
+            return topic
+    return None
+
+
+class FallbackReplies:
+    """
+    Picks a canned redirect for a non-travel message
+    
+    The choice is a stable hash of the message, so different messages get
+    different wording while a repeated message gets the same reply.
+    """
+    
+    # Process-wide counters of fallback turns answered from templates vs by the LLM
+    _stats = {"templated": 0, "llm": 0}
+    _stats_lock = threading.Lock()
+    
+    _OPENERS = {topic: opener for topic, _, opener in TOPICS}
+    
+    @staticmethod
+    def count(key: str) -> None:
+        with FallbackReplies._stats_lock:
+            FallbackReplies._stats[key] += 1
+    
+    @staticmethod
+    def reply(message: str) -> str:
+        """Build the reply for a message classified as non-travel"""
+        topic = detect_topic(message)
+        templates = WELCOMES if topic in ("greeting", "thanks") else REDIRECTS
+        template = templates[zlib.crc32(message.strip().lower().encode("utf-8")) % len(templates)]
+        FallbackReplies.count("templated")
+        return template.format(opener=FallbackReplies._OPENERS.get(topic, "")) # type: ignore
+    
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Get how many fallback turns skipped the LLM"""
+        with FallbackReplies._stats_lock:
+            stats: Dict[str, Any] = dict(FallbackReplies._stats)
+        stats["llm_enabled"] = Config.FALLBACK_LLM_ENABLED
+        return stats
@@ -1,15 +1,19 @@
 from agents.base_agent import BaseAgent
 from langchain_core.tools import Tool
-from typing import List
-from tools.data_display_tool import DataDisplayTool
+from pydantic import BaseModel, Field
+from typing import Dict, List, Type
+from tools.data_display_tool import DataDisplayTool, DisplayResultsArgs
+
+
+class SearchKnowledgeArgs(BaseModel):
+    """Search the travel knowledge base for destinations, weather, tips and recommendations"""
+    query: str = Field(description="What to look up, e.g. 'best time to visit Lisbon'")
 
 
 class QAAgent(BaseAgent):
     """Travel Question and Answer Agent"""
     
-    def __init__(self, session_id: str = "default"):
-        self.session_id = session_id
-        super().__init__()
+    role = "qa"
     
     def _create_tools(self) -> List[Tool]:
         """Create tools for travel Q&A"""
@@ -19,7 +23,7 @@ class QAAgent(BaseAgent):
             return f"Searching for travel information about: {query}. This is a placeholder response."
         
         # Get the display tool
-        display_tool = DataDisplayTool.create_display_tool(self.session_id)
+        display_tool = DataDisplayTool.create_display_tool()
         
         return [
             Tool(
@@ -30,6 +34,12 @@ class QAAgent(BaseAgent):
             display_tool  # Add the display tool
         ]
     
+    def get_tool_args(self) -> Dict[str, Type[BaseModel]]:
+        return {
+            "SearchKnowledge": SearchKnowledgeArgs,
+            "DisplayResults": DisplayResultsArgs
+        }
+    
     def get_prompt_template(self) -> str:
         return """You are a helpful travel information assistant specializing in destinations, travel tips, weather, and recommendations.
 
@@ -46,19 +56,10 @@ IMPORTANT: When users ask to "show", "display", "find", or "search for" hotels,
 - Use the DisplayResults tool to show visual cards with data
 - The tool returns a formatted list - include this ENTIRE response in your Final Answer
 - Provide filters based on what the user asked for (city, max_price, cuisine, etc.)
-- Example: User says "show me hotels in NYC under $150"
-  → Action: DisplayResults
-  → Action Input: {{"type": "hotels", "filters": {{"city": "New York", "max_price": 150}}}}
-  → Observation: I found 3 hotel(s) in New York under $150/night:
 
-1. **Grand Plaza Hotel** - $150/night
-   ⭐ 4.5 stars | 4-star hotel
-   📍 123 Main Street
-   ✨ WiFi, Pool, Gym
-   🛏️ 5 rooms available
-...
+EXAMPLES:
 
-  → Final Answer: [Include the ENTIRE observation in your response]
+{examples}
 
 You have access to the following tools:
 {tools}
@@ -1,26 +1,48 @@
-from agents.base_agent import BaseAgent
+from agents.base_agent import BaseAgent, latest_user_message
+from agents.session_state import SessionState, bound_session, new_reservation_state
+from agents.slot_filling import SlotFiller
 from langchain_core.tools import Tool
-from typing import List, Dict, Any
-from tools.data_display_tool import DataDisplayTool
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Literal, Optional, Type, Union
+from models.deadline import Deadline
+from models.streaming import emit_answer
+from tools.data_display_tool import DataDisplayTool, DisplayResultsArgs
 import json
 
 
+class ConfirmReservationArgs(BaseModel):
+    """Confirm a reservation once ALL required information for its type has been collected"""
+    type: Literal["hotel", "restaurant", "flight"]
+    name: str = Field(description="Name on the reservation")
+    city: Optional[str] = None
+    people: Optional[Union[int, str]] = None
+    checkin: Optional[str] = Field(default=None, description="YYYY-MM-DD")
+    checkout: Optional[str] = Field(default=None, description="YYYY-MM-DD")
+    date: Optional[str] = Field(default=None, description="YYYY-MM-DD")
+    time: Optional[str] = None
+    tickets: Optional[Union[int, str]] = None
+    from_city: Optional[str] = Field(default=None, alias="from")
+    to: Optional[str] = None
+    departure_date: Optional[str] = Field(default=None, description="YYYY-MM-DD")
+    return_date: Optional[str] = Field(default=None, description="YYYY-MM-DD")
+    trip_type: Optional[str] = Field(default=None, description="one-way or round-trip")
+
+
 class EnhancedReservationAgent(BaseAgent):
     """Enhanced Reservation Agent with display data support"""
     
-    def __init__(self, session_id: str = "default"):
-        self.session_id = session_id
-        self.reservation_state = {
-            "type": None,  # hotel, restaurant, or flight
-            "collected_info": {}
-        }
+    role = "reservation"
+    
+    def __init__(self):
         super().__init__()
+        confirm_tool = next(tool for tool in self.tools if tool.name == "ConfirmReservation")
+        self.slot_filler = SlotFiller(confirm=lambda details: confirm_tool.run(json.dumps(details)))
     
     def _create_tools(self) -> List[Tool]:
         """Create tools for making reservations"""
         
         # Get the display tool
-        display_tool = DataDisplayTool.create_display_tool(self.session_id)
+        display_tool = DataDisplayTool.create_display_tool()
         
         def confirm_reservation(details_json: str) -> str:
             """
@@ -66,6 +88,10 @@ Name: {details.get('name', 'N/A')}"""
                 else:
                     message = f"✅ Reservation Confirmed! Confirmation: {conf_num}"
                 
+                # The booking is done: the next turn must not resume its questions
+                session = bound_session()
+                if session is not None:
+                    session.reservation_state.update(new_reservation_state())
                 return message
                 
             except Exception as e:
@@ -82,6 +108,46 @@ Name: {details.get('name', 'N/A')}"""
             )
         ]
     
+    def _fill_slots(self, input_data: Dict[str, Any], callbacks: Optional[list], session: Optional[SessionState]) -> Optional[str]:
+        """Answer the turn locally if it is an unambiguous reply to a booking question"""
+        if session is None:
+            return None  # slot filling needs state that outlives the turn
+        reply = self.slot_filler.handle(session.reservation_state, latest_user_message(input_data["input"]))
+        if reply is not None:
+            print(f"[Reservation] Slot filled locally, awaiting: {session.reservation_state['awaiting']}")
+            emit_answer(callbacks, reply)
+        return reply
+    
+    def execute(
+        self,
+        input_data: Dict[str, Any],
+        callbacks: Optional[list] = None,
+        session: Optional[SessionState] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        reply = self._fill_slots(input_data, callbacks, session)
+        if reply is not None:
+            return {"success": True, "output": reply, "error": None}
+        return super().execute(input_data, callbacks, session, deadline)
+    
+    async def aexecute(
+        self,
+        input_data: Dict[str, Any],
+        callbacks: Optional[list] = None,
+        session: Optional[SessionState] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        reply = self._fill_slots(input_data, callbacks, session)
+        if reply is not None:
+            return {"success": True, "output": reply, "error": None}
+        return await super().aexecute(input_data, callbacks, session, deadline)
+    
+    def get_tool_args(self) -> Dict[str, Type[BaseModel]]:
+        return {
+            "DisplayResults": DisplayResultsArgs,
+            "ConfirmReservation": ConfirmReservationArgs
+        }
+    
     def get_prompt_template(self) -> str:
         return """You are a reservation assistant that helps users book hotels, restaurants, and flights.
 
@@ -123,112 +189,9 @@ FLIGHT:
 6. Return date (if round trip)
 7. Name on reservation
 
-WORKFLOW EXAMPLES:
-
-Example 1 - User asks to see options first:
-User: "Show me hotels in NYC"
-Thought: User wants to see hotel options. Use DisplayResults.
-Action: DisplayResults
-Action Input: {{"type": "hotels", "filters": {{"city": "New York"}}}}
-Observation: I found 5 hotel(s) in New York:
-
-1. **Grand Plaza Hotel** - $150/night
-   ⭐ 4.5 stars | 4-star hotel
-   ...
-
-Final Answer: I found 5 hotel(s) in New York:
-
-1. **Grand Plaza Hotel** - $150/night
-   ⭐ 4.5 stars | 4-star hotel
-   📍 123 Main Street
-   ✨ WiFi, Pool, Gym
-   🛏️ 5 rooms available
-
-2. **Comfort Inn & Suites** - $95/night
-   ...
-
-Would you like to book one of these?
-
-Example 2 - Direct booking:
-User: "Book a hotel in NYC"
-Thought: User wants to book. Need to collect info. Start with number of people.
-Final Answer: I'll help you book a hotel in NYC. How many people will be staying?
-
-Example 3 - User mentions specific place:
-User: "I want to book the Grand Plaza Hotel"
-Thought: User mentioned specific hotel. Show it with DisplayResults first.
-Action: DisplayResults
-Action Input: {{"type": "hotels", "filters": {{"city": "New York"}}}}
-Observation: I found 5 hotel(s) in New York:
-
-1. **Grand Plaza Hotel** - $150/night
-   ⭐ 4.5 stars | 4-star hotel
-   ...
-
-Final Answer: Great choice! Here are hotels in the area including the Grand Plaza Hotel:
-
-1. **Grand Plaza Hotel** - $150/night
-   ⭐ 4.5 stars | 4-star hotel
-   📍 123 Main Street
-   
-To book the Grand Plaza Hotel, how many people will be staying?
-
-Example 4 - Collecting info (NO ACTION NEEDED):
-User: "2 people"
-Thought: Got people=2. Need check-in date next. Just ask directly, no tool needed.
-Final Answer: Perfect! What is your check-in date? (Format: YYYY-MM-DD)
-
-User: "2026-02-15"
-Thought: Got checkin date. Need checkout date next. Just ask directly, no tool needed.
-Final Answer: Great! What is your check-out date? (Format: YYYY-MM-DD)
-
-User: "2026-02-18"  
-Thought: Got checkout date. Need name now. Just ask directly, no tool needed.
-Final Answer: Excellent! What name should the reservation be under?
-
-Example 4b - User asks to see options mid-conversation:
-User: "I need to make a restaurant reservation"
-Final Answer: I'll help you book a restaurant. What city?
-
-User: "New York"
-Final Answer: How many people will be dining?
-
-User: "4 people"
-Final Answer: What date? (Format: YYYY-MM-DD)
-
-User: "2026-01-08"
-Final Answer: What time would you like?
-
-User: "show me available times"
-Thought: User wants to see restaurant options and their available times. Use DisplayResults.
-Action: DisplayResults
-Action Input: {{"type": "restaurants", "filters": {{"city": "New York"}}}}
-Observation: I found 5 restaurant(s) in New York:
-
-1. **The Italian Corner** - Italian
-   ⭐ 4.7 stars | $$
-   🕒 Available: 5:30 PM, 7:00 PM, 8:30 PM
-...
-
-Final Answer: Here are available restaurants in New York with their times:
-
-1. **The Italian Corner** - Italian
-   ⭐ 4.7 stars | $$
-   🕒 Available: 5:30 PM, 7:00 PM, 8:30 PM
-
-2. **Sakura Sushi Bar** - Japanese
-   ⭐ 4.8 stars | $$$
-   🕒 Available: 6:00 PM, 7:30 PM, 9:00 PM
-
-Which restaurant and time would you prefer?
+WORKFLOW EXAMPLES (the ones most relevant to this conversation):
 
-Example 5 - Final confirmation (USE TOOL):
-User: "John Smith"
-Thought: Have all info: city=NYC, people=2, checkin=2026-02-15, checkout=2026-02-18, name=John Smith. Time to confirm with ConfirmReservation tool.
-Action: ConfirmReservation
-Action Input: {{"type": "hotel", "city": "NYC", "people": "2", "checkin": "2026-02-15", "checkout": "2026-02-18", "name": "John Smith"}}
-Observation: ✅ Hotel Reservation Confirmed! Confirmation: HOT-123456...
-Final Answer: ✅ Your hotel reservation is confirmed! Confirmation number: HOT-123456. You'll receive an email confirmation shortly.
+{examples}
 
 CRITICAL - WHEN TO USE ACTIONS VS FINAL ANSWER:
 ✅ Use Action + Tool when:
@@ -0,0 +1,118 @@
+"""
+Scratchpad compaction for long ReAct loops
+"""
+from langchain_classic.agents.format_scratchpad import format_log_to_str
+from langchain_core.agents import AgentAction
+from typing import Any, Dict, List, Tuple
+import re
+import threading
+
+from config.config import Config
+
+
+Step = Tuple[AgentAction, Any]
+
+# Headline lines of list-style observations, e.g. "1. **Grand Plaza Hotel** - $150/night"
+_LIST_ITEM = re.compile(r"^\s*\d+\.\s")
+
+
+def scratchpad_tokens(steps: List[Step]) -> int:
+    """Approximate tokens the steps add to the prompt (~4 characters per token)"""
+    return len(format_log_to_str(steps)) // 4
+
+
+def compact_observation(observation: Any, max_chars: int) -> str:
+    """
+    Shorten an observation to its first line and list headlines
+    
+    DisplayResults output keeps "I found 5 hotel(s)..." and one line per
+    result, which is what later steps refer back to; the details go.
+    """
+    text = str(observation)
+    if len(text) <= max_chars:
+        return text
+    
+    lines = text.strip().splitlines()
+    kept = [lines[0]] + [line.strip() for line in lines[1:] if _LIST_ITEM.match(line)]
+    compact = "\n".join(kept)
+    if len(compact) > max_chars:
+        compact = compact[:max_chars].rstrip()
+    return f"{compact}\n[{len(text) - len(compact)} characters omitted]"
+
+
+def compact_action(action: AgentAction) -> AgentAction:
+    """Drop the Thought from an old step, keeping the Action lines the model needs to see"""
+    return AgentAction(action.tool, action.tool_input, f"Action: {action.tool}\nAction Input: {action.tool_input}")
+
+
+class ScratchpadCompactor:
+    """
+    Bound what each ReAct step re-sends (AgentExecutor's trim_intermediate_steps hook)
+    
+    The last keep_steps steps stay verbatim. Older steps lose their Thought
+    and have their Observation compacted. If the scratchpad is still over
+    max_tokens, the oldest steps are dropped. The executor keeps the full
+    history for its result; only the prompt sees the compacted form.
+    """
+    
+    _stats = {"calls": 0, "compacted_steps": 0, "dropped_steps": 0, "tokens_before": 0, "tokens_after": 0}
+    _tokens_by_step: Dict[int, List[int]] = {}  # step count -> [total tokens after compaction, calls]
+    _stats_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        keep_steps: int = Config.SCRATCHPAD_KEEP_STEPS,
+        observation_chars: int = Config.SCRATCHPAD_OBSERVATION_CHARS,
+        max_tokens: int = Config.SCRATCHPAD_MAX_TOKENS
+    ):
+        self.keep_steps = keep_steps
+        self.observation_chars = observation_chars
+        self.max_tokens = max_tokens
+    
+    def __call__(self, steps: List[Step]) -> List[Step]:
+        if not steps:
+            return steps
+        before = scratchpad_tokens(steps)
+        
+        split = max(0, len(steps) - self.keep_steps)
+        old = [(compact_action(action), compact_observation(observation, self.observation_chars)) for action, observation in steps[:split]]
+        compacted = old + list(steps[split:])
+        
+        dropped = 0
+        while len(compacted) > 1 and scratchpad_tokens(compacted) > self.max_tokens:
+            compacted.pop(0)
+            dropped += 1
+        if scratchpad_tokens(compacted) > self.max_tokens:
+            # A single step over the cap: keep its action but compact even the latest observation
+            action, observation = compacted[0]
+            compacted = [(action, compact_observation(observation, max(self.observation_chars, self.max_tokens * 4 - len(action.log))))]
+        
+        after = scratchpad_tokens(compacted)
+        self._record(len(steps), split, dropped, before, after)
+        if after < before:
+            print(f"[Agent] Scratchpad at step {len(steps)}: {before} -> {after} tokens ({dropped} step(s) dropped)")
+        return compacted
+    
+    @staticmethod
+    def _record(step: int, compacted: int, dropped: int, before: int, after: int) -> None:
+        with ScratchpadCompactor._stats_lock:
+            stats = ScratchpadCompactor._stats
+            stats["calls"] += 1
+            stats["compacted_steps"] += compacted
+            stats["dropped_steps"] += dropped
+            stats["tokens_before"] += before
+            stats["tokens_after"] += after
+            totals = ScratchpadCompactor._tokens_by_step.setdefault(step, [0, 0])
+            totals[0] += after
+            totals[1] += 1
+    
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Get how much compaction saved, and the average scratchpad size at each step"""
+        with ScratchpadCompactor._stats_lock:
+            stats: Dict[str, Any] = dict(ScratchpadCompactor._stats)
+            by_step = {step: round(total / calls) for step, (total, calls) in sorted(ScratchpadCompactor._tokens_by_step.items())}
+        stats["saved_ratio"] = round(1 - stats["tokens_after"] / stats["tokens_before"], 3) if stats["tokens_before"] else 0.0
+        stats["avg_tokens_by_step"] = by_step
+        stats["max_tokens"] = Config.SCRATCHPAD_MAX_TOKENS
+        return stats
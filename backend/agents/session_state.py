@@ -0,0 +1,73 @@
+"""
+Per-session state passed into shared agents for the duration of one invocation
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+
+def new_reservation_state() -> Dict[str, Any]:
+    return {
+        "type": None,  # hotel, restaurant, or flight
+        "collected_info": {},
+        "awaiting": None  # slot whose question was asked last
+    }
+
+
+def _new_conversation() -> Dict[str, Any]:
+    return {
+        "context": {"turns": [], "summary": []},  # see ContextBuffer
+        "current_agent": None,
+        "collected_data": {}
+    }
+
+
+def _new_trip_state() -> Dict[str, Any]:
+    return {
+        "reservations": [],  # List of completed reservations
+        "current_step": None,  # What we're currently booking
+        "pending_items": []  # Items still to book
+    }
+
+
+@dataclass
+class SessionState:
+    """Everything kept for one session: agent state, conversation context and pending display data"""
+    
+    session_id: str = "default"
+    reservation_state: Dict[str, Any] = field(default_factory=new_reservation_state)
+    trip_state: Dict[str, Any] = field(default_factory=_new_trip_state)
+    conversation: Dict[str, Any] = field(default_factory=_new_conversation)
+    display_data: Dict[str, Any] = field(default_factory=dict)  # cards for the frontend, sent once
+    replies: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # recent results by idempotency key
+
+
+# Tools are shared across sessions, so they read the active session from here.
+# LangChain copies the context into the threads it runs tools on.
+_current_session: ContextVar[Optional[SessionState]] = ContextVar("current_session", default=None)
+
+
+def current_session() -> SessionState:
+    """Get the session of the agent invocation currently running"""
+    session = _current_session.get()
+    if session is None:
+        session = SessionState()
+        _current_session.set(session)
+    return session
+
+
+def bound_session() -> Optional[SessionState]:
+    """Get the session of the running agent invocation, or None outside one"""
+    return _current_session.get()
+
+
+@contextmanager
+def session_scope(session: Optional[SessionState]) -> Iterator[SessionState]:
+    """Make session the current session for the enclosed agent invocation"""
+    session = session or SessionState()
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
@@ -0,0 +1,460 @@
+"""
+Deterministic slot filling for single hotel, restaurant and flight reservations
+
+Clear answers to the booking questions ("2 people", "2026-02-15", "7pm",
+"yes", "John Smith") are parsed locally and the next question is asked
+without an LLM call. Anything free-form or ambiguous returns None so the
+reservation agent handles the turn.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import re
+import threading
+
+from config.config import Config
+from inventory.store import get_inventory
+
+
+# Longer messages are treated as free-form and left to the agent
+MAX_ANSWER_WORDS = 8
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+_MONTH = (
+    r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?"
+)
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s*(\d{4}))?"
+
+_DATE_PATTERNS = [
+    (re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b"), "ymd"),
+    (re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?\b"), "mdy"),
+    (re.compile(rf"\b{_MONTH}\s+{_DAY}\b{_YEAR}"), "month_day"),
+    (re.compile(rf"\b{_DAY}\s+(?:of\s+)?{_MONTH}{_YEAR}"), "day_month"),
+    (re.compile(r"\b(today|tonight|tomorrow)\b"), "relative"),
+]
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12
+}
+_NUMBER = re.compile(r"\b(\d+|" + "|".join(_NUMBER_WORDS) + r")\b")
+_SOLO = re.compile(r"\b(just me|only me|myself|solo|just myself|only myself)\b")
+_COUNT_WITH_UNIT = re.compile(
+    r"\b(\d+|" + "|".join(_NUMBER_WORDS) + r")\s+(people|persons|guests|adults|travell?ers|passengers|tickets|of us)\b"
+    r"|\b(?:party of|(?:table|room|seats?) for) (\d+|" + "|".join(_NUMBER_WORDS) + r")\b"
+)
+
+_TIME_12H = re.compile(r"\b(\d{1,2})(?::([0-5]\d))?\s*([ap])\.?\s*m\b\.?")
+_TIME_24H = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_TIME_WORDS = {"noon": (12, 0), "midday": (12, 0), "midnight": (0, 0)}
+
+_YES = {"yes", "yeah", "yep", "yup", "y", "sure", "correct", "round trip", "round-trip", "roundtrip", "return"}
+_NO = {"no", "nope", "n", "one way", "one-way", "oneway", "single"}
+
+_CITIES = [
+    "New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio",
+    "San Diego", "Dallas", "Austin", "San Jose", "San Francisco", "Seattle", "Denver", "Boston",
+    "Washington", "Nashville", "Portland", "Las Vegas", "Miami", "Atlanta", "Orlando", "New Orleans",
+    "Minneapolis", "Detroit", "Baltimore", "Pittsburgh", "Salt Lake City", "Honolulu", "Charlotte",
+    "Tampa", "St. Louis", "Kansas City", "Cleveland", "Toronto", "Vancouver", "Montreal",
+    "Mexico City", "Cancun", "London", "Paris", "Rome", "Madrid", "Barcelona", "Lisbon",
+    "Amsterdam", "Berlin", "Munich", "Vienna", "Prague", "Dublin", "Edinburgh", "Athens",
+    "Istanbul", "Dubai", "Tokyo", "Kyoto", "Osaka", "Seoul", "Beijing", "Shanghai", "Hong Kong",
+    "Singapore", "Bangkok", "Sydney", "Melbourne", "Auckland", "Rio de Janeiro", "Buenos Aires"
+]
+_CITY_ALIASES = {
+    "nyc": "New York", "ny": "New York", "new york city": "New York", "manhattan": "New York",
+    "la": "Los Angeles", "sf": "San Francisco", "san fran": "San Francisco",
+    "dc": "Washington", "washington dc": "Washington", "washington d.c.": "Washington",
+    "vegas": "Las Vegas", "philly": "Philadelphia", "nola": "New Orleans", "slc": "Salt Lake City",
+    "saint louis": "St. Louis", "st louis": "St. Louis", "rio": "Rio de Janeiro"
+}
+_CITY_LOOKUP = {**{city.lower(): city for city in _CITIES}, **_CITY_ALIASES}
+# Longest names first so "new york city" wins over "new york"
+_CITY_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(name) for name in sorted(_CITY_LOOKUP, key=len, reverse=True)) + r")\b"
+)
+
+_NAME_PREFIX = re.compile(r"^(?:my name is|the name is|name is|it's|its|it is|under|put it under)\s+", re.IGNORECASE)
+_NAME_TOKEN = re.compile(r"^[A-Za-z][A-Za-z'\-.]*$")
+# Words that mean the message is a sentence, not a name
+_NOT_NAME = {
+    "a", "an", "the", "and", "or", "but", "to", "for", "of", "in", "on", "at", "by", "with", "from",
+    "i", "me", "my", "we", "us", "our", "you", "your", "it", "is", "are", "be", "do", "can", "could",
+    "would", "will", "want", "need", "like", "please", "thanks", "thank", "yes", "no", "not", "what",
+    "when", "where", "which", "how", "why", "book", "show", "find", "cancel", "change", "actually",
+    "hotel", "hotels", "restaurant", "restaurants", "flight", "flights", "trip", "people", "tickets",
+    "today", "tomorrow", "tonight", "morning", "evening", "night", "sure", "okay", "ok", "instead"
+}
+
+# Words in hotel, restaurant and airline names, never in a guest's name ("Comfort Inn", "Sakura Sushi Bar")
+_VENUE_WORDS = {
+    "inn", "hotel", "motel", "resort", "suites", "lodge", "hostel", "bar", "grill", "cafe", "café", "bistro",
+    "diner", "kitchen", "pizzeria", "trattoria", "tavern", "pub", "sushi", "steakhouse", "brasserie", "eatery",
+    "airlines", "airways"
+}
+
+_TYPE_WORDS = {
+    "hotel": re.compile(r"\b(hotels?|rooms?|accommodations?|stay)\b"),
+    "restaurant": re.compile(r"\b(restaurants?|table|dinner|lunch|brunch|dining)\b"),
+    "flight": re.compile(r"\b(flights?|fly|flying|plane)\b"),
+}
+_BOOKING_WORDS = re.compile(r"\b(book|reserve|reservation|need|want|get|make)\b")
+# The agent shows options with DisplayResults when asked; those turns are not answers
+_DISPLAY_WORDS = re.compile(r"\b(show|find|display|see|search|available|options|what are|list)\b")
+
+
+def _resolve_year(month: int, day: int, year: Optional[int], today: date) -> Optional[date]:
+    try:
+        if year is not None:
+            return date(year, month, day)
+        candidate = date(today.year, month, day)
+        # Without a year, mean the next occurrence
+        return candidate if candidate >= today else date(today.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+def find_dates(text: str, today: Optional[date] = None) -> List[Tuple[int, str]]:
+    """Return (position, YYYY-MM-DD) for every date mentioned in text"""
+    today = today or date.today()
+    text = text.lower()
+    found: Dict[int, str] = {}
+    taken: List[Tuple[int, int]] = []
+    
+    for pattern, kind in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            if any(start < match.end() and match.start() < end for start, end in taken):
+                continue
+            
+            groups = match.groups()
+            if kind == "ymd":
+                value = _resolve_year(int(groups[1]), int(groups[2]), int(groups[0]), today)
+            elif kind == "mdy":
+                year = int(groups[2]) if groups[2] else None
+                if year is not None and year < 100:
+                    year += 2000
+                value = _resolve_year(int(groups[0]), int(groups[1]), year, today)
+            elif kind == "month_day":
+                value = _resolve_year(_MONTHS[groups[0][:3]], int(groups[1]), int(groups[2]) if groups[2] else None, today)
+            elif kind == "day_month":
+                value = _resolve_year(_MONTHS[groups[1][:3]], int(groups[0]), int(groups[2]) if groups[2] else None, today)
+            else:
+                value = today + timedelta(days=1 if groups[0] == "tomorrow" else 0)
+            
+            if value is not None:
+                found[match.start()] = value.isoformat()
+                taken.append((match.start(), match.end()))
+    
+    return sorted(found.items())
+
+
+def parse_date(text: str, today: Optional[date] = None) -> Optional[str]:
+    """Parse an answer containing exactly one date that is not in the past"""
+    today = today or date.today()
+    dates = find_dates(text, today)
+    if len(dates) != 1 or dates[0][1] < today.isoformat():
+        return None
+    return dates[0][1]
+
+
+def parse_count(text: str) -> Optional[int]:
+    """Parse a party size or ticket count ("2", "two people", "just me")"""
+    text = text.lower()
+    if _SOLO.search(text):
+        return 1
+    if find_dates(text) or find_times(text):
+        return None
+    
+    numbers = _NUMBER.findall(text)
+    if len(numbers) != 1:
+        return None
+    value = _NUMBER_WORDS.get(numbers[0]) or int(numbers[0])
+    return value if 1 <= value <= 20 else None
+
+
+def _format_time(hour: int, minute: int) -> str:
+    suffix = "AM" if hour < 12 else "PM"
+    return f"{(hour % 12) or 12}:{minute:02d} {suffix}"
+
+
+def find_times(text: str) -> List[str]:
+    """Return every unambiguous time in text, formatted like "7:30 PM" """
+    text = text.lower()
+    times = []
+    for hour, minute, meridiem in _TIME_12H.findall(text):
+        hour_value = int(hour)
+        if 1 <= hour_value <= 12:
+            hour_value = hour_value % 12 + (12 if meridiem == "p" else 0)
+            times.append(_format_time(hour_value, int(minute or 0)))
+    if not times:
+        # 24-hour clock only when the hour can't be a 12-hour one ("19:30", not "7:30")
+        times += [_format_time(int(h), int(m)) for h, m in _TIME_24H.findall(text) if int(h) >= 13 or h.startswith("0")]
+    for word, (hour, minute) in _TIME_WORDS.items():
+        if re.search(rf"\b{word}\b", text):
+            times.append(_format_time(hour, minute))
+    return times
+
+
+def parse_time(text: str) -> Optional[str]:
+    """Parse an answer containing exactly one unambiguous time"""
+    times = find_times(text)
+    return times[0] if len(times) == 1 else None
+
+
+def parse_trip_type(text: str) -> Optional[str]:
+    """Parse the answer to "Is this a round trip?" into round-trip/one-way"""
+    text = re.sub(r"[^a-z\- ]", "", text.lower()).strip()
+    phrases = {text, *text.split()}
+    is_yes = any(phrase in _YES for phrase in phrases) or any(p in text for p in ("round trip", "round-trip"))
+    is_no = any(phrase in _NO for phrase in phrases) or any(p in text for p in ("one way", "one-way"))
+    if is_yes == is_no:
+        return None
+    return "round-trip" if is_yes else "one-way"
+
+
+def find_cities(text: str) -> List[Tuple[int, str]]:
+    """Return (position, canonical name) for every known city mentioned in text"""
+    return [(match.start(), _CITY_LOOKUP[match.group(1)]) for match in _CITY_PATTERN.finditer(text.lower())]
+
+
+def parse_city(text: str) -> Optional[str]:
+    """Parse an answer that is just a known city ("NYC", "in Boston", "Austin, TX")"""
+    text = re.sub(r"^(?:in|to|from|at)\s+", "", text.strip().lower().rstrip(".!"))
+    text = re.sub(r",\s*[a-z]{2}$", "", text)  # drop a state/country code
+    return _CITY_LOOKUP.get(text)
+
+
+def _words(text: str) -> List[str]:
+    return re.sub(r"[^a-z0-9é]+", " ", text.lower()).split()
+
+
+# The catalog's venue names as word lists joined by spaces, for the names set they were made from
+_venues: Tuple[frozenset, frozenset] = (frozenset(), frozenset())
+_venues_lock = threading.Lock()
+
+
+def _is_venue(text: str) -> bool:
+    """Whether text names a hotel or restaurant rather than a person ("Comfort Inn Suites")"""
+    global _venues
+    words = _words(text)
+    if any(word in _VENUE_WORDS for word in words):
+        return True
+    names = get_inventory().venue_names()
+    with _venues_lock:
+        if _venues[0] is not names:
+            _venues = (names, frozenset(" ".join(_words(name)) for name in names))
+        venues = _venues[1]
+    return " ".join(words) in venues
+
+
+def parse_name(text: str) -> Optional[str]:
+    """Parse a bare full name ("John Smith", "my name is Ana de la Cruz"), not a venue's"""
+    text = _NAME_PREFIX.sub("", text.strip().rstrip(".!"))
+    tokens = text.split()
+    if not 2 <= len(tokens) <= 4:
+        return None
+    if any(not _NAME_TOKEN.match(token) or token.lower() in _NOT_NAME for token in tokens):
+        return None
+    if parse_city(text) or _is_venue(text):
+        return None
+    return text.title() if text.islower() else text
+
+
+def _after(first: str) -> Callable[[Any, Dict[str, Any]], bool]:
+    """Validator: the value must not be earlier than another collected date"""
+    return lambda value, info: first not in info or value > info[first]
+
+
+@dataclass(frozen=True)
+class Slot:
+    """One piece of information a reservation needs"""
+    name: str  # key in collected_info and in ConfirmReservation's input
+    question: str
+    parser: Callable[[str], Any]
+    valid: Optional[Callable[[Any, Dict[str, Any]], bool]] = None  # cross-checks against other slots
+    needed: Optional[Callable[[Dict[str, Any]], bool]] = None  # only required when this is true
+
+
+# Required fields, in the order the reservation prompt asks for them
+SLOT_SCHEMAS: Dict[str, List[Slot]] = {
+    "hotel": [
+        Slot("city", "What city will you be staying in?", parse_city),
+        Slot("people", "How many people will be staying?", parse_count),
+        Slot("checkin", "What is your check-in date? (Format: YYYY-MM-DD)", parse_date),
+        Slot("checkout", "What is your check-out date? (Format: YYYY-MM-DD)", parse_date, valid=_after("checkin")),
+        Slot("name", "What name should the reservation be under?", parse_name),
+    ],
+    "restaurant": [
+        Slot("city", "What city is the restaurant in?", parse_city),
+        Slot("people", "How many people will be dining?", parse_count),
+        Slot("date", "What date would you like to dine? (Format: YYYY-MM-DD)", parse_date),
+        Slot("time", "What time would you like?", parse_time),
+        Slot("name", "What name should the reservation be under?", parse_name),
+    ],
+    "flight": [
+        Slot("tickets", "How many tickets do you need?", parse_count),
+        Slot("from", "What city will you be departing from?", parse_city),
+        Slot("to", "What city will you be flying to?", parse_city, valid=lambda value, info: value != info.get("from")),
+        Slot("departure_date", "What is your departure date? (Format: YYYY-MM-DD)", parse_date),
+        Slot("trip_type", "Is this a round trip?", parse_trip_type),
+        Slot("return_date", "What is your return date? (Format: YYYY-MM-DD)", parse_date,
+             valid=_after("departure_date"), needed=lambda info: info.get("trip_type") == "round-trip"),
+        Slot("name", "What name should the reservation be under?", parse_name),
+    ],
+}
+
+_ACKS = ["Perfect!", "Great!", "Got it.", "Excellent!"]
+
+
+def detect_reservation_type(text: str) -> Optional[str]:
+    """Return hotel/restaurant/flight if text asks to book exactly one of them"""
+    text = text.lower()
+    if not _BOOKING_WORDS.search(text):
+        return None
+    types = [kind for kind, pattern in _TYPE_WORDS.items() if pattern.search(text)]
+    return types[0] if len(types) == 1 else None
+
+
+def extract_opening(kind: str, text: str) -> Dict[str, Any]:
+    """Pick up whatever the opening request already says ("a hotel in NYC for 2 people")"""
+    lowered = text.lower()
+    info: Dict[str, Any] = {}
+    
+    count = _COUNT_WITH_UNIT.search(lowered)
+    if count:
+        raw = count.group(1) or count.group(3)
+        info["tickets" if kind == "flight" else "people"] = _NUMBER_WORDS.get(raw) or int(raw)
+    
+    cities = find_cities(text)
+    if kind == "flight":
+        for position, city in cities:
+            preceding = lowered[:position].split()[-1:] or [""]
+            if preceding[0] == "from":
+                info["from"] = city
+            elif preceding[0] == "to":
+                info["to"] = city
+    elif cities:
+        info["city"] = cities[0][1]
+    
+    today = date.today().isoformat()
+    dates = [value for _, value in find_dates(text) if value >= today]
+    date_slots = {"hotel": ["checkin", "checkout"], "restaurant": ["date"], "flight": ["departure_date", "return_date"]}[kind]
+    for slot, value in zip(date_slots, dates):
+        info[slot] = value
+    if kind == "flight" and "return_date" in info:
+        info["trip_type"] = "round-trip"
+    
+    if kind == "restaurant":
+        times = find_times(text)
+        if len(times) == 1:
+            info["time"] = times[0]
+    
+    # Drop anything that fails the same checks an answer would
+    for slot in SLOT_SCHEMAS[kind]:
+        if slot.name in info and slot.valid and not slot.valid(info[slot.name], info):
+            del info[slot.name]
+    return info
+
+
+class SlotFiller:
+    """Drives a reservation's question-and-answer flow without the LLM where it can"""
+    
+    # Process-wide counters of turns answered locally vs passed to the agent
+    _stats = {"filled_locally": 0, "delegated": 0, "confirmed_locally": 0}
+    _stats_lock = threading.Lock()
+    
+    def __init__(self, confirm: Callable[[Dict[str, Any]], str]):
+        """
+        Args:
+            confirm: Books the reservation from the collected details and returns the confirmation text
+        """
+        self.confirm = confirm
+    
+    @staticmethod
+    def _count(key: str) -> None:
+        with SlotFiller._stats_lock:
+            SlotFiller._stats[key] += 1
+    
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Get how many reservation turns skipped the LLM"""
+        with SlotFiller._stats_lock:
+            stats = dict(SlotFiller._stats)
+        total = stats["filled_locally"] + stats["delegated"]
+        stats["local_ratio"] = round(stats["filled_locally"] / total, 3) if total else 0.0
+        stats["enabled"] = Config.SLOT_FILLING_ENABLED
+        return stats
+    
+    @staticmethod
+    def _next_slot(kind: str, info: Dict[str, Any]) -> Optional[Slot]:
+        for slot in SLOT_SCHEMAS[kind]:
+            if slot.name not in info and (slot.needed is None or slot.needed(info)):
+                return slot
+        return None
+    
+    def _ask_next(self, state: Dict[str, Any], opening: bool) -> str:
+        kind, info = state["type"], state["collected_info"]
+        slot = self._next_slot(kind, info)
+        
+        if slot is None:
+            reply = self.confirm({"type": kind, **info})
+            state.update(type=None, collected_info={}, awaiting=None)
+            self._count("confirmed_locally")
+            return reply
+        
+        state["awaiting"] = slot.name
+        if opening:
+            where = f" in {info['city']}" if info.get("city") else ""
+            return f"I'll help you book a {kind}{where}. {slot.question}"
+        return f"{_ACKS[len(info) % len(_ACKS)]} {slot.question}"
+    
+    def _fill(self, state: Dict[str, Any], message: str) -> Optional[str]:
+        if _DISPLAY_WORDS.search(message.lower()):
+            return None
+        
+        requested = detect_reservation_type(message)
+        if requested and requested != state.get("type"):
+            state.update(type=requested, collected_info=extract_opening(requested, message), awaiting=None)
+            return self._ask_next(state, opening=True)
+        
+        kind, awaiting = state.get("type"), state.get("awaiting")
+        if not kind or not awaiting or len(message.split()) > MAX_ANSWER_WORDS:
+            return None
+        
+        slot = next(slot for slot in SLOT_SCHEMAS[kind] if slot.name == awaiting)
+        value = slot.parser(message)
+        info = state["collected_info"]
+        if value is None or (slot.valid and not slot.valid(value, info)):
+            return None
+        
+        info[slot.name] = value
+        return self._ask_next(state, opening=False)
+    
+    def handle(self, state: Dict[str, Any], message: str) -> Optional[str]:
+        """
+        Answer a reservation turn locally if the message is an unambiguous answer
+        
+        Args:
+            state: The session's reservation_state (updated in place)
+            message: The user's latest message
+        
+        Returns:
+            The reply to send, or None if the agent should handle the turn (and,
+            if a booking is in progress, the rest of its questions)
+        """
+        if not Config.SLOT_FILLING_ENABLED:
+            return None
+        
+        reply = self._fill(state, message.strip())
+        if reply is None and state.get("awaiting"):
+            # The agent takes over this flow and may ask something else next, so stop
+            # reading answers as replies to the last question until a new booking starts
+            state["awaiting"] = None
+        self._count("filled_locally" if reply is not None else "delegated")
+        return reply
@@ -0,0 +1,244 @@
+"""
+Agent loop driven by chat-completions function calling instead of ReAct text parsing
+"""
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+import json
+
+from agents.budgeted_executor import out_of_budget, partial_answer
+from agents.example_selector import EXAMPLES_SLOT
+from agents.scratchpad import compact_observation
+from config.config import Config
+from models.groq_llm import GroqLLM
+from models.streaming import emit_answer
+
+
+# Appended to the agent's instructions; the shared prompts show tool use in ReAct form
+TOOL_CALLING_NOTE = """
+
+Call tools through function calling. The examples above write tool use as
+Action/Action Input and replies as "Final Answer:" for readability only: never
+write those markers yourself, just reply to the user in plain text."""
+
+
+FINAL_ANSWER = "Final Answer:"
+
+
+class ToolInput(BaseModel):
+    """Arguments for tools that take a single free-text input"""
+    input: str = Field(default="", description="Input for the tool")
+
+
+def _compact_schema(schema: Any, defs: Dict[str, Any]) -> Any:
+    """
+    Shrink a pydantic JSON schema for the prompt: inline $refs, turn
+    Optional[X] (anyOf X/null, default null) into plain X, and drop titles
+    """
+    if isinstance(schema, list):
+        return [_compact_schema(value, defs) for value in schema]
+    if not isinstance(schema, dict):
+        return schema
+    
+    if "$ref" in schema:
+        return _compact_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    
+    any_of = schema.get("anyOf")
+    if any_of and "default" in schema and schema["default"] is None:
+        variants = [variant for variant in any_of if variant.get("type") != "null"]
+        if len(variants) == 1:
+            extra = {key: value for key, value in schema.items() if key not in ("anyOf", "default")}
+            return _compact_schema({**variants[0], **extra}, defs)
+    
+    return {
+        key: _compact_schema(value, defs)
+        for key, value in schema.items()
+        if key != "$defs" and not (key == "title" and isinstance(value, str))
+    }
+
+
+def tool_schema(tool: BaseTool, args_model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Describe a tool in the chat-completions tools format
+    
+    An argument model's docstring replaces the tool's ReAct description,
+    whose input format and examples the parameter schema now covers.
+    """
+    schema = args_model.model_json_schema()
+    description = schema.pop("description", None) if args_model is not ToolInput else None
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": " ".join((description or tool.description).split()),
+            "parameters": _compact_schema(schema, schema.get("$defs", {}))
+        }
+    }
+
+
+class ToolCallingExecutor:
+    """
+    Run an agent with native tool calls
+    
+    Drop-in for AgentExecutor (invoke/ainvoke return {"output": ...}). Tool
+    arguments arrive as JSON and are validated against each tool's pydantic
+    model; validation errors go back to the model as the tool result so it
+    can correct itself instead of burning an iteration on a parse failure.
+    """
+    
+    def __init__(
+        self,
+        llm: GroqLLM,
+        tools: List[BaseTool],
+        system_prompt: str,
+        tool_args: Optional[Dict[str, Type[BaseModel]]] = None,
+        max_iterations: int = 90
+    ):
+        """
+        Args:
+            llm: Model to drive the loop
+            tools: Tools the model may call
+            system_prompt: Agent instructions
+            tool_args: Argument model per tool name (ToolInput when missing)
+            max_iterations: Model calls allowed before a final answer is forced
+        """
+        self.llm = llm
+        self.tools = {tool.name: tool for tool in tools}
+        self.system_prompt = system_prompt
+        self.tool_args = {name: (tool_args or {}).get(name, ToolInput) for name in self.tools}
+        self.max_iterations = max_iterations
+        self.schemas = [tool_schema(tool, self.tool_args[tool.name]) for tool in tools]
+    
+    def _messages(self, input_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            {"role": "system", "content": self.system_prompt.replace(EXAMPLES_SLOT, input_data.get("examples", ""))},
+            {"role": "user", "content": input_data["input"]}
+        ]
+    
+    def _parse_call(self, call: Dict[str, Any]) -> Union[str, Tuple[BaseTool, str]]:
+        """Return (tool, tool input) for a tool call, or an error message for the model"""
+        name = call["function"]["name"]
+        tool = self.tools.get(name)
+        if tool is None:
+            return f"{name} is not a valid tool, try one of [{', '.join(self.tools)}]."
+        
+        args_model = self.tool_args[name]
+        try:
+            args = args_model.model_validate_json(call["function"].get("arguments") or "{}")
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(map(str, error['loc'])) or 'arguments'}: {error['msg']}" for error in e.errors())
+            return f"Invalid arguments for {name}: {problems}"
+        
+        # Tools keep their single-string signature so they still work under ReAct
+        fields = list(args_model.model_fields)
+        if not fields:
+            return tool, ""
+        if len(fields) == 1:
+            return tool, str(getattr(args, fields[0]))
+        return tool, json.dumps(args.model_dump(exclude_none=True, by_alias=True))
+    
+    @staticmethod
+    def _result_message(call: Dict[str, Any], observation: Any) -> Dict[str, Any]:
+        return {"role": "tool", "tool_call_id": call["id"], "content": str(observation)}
+    
+    @staticmethod
+    def _compact(messages: List[Dict[str, Any]]) -> None:
+        """
+        Bound the history each call re-sends (the counterpart of ScratchpadCompactor)
+        
+        Tool results of all but the latest SCRATCHPAD_KEEP_STEPS tool-calling
+        turns are compacted; if the turns are still over SCRATCHPAD_MAX_TOKENS,
+        the oldest are dropped. A turn (the assistant's calls and their
+        results) is only ever dropped whole, keeping the call/result pairing
+        the API requires. Works in place on the history after the system and
+        user messages.
+        """
+        turns = [i for i, message in enumerate(messages) if message.get("tool_calls")]
+        if len(turns) > Config.SCRATCHPAD_KEEP_STEPS:
+            cutoff = turns[len(turns) - Config.SCRATCHPAD_KEEP_STEPS]
+            for message in messages[:cutoff]:
+                if message["role"] == "tool":
+                    message["content"] = compact_observation(message["content"], Config.SCRATCHPAD_OBSERVATION_CHARS)
+        
+        history = turns[0] if turns else len(messages)
+        while len(turns) > 1 and len(json.dumps(messages[history:])) // 4 > Config.SCRATCHPAD_MAX_TOKENS:
+            dropped = turns[1] - turns[0]
+            del messages[turns[0]:turns[1]]
+            turns = [i - dropped for i in turns[1:]]
+    
+    def _finish(self, message: Dict[str, Any], callbacks: Optional[list]) -> Dict[str, Any]:
+        output = message.get("content") or ""
+        # The prompts' examples can still coax a ReAct-style answer out of the model
+        if FINAL_ANSWER in output:
+            output = output.split(FINAL_ANSWER, 1)[1].strip()
+        # There is no ReAct text to filter, so the answer goes to stream handlers in one piece
+        emit_answer(callbacks, output)
+        return {"output": output}
+    
+    def _stopped(self, messages: List[Dict[str, Any]], callbacks: Optional[list]) -> Dict[str, Any]:
+        """Deadline reached: answer from the tool results gathered so far"""
+        observations = [message["content"] for message in messages if message["role"] == "tool"]
+        return self._finish({"content": partial_answer(observations)}, callbacks)
+    
+    def invoke(self, input_data: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run the tool-calling loop until the model replies without calling a tool"""
+        callbacks = (config or {}).get("callbacks")
+        messages = self._messages(input_data)
+        
+        for _ in range(self.max_iterations):
+            if out_of_budget():
+                return self._stopped(messages, callbacks)
+            self._compact(messages)
+            message = self.llm.chat(messages, tools=self.schemas)
+            if not message.get("tool_calls"):
+                return self._finish(message, callbacks)
+            
+            messages.append(message)
+            for call in message["tool_calls"]:
+                parsed = self._parse_call(call)
+                if isinstance(parsed, str):
+                    observation = parsed
+                else:
+                    tool, tool_input = parsed
+                    try:
+                        observation = tool.run(tool_input, callbacks=callbacks)
+                    except Exception as e:
+                        observation = f"Error running {tool.name}: {str(e)}"
+                messages.append(self._result_message(call, observation))
+        
+        # Out of iterations: ask for an answer, still sending the tools the history refers to
+        if out_of_budget():
+            return self._stopped(messages, callbacks)
+        self._compact(messages)
+        return self._finish(self.llm.chat(messages, tools=self.schemas, tool_choice="none"), callbacks)
+    
+    async def ainvoke(self, input_data: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async counterpart of invoke"""
+        callbacks = (config or {}).get("callbacks")
+        messages = self._messages(input_data)
+        
+        for _ in range(self.max_iterations):
+            if out_of_budget():
+                return self._stopped(messages, callbacks)
+            self._compact(messages)
+            message = await self.llm.achat(messages, tools=self.schemas)
+            if not message.get("tool_calls"):
+                return self._finish(message, callbacks)
+            
+            messages.append(message)
+            for call in message["tool_calls"]:
+                parsed = self._parse_call(call)
+                if isinstance(parsed, str):
+                    observation = parsed
+                else:
+                    tool, tool_input = parsed
+                    try:
+                        observation = await tool.arun(tool_input, callbacks=callbacks)
+                    except Exception as e:
+                        observation = f"Error running {tool.name}: {str(e)}"
+                messages.append(self._result_message(call, observation))
+        
+        if out_of_budget():
+            return self._stopped(messages, callbacks)
+        self._compact(messages)
+        return self._finish(await self.llm.achat(messages, tools=self.schemas, tool_choice="none"), callbacks)
@@ -1,22 +1,34 @@
 from agents.base_agent import BaseAgent
-from agents.reservation_agent import EnhancedReservationAgent
+from agents.session_state import current_session
 from langchain_core.tools import Tool
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Dict, Literal, Type
 import json
 
 
+class PlanTripArgs(BaseModel):
+    """Work out what needs booking for a trip (flights, hotels, restaurants). Use this ONCE at the start."""
+    details: str = Field(description="The user's trip request in their own words")
+
+
+class StartReservationArgs(BaseModel):
+    """Start the next reservation of the trip; returns the questions to ask"""
+    reservation_type: Literal["flight", "hotel", "restaurant"]
+
+
+class CompleteReservationArgs(BaseModel):
+    """Mark the current reservation complete once ALL its information, including the name, is collected"""
+    confirmation_details: str = Field(description="Summary of all collected information, including the name")
+
+
+class GetTripSummaryArgs(BaseModel):
+    """Summarise completed and pending reservations. Use at the end to show the final itinerary."""
+
+
 class TripBookingAgent(BaseAgent):
     """Trip Booking Agent for coordinating multiple reservations"""
     
-    def __init__(self):
-        # Initialize a reservation agent instance to use as a tool
-        self.reservation_agent = EnhancedReservationAgent()
-        self.trip_state = {
-            "reservations": [],  # List of completed reservations
-            "current_step": None,  # What we're currently booking
-            "pending_items": []  # Items still to book
-        }
-        super().__init__()
+    role = "trip_booking"
     
     def _create_tools(self) -> List[Tool]:
         """Create tools for trip booking"""
@@ -79,7 +91,7 @@ class TripBookingAgent(BaseAgent):
                         "needs_clarification": True
                     }, indent=2)
                 
-                self.trip_state["pending_items"] = items
+                current_session().trip_state["pending_items"] = items
                 
                 return json.dumps({
                     "total_items": len(items),
@@ -136,22 +148,24 @@ class TripBookingAgent(BaseAgent):
             Mark current reservation as complete.
             """
             try:
+                trip_state = current_session().trip_state
+                
                 # Mark as completed
-                if self.trip_state["pending_items"]:
-                    for item in self.trip_state["pending_items"]:
+                if trip_state["pending_items"]:
+                    for item in trip_state["pending_items"]:
                         if item["status"] == "pending":
                             item["status"] = "completed"
                             item["confirmation"] = confirmation_details
-                            self.trip_state["reservations"].append(item)
+                            trip_state["reservations"].append(item)
                             break
                 
                 # Check remaining
-                pending_count = sum(1 for item in self.trip_state["pending_items"] 
+                pending_count = sum(1 for item in trip_state["pending_items"] 
                                    if item["status"] == "pending")
                 
                 return json.dumps({
                     "status": "completed",
-                    "total_completed": len(self.trip_state["reservations"]),
+                    "total_completed": len(trip_state["reservations"]),
                     "remaining": pending_count,
                     "all_done": pending_count == 0
                 }, indent=2)
@@ -159,22 +173,24 @@ class TripBookingAgent(BaseAgent):
             except Exception as e:
                 return f"Error completing reservation: {str(e)}"
         
-        def get_trip_summary() -> str:
+        def get_trip_summary(_: str = "") -> str:
             """Get summary of all reservations in the trip."""
             try:
+                trip_state = current_session().trip_state
+                
                 summary = {
-                    "total_reservations": len(self.trip_state["reservations"]),
+                    "total_reservations": len(trip_state["reservations"]),
                     "completed": [],
                     "pending": []
                 }
                 
-                for res in self.trip_state["reservations"]:
+                for res in trip_state["reservations"]:
                     summary["completed"].append({
                         "type": res["type"],
                         "confirmation": res.get("confirmation", "N/A")
                     })
                 
-                for item in self.trip_state["pending_items"]:
+                for item in trip_state["pending_items"]:
                     if item["status"] == "pending":
                         summary["pending"].append(item["type"])
                 
@@ -206,6 +222,14 @@ class TripBookingAgent(BaseAgent):
             )
         ]
     
+    def get_tool_args(self) -> Dict[str, Type[BaseModel]]:
+        return {
+            "PlanTrip": PlanTripArgs,
+            "StartReservation": StartReservationArgs,
+            "CompleteReservation": CompleteReservationArgs,
+            "GetTripSummary": GetTripSummaryArgs
+        }
+    
     def get_prompt_template(self) -> str:
         return """You are a trip booking assistant that helps users book complete trips with multiple reservations (flights, hotels, restaurants).
 
@@ -244,52 +268,9 @@ RESTAURANT:
 4. Time
 5. Name on reservation ← MUST GET THIS
 
-EXAMPLE:
-
-User: "Plan a trip to NYC for 3 days"
-
-Thought: Need to create trip plan.
-Action: PlanTrip
-Action Input: Plan a trip to NYC for 3 days
-Observation: {{"total_items": 2, "items": [{{"type": "flight"}}, {{"type": "hotel"}}]}}
-Thought: Plan created. Start with flight.
-Action: StartReservation
-Action Input: flight
-Observation: {{"first_question": "How many tickets do you need?"}}
-Thought: Ready to ask first flight question.
-Final Answer: Great! I'll help plan your 3-day NYC trip. Let's start with your flight. How many tickets do you need?
-
-User: "2"
-Thought: Got tickets=2. Need departing city next.
-Final Answer: Perfect! What city will you be departing from?
-
-User: "Boston"
-Thought: Got tickets=2, departing=Boston. Destination is NYC from original request. Need departure date.
-Final Answer: What is your departure date? (Format: YYYY-MM-DD)
-
-User: "2026-02-15"
-Thought: Got tickets=2, departing=Boston, arriving=NYC, departure=2026-02-15. Need to know if round trip.
-Final Answer: Is this a round trip?
-
-User: "Yes"
-Thought: Round trip. Need return date.
-Final Answer: When would you like to return? (Format: YYYY-MM-DD)
-
-User: "2026-02-18"
-Thought: Got tickets=2, departing=Boston, arriving=NYC, depart 2/15, return 2/18. Need name for reservation.
-Final Answer: What name should the flight reservation be under?
+EXAMPLES (the ones most relevant to this conversation):
 
-User: "Sarah Johnson"
-Thought: Have ALL flight info: tickets=2, departing=Boston, arriving=NYC, depart 2/15, return 2/18, name=Sarah Johnson. Complete it.
-Action: CompleteReservation
-Action Input: Flight confirmed - 2 tickets, Boston to NYC, depart 2/15/2026, return 2/18/2026, name Sarah Johnson
-Observation: {{"remaining": 1, "all_done": false}}
-Thought: Flight complete. Start hotel booking.
-Action: StartReservation
-Action Input: hotel
-Observation: {{"first_question": "What city will you be staying in?"}}
-Thought: Ready to ask first hotel question.
-Final Answer: Excellent! Your flight is booked. Now for your hotel in NYC. How many people will be staying?
+{examples}
 
 You have access to these tools:
 {tools}
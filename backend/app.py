@@ -1,9 +1,28 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 from flask_cors import CORS
 from controllers.assistant_controller import AssistantController
 from tools.data_display_tool import DataDisplayTool
 from config.config import Config
+from inventory import InvalidCursor, StaleCursor
+from inventory.store import DEFAULT_DATA_DIR, SCHEMAS, catalog_path, get_inventory
+from models.http_transport import get_transport
+from models.job_queue import QueueFull, get_job_queue
+from models.llm_cache import get_llm_cache
+from models.rate_limiter import get_rate_limiter_stats
+from models.session_locks import get_session_locks
+from models.session_store import get_session_store
+from models.single_flight import get_single_flight
+from models.agent_router import AgentRouter
+from agents.fallback_replies import FallbackReplies
+from agents.scratchpad import ScratchpadCompactor
+from agents.slot_filling import SlotFiller
+from models.deadline import Deadline
+from models.intent_classifier import get_intent_classifier
+from models.streaming import FinalAnswerStreamHandler
+from models.usage_meter import get_usage_stats
+import hmac
 import json
+import threading
 
 app = Flask(__name__)
 CORS(app)
@@ -11,6 +30,13 @@ CORS(app)
 # Initialize the assistant controller
 assistant = AssistantController()
 
+# Train the local intent classifier up front instead of on the first request
+if Config.INTENT_FASTPATH_ENABLED:
+    get_intent_classifier()
+
+# Load the catalog and build its indexes before serving
+get_inventory()
+
 
 @app.route('/')
 def index():
@@ -36,15 +62,11 @@ def process():
     
     user_input = data.get('input', '')
     session_id = data.get('session_id', 'default')
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
     
-    result = assistant.process_request(user_input, session_id)
-    
-    # Check if there's display data to send
-    display_data = DataDisplayTool.get_display_data(session_id)
-    if display_data:
-        result['display_data'] = display_data
-        # Clear after sending so it's only sent once
-        DataDisplayTool.clear_display_data(session_id)
+    # The whole request (routing, agent steps, LLM calls) must finish within this budget
+    deadline = Deadline(Config.AGENT_TIMEOUT)
+    result = assistant.process_request(user_input, session_id, deadline=deadline, idempotency_key=idempotency_key)
     
     # DEBUG: Print outgoing response
     print("\n" + "="*60)
@@ -62,6 +84,159 @@ def process():
     return jsonify(result)
 
 
+def _sse(event: str, data) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/api/process/stream', methods=['POST'])
+def process_stream():
+    """
+    Streaming variant of /api/process using server-sent events
+    
+    Events:
+        token: a piece of the Final Answer as it is generated
+        display_data: structured cards for the frontend (sent once, if any)
+        done: the complete result, same shape as /api/process
+    """
+    data = request.get_json()
+    user_input = data.get('input', '')
+    session_id = data.get('session_id', 'default')
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    
+    handler = FinalAnswerStreamHandler()
+    outcome = {}
+    deadline = Deadline(Config.AGENT_TIMEOUT)
+    
+    def run():
+        try:
+            outcome['result'] = assistant.process_request(
+                user_input, session_id, callbacks=[handler], deadline=deadline, idempotency_key=idempotency_key
+            )
+        finally:
+            handler.finish()
+    
+    threading.Thread(target=run, daemon=True).start()
+    
+    def generate():
+        for event, payload in handler.events(timeout=Config.STREAM_KEEPALIVE_SECONDS):
+            if event == "ping":
+                yield ": keep-alive\n\n"
+            else:
+                yield _sse(event, payload)
+        
+        result = outcome.get('result') or {
+            "success": False,
+            "agent": None,
+            "response": "An error occurred processing your request.",
+            "error": "Stream ended without a result"
+        }
+        
+        display_data = result.pop('display_data', None)
+        if display_data:
+            yield _sse("display_data", display_data)
+        
+        yield _sse("done", result)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # keep reverse proxies from buffering the stream
+    })
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a turn and return at once with its job id (same body as /api/process)
+    
+    The time budget starts when a worker picks the job up, not at submission.
+    """
+    data = request.get_json()
+    user_input = data.get('input', '')
+    session_id = data.get('session_id', 'default')
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    
+    def run(callbacks):
+        return assistant.process_request(
+            user_input, session_id, callbacks=callbacks, deadline=Deadline(Config.AGENT_TIMEOUT),
+            idempotency_key=idempotency_key
+        )
+    
+    try:
+        job = get_job_queue().submit(session_id, user_input, run)
+    except QueueFull:
+        response = jsonify({"error": "Too many queued requests, try again shortly"})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    return jsonify({"job_id": job.id, "status": job.status, "poll": f"/api/jobs/{job.id}"}), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get a job's status, partial answer and, once finished, its result
+    
+    Long-polls when given ?since=<version from the last response>&wait=<seconds>:
+    the response comes as soon as the job changes, or when wait runs out.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    
+    since = request.args.get('since', type=int)
+    if since is not None:
+        wait = min(request.args.get('wait', Config.JOB_POLL_MAX_SECONDS, type=float), Config.JOB_POLL_MAX_SECONDS)
+        job.wait(since, wait)
+    
+    return jsonify(job.snapshot())
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Subscribe to a job with server-sent events
+    
+    Events:
+        token: new text of the Final Answer
+        display_data: structured cards for the frontend (sent once, if any)
+        done: the complete result, same shape as /api/process
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    
+    def generate():
+        sent = 0
+        version = -1
+        while True:
+            job.wait(version, Config.STREAM_KEEPALIVE_SECONDS)
+            snapshot = job.snapshot()
+            if snapshot["version"] == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = snapshot["version"]
+            
+            partial = snapshot["partial"]
+            if len(partial) > sent:
+                yield _sse("token", partial[sent:])
+                sent = len(partial)
+            
+            result = snapshot.get("result")
+            if result is not None:
+                result = dict(result)
+                display_data = result.pop('display_data', None)
+                if display_data:
+                    yield _sse("display_data", display_data)
+                yield _sse("done", result)
+                return
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @app.route('/api/clear', methods=['POST'])
 def clear():
     """API endpoint to clear conversation history"""
@@ -76,7 +251,21 @@ def clear():
 
 @app.route('/api/display-data', methods=['GET'])
 def get_display_data():
-    """API endpoint to get current display data"""
+    """
+    API endpoint to get current display data
+    
+    With ?cursor= (next_cursor from display data or a previous page), returns
+    the next page of those results instead, without re-running the agent.
+    """
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            return jsonify(DataDisplayTool.next_page(cursor))
+        except StaleCursor as e:
+            return jsonify({"error": str(e)}), 410
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+    
     session_id = request.args.get('session_id', 'default')
     
     display_data = DataDisplayTool.get_display_data(session_id)
@@ -84,12 +273,83 @@ def get_display_data():
     return jsonify(display_data if display_data else {"type": None, "data": []})
 
 
+@app.route('/api/inventory/viewport', methods=['GET'])
+def inventory_viewport():
+    """
+    Hotels or restaurants inside a map viewport, for map markers
+    
+    Query: type, bbox=south,west,north,east, and optionally city, limit and
+    any DisplayResults filter (cuisine, max_price, min_rating, sort_by, near...)
+    """
+    filters = request.args.to_dict()
+    kind = filters.pop('type', None)
+    if kind not in SCHEMAS:
+        return jsonify({"error": f"type must be one of {', '.join(SCHEMAS)}"}), 400
+    try:
+        limit = min(int(filters.pop('limit', Config.INVENTORY_MAX_RESULTS)), Config.INVENTORY_VIEWPORT_MAX_RESULTS)
+        result = get_inventory().viewport(kind, filters, limit=limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"type": kind, "data": result.items, "total": result.total, "sort": result.sort})
+
+
+@app.route('/api/inventory/reload', methods=['POST'])
+def reload_inventory():
+    """
+    Swap in a recompiled catalog without a restart (see scripts/load_inventory.py)
+    
+    Body: {"type": "hotels" | "restaurants" | "flights", "city": optional, to replace only that city}
+    """
+    token = request.headers.get('X-Admin-Token', '')
+    if Config.INVENTORY_ADMIN_TOKEN:
+        allowed = hmac.compare_digest(token, Config.INVENTORY_ADMIN_TOKEN)
+    else:
+        allowed = request.remote_addr in ('127.0.0.1', '::1')
+    if not allowed:
+        return jsonify({"error": "Forbidden"}), 403
+    
+    data = request.get_json() or {}
+    kind = data.get('type')
+    city = data.get('city')
+    if kind not in SCHEMAS:
+        return jsonify({"error": f"type must be one of {', '.join(SCHEMAS)}"}), 400
+    path = catalog_path(kind, Config.INVENTORY_DATA_DIR or DEFAULT_DATA_DIR)
+    if path is None:
+        return jsonify({"error": f"No {kind} catalog found"}), 404
+    
+    try:
+        records = get_inventory().load(kind, path, city=city)
+    except (OSError, ValueError) as e:
+        return jsonify({"error": f"Could not load {path}: {e}"}), 500
+    return jsonify({"type": kind, "city": city, "records": records, "path": path})
+
+
 @app.route('/api/agents', methods=['GET'])
 def get_agents():
     """Get information about available agents"""
     return jsonify(assistant.get_agent_info())
 
 
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Get performance counters for the LLM transport layer"""
+    return jsonify({
+        "http_transport": get_transport().get_stats(),
+        "llm_cache": get_llm_cache().get_stats(),
+        "rate_limiter": get_rate_limiter_stats(),
+        "single_flight": get_single_flight().get_stats(),
+        "routing": AgentRouter.get_routing_stats(),
+        "slot_filling": SlotFiller.get_stats(),
+        "fallback": FallbackReplies.get_stats(),
+        "scratchpad": ScratchpadCompactor.get_stats(),
+        "llm_usage": get_usage_stats(),
+        "sessions": get_session_store().get_stats(),
+        "session_locks": get_session_locks().get_stats(),
+        "jobs": get_job_queue().get_stats(),
+        "inventory": get_inventory().get_stats()
+    })
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -0,0 +1,38 @@
+"""
+ASGI entry point
+
+Serves /api/process natively async so a single process can hold many
+concurrent conversations while they wait on the LLM; every other route is
+delegated to the Flask app.
+
+Run with: uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from app import app as flask_app, assistant
+from config.config import Config
+from models.deadline import Deadline
+
+
+async def process(request: Request) -> JSONResponse:
+    """Async API endpoint to process user requests"""
+    data = await request.json()
+    user_input = data.get('input', '')
+    session_id = data.get('session_id', 'default')
+    idempotency_key = request.headers.get('idempotency-key') or data.get('idempotency_key')
+    
+    result = await assistant.aprocess_request(
+        user_input, session_id, deadline=Deadline(Config.AGENT_TIMEOUT), idempotency_key=idempotency_key
+    )
+    
+    return JSONResponse(result)
+
+
+app = Starlette(routes=[
+    Route('/api/process', process, methods=['POST']),
+    Mount('/', app=WSGIMiddleware(flask_app)),  # type: ignore
+])
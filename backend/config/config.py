@@ -4,6 +4,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _model_role(role: str, model: str, max_tokens: int, temperature: float) -> dict:
+    """Model settings for one role, overridable via <ROLE>_MODEL/_MAX_TOKENS/_TEMPERATURE"""
+    prefix = role.upper()
+    return {
+        "model": os.getenv(f'{prefix}_MODEL', model),
+        "max_tokens": int(os.getenv(f'{prefix}_MAX_TOKENS', str(max_tokens))),
+        "temperature": float(os.getenv(f'{prefix}_TEMPERATURE', str(temperature)))
+    }
+
+
 class Config:
     """Application configuration"""
     
@@ -11,11 +21,114 @@ class Config:
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     GROQ_API_BASE = os.getenv('GROQ_API_BASE', 'https://api.groq.com/openai/v1')
     GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
+    GROQ_FAST_MODEL = os.getenv('GROQ_FAST_MODEL', 'llama-3.1-8b-instant')
+    
+    # Per-role Model Configuration
+    # Routing only has to emit one category name, so it runs on the small model
+    MODEL_ROLES = {
+        "router": _model_role("router", GROQ_FAST_MODEL, max_tokens=8, temperature=0.0),
+        "qa": _model_role("qa", GROQ_MODEL, max_tokens=1024, temperature=0.7),
+        "reservation": _model_role("reservation", GROQ_MODEL, max_tokens=1024, temperature=0.7),
+        "trip_booking": _model_role("trip_booking", GROQ_MODEL, max_tokens=1024, temperature=0.7),
+        "fallback": _model_role("fallback", GROQ_FAST_MODEL, max_tokens=256, temperature=0.7)
+    }
+    
+    # HTTP Connection Pool Configuration (shared by every GroqLLM)
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))  # hosts to keep pools for
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))  # connections per host
+    HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', 'True').lower() == 'true'
     
     # Flask Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     
+    # Client-side Rate Limits (per model, shared by every GroqLLM; 0 disables a bucket)
+    GROQ_RPM_LIMIT = int(os.getenv('GROQ_RPM_LIMIT', '30'))  # requests per minute
+    GROQ_TPM_LIMIT = int(os.getenv('GROQ_TPM_LIMIT', '12000'))  # tokens per minute
+    
+    # LLM Response Cache Configuration
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'True').lower() == 'true'
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024'))
+    LLM_CACHE_TTL_SECONDS = float(os.getenv('LLM_CACHE_TTL_SECONDS', '3600'))
+    LLM_CACHE_DB_PATH = os.getenv('LLM_CACHE_DB_PATH', '')  # e.g. llm_cache.db; empty = memory only
+    LLM_COALESCE_ENABLED = os.getenv('LLM_COALESCE_ENABLED', 'True').lower() == 'true'
+    
+    # Local Intent Classifier (fast path in front of the LLM router)
+    INTENT_FASTPATH_ENABLED = os.getenv('INTENT_FASTPATH_ENABLED', 'True').lower() == 'true'
+    INTENT_CONFIDENCE_THRESHOLD = float(os.getenv('INTENT_CONFIDENCE_THRESHOLD', '0.7'))
+    INTENT_HASH_BUCKETS = 2 ** 18
+    
+    # Local Slot Filling (answers reservation questions without the LLM when unambiguous)
+    SLOT_FILLING_ENABLED = os.getenv('SLOT_FILLING_ENABLED', 'True').lower() == 'true'
+    
+    # Fallback Replies (non-travel messages get a templated redirect; True = have the LLM write it)
+    FALLBACK_LLM_ENABLED = os.getenv('FALLBACK_LLM_ENABLED', 'False').lower() == 'true'
+    
+    # Few-shot Examples (only the k most relevant worked examples go into each agent prompt)
+    FEW_SHOT_ENABLED = os.getenv('FEW_SHOT_ENABLED', 'True').lower() == 'true'  # False = all examples
+    FEW_SHOT_K = int(os.getenv('FEW_SHOT_K', '2'))
+    
+    # Conversation Context (the rolling history agents see before the current message)
+    CONTEXT_MAX_TOKENS = int(os.getenv('CONTEXT_MAX_TOKENS', '500'))
+    CONTEXT_MAX_TURNS = int(os.getenv('CONTEXT_MAX_TURNS', '4'))  # older turns go to the summary
+    CONTEXT_MESSAGE_CHARS = int(os.getenv('CONTEXT_MESSAGE_CHARS', '300'))  # per message; list answers become a reference
+    CONTEXT_SUMMARY_ENABLED = os.getenv('CONTEXT_SUMMARY_ENABLED', 'True').lower() == 'true'
+    CONTEXT_SUMMARY_MESSAGE_CHARS = 80
+    
+    # Session Store (conversation history and agent state per browser session)
+    SESSION_MAX_SESSIONS = int(os.getenv('SESSION_MAX_SESSIONS', '10000'))  # LRU eviction beyond this
+    SESSION_TTL_SECONDS = float(os.getenv('SESSION_TTL_SECONDS', '3600'))  # idle time before a session is dropped
+    SESSION_SWEEP_SECONDS = float(os.getenv('SESSION_SWEEP_SECONDS', '60'))  # 0 disables the background sweeper
+    # "memory" keeps sessions in this process; "sqlite" shares them between worker processes
+    # (turns of one session are only serialised within a process: use sticky routing for overlapping turns)
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'memory')
+    SESSION_DB_PATH = os.getenv('SESSION_DB_PATH', 'sessions.db')
+    # Turns of one session run one at a time; a turn waits at most this long for the previous one
+    SESSION_LOCK_TIMEOUT = float(os.getenv('SESSION_LOCK_TIMEOUT', '30'))
+    IDEMPOTENCY_KEYS_PER_SESSION = int(os.getenv('IDEMPOTENCY_KEYS_PER_SESSION', '16'))  # replies kept for replay
+    
+    # Inventory (hotels, restaurants and flights that DisplayResults searches)
+    INVENTORY_DATA_DIR = os.getenv('INVENTORY_DATA_DIR', '')  # <kind>.jsonl files; empty = bundled demo catalog
+    INVENTORY_MAX_RESULTS = int(os.getenv('INVENTORY_MAX_RESULTS', '10'))  # cards per page
+    INVENTORY_SUMMARY_ITEMS = int(os.getenv('INVENTORY_SUMMARY_ITEMS', '5'))  # matches the agent sees, a line each
+    INVENTORY_VIEWPORT_MAX_RESULTS = int(os.getenv('INVENTORY_VIEWPORT_MAX_RESULTS', '200'))  # map markers per request
+    # Required by /api/inventory/reload; when unset the endpoint only accepts local requests
+    INVENTORY_ADMIN_TOKEN = os.getenv('INVENTORY_ADMIN_TOKEN', '')
+    
+    # Streaming Configuration
+    STREAM_KEEPALIVE_SECONDS = float(os.getenv('STREAM_KEEPALIVE_SECONDS', '15'))
+    
+    # Background Jobs (/api/jobs: submit a turn, then poll or subscribe for the result)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '8'))  # agent turns run at once
+    JOB_QUEUE_MAX = int(os.getenv('JOB_QUEUE_MAX', '100'))  # jobs waiting for a worker before submissions get 503
+    JOB_RESULT_TTL_SECONDS = float(os.getenv('JOB_RESULT_TTL_SECONDS', '600'))  # finished jobs kept for collection
+    JOB_POLL_MAX_SECONDS = float(os.getenv('JOB_POLL_MAX_SECONDS', '25'))  # longest a long-poll is held open
+    
     # Agent Configuration
-    MAX_ITERATIONS = 90
-    AGENT_TIMEOUT = 180  # seconds
\ No newline at end of file
+    # "react" parses Thought/Action text; "tools" uses chat-completions function calling.
+    # Set per agent with <ROLE>_AGENT_MODE, e.g. RESERVATION_AGENT_MODE=tools
+    AGENT_MODE = os.getenv('AGENT_MODE', 'react')
+    AGENT_MODES = {
+        "qa": os.getenv('QA_AGENT_MODE', AGENT_MODE),
+        "reservation": os.getenv('RESERVATION_AGENT_MODE', AGENT_MODE),
+        "trip_booking": os.getenv('TRIP_BOOKING_AGENT_MODE', AGENT_MODE),
+        "fallback": os.getenv('FALLBACK_AGENT_MODE', AGENT_MODE)
+    }
+    MAX_ITERATIONS = int(os.getenv('MAX_ITERATIONS', '90'))
+    # Per-agent iteration caps, overridable via <ROLE>_MAX_ITERATIONS
+    AGENT_MAX_ITERATIONS = {
+        "qa": int(os.getenv('QA_MAX_ITERATIONS', str(MAX_ITERATIONS))),
+        "reservation": int(os.getenv('RESERVATION_MAX_ITERATIONS', str(MAX_ITERATIONS))),
+        "trip_booking": int(os.getenv('TRIP_BOOKING_MAX_ITERATIONS', str(MAX_ITERATIONS))),
+        "fallback": int(os.getenv('FALLBACK_MAX_ITERATIONS', str(MAX_ITERATIONS)))
+    }
+    AGENT_TIMEOUT = float(os.getenv('AGENT_TIMEOUT', '180'))  # seconds per request, end to end
+    
+    # ReAct Scratchpad Compaction (older steps are shortened so each step's prompt stays bounded)
+    SCRATCHPAD_KEEP_STEPS = int(os.getenv('SCRATCHPAD_KEEP_STEPS', '3'))  # latest steps kept verbatim
+    SCRATCHPAD_OBSERVATION_CHARS = int(os.getenv('SCRATCHPAD_OBSERVATION_CHARS', '400'))  # older observations
+    SCRATCHPAD_MAX_TOKENS = int(os.getenv('SCRATCHPAD_MAX_TOKENS', '2000'))
+    
+    # Per-call LLM limits (both shrink to fit the request's remaining time)
+    LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '30'))
+    LLM_MIN_CALL_SECONDS = float(os.getenv('LLM_MIN_CALL_SECONDS', '2'))  # don't start a call with less left
\ No newline at end of file
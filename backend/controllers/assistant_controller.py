@@ -1,24 +1,29 @@
 from models.agent_router import AgentRouter
-from typing import Dict, Any
+from agents.session_state import SessionState
+from config.config import Config
+from models.context_buffer import ContextBuffer
+from models.deadline import Deadline
+from models.session_locks import get_session_locks
+from models.session_store import get_session_store
+from typing import Dict, Any, Optional
 
 
 class AssistantController:
     """Main controller for the travel assistant"""
     
     def __init__(self):
-        # Store conversation history and routers by session
-        self.conversations = {}
-        self.routers = {}  # Router per session to maintain session_id
+        # Conversation history and agent state live in the bounded session store;
+        # the router and its agents are shared by all sessions
+        self.sessions = get_session_store()
+        self.locks = get_session_locks()
+        self.router = AgentRouter()
     
-    def _get_router(self, session_id: str) -> AgentRouter:
-        """Get or create router for session"""
-        if session_id not in self.routers:
-            self.routers[session_id] = AgentRouter(session_id=session_id)
-        return self.routers[session_id]
+    def _get_session_state(self, session_id: str) -> SessionState:
+        """Get or create the state agents need for this session"""
+        return self.sessions.get(session_id)
     
-    def process_request(self, user_input: str, session_id: str = "default") -> Dict[str, Any]:
-        """Process user request and return formatted response"""
-        
+    def _validate_input(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """Return an error response for empty input, or None if the input is usable"""
         if not user_input or not user_input.strip():
             return {
                 "success": False,
@@ -26,63 +31,159 @@ class AssistantController:
                 "response": "Please provide a valid input.",
                 "error": "Empty input"
             }
+        return None
+    
+    def _replay(self, session: SessionState, idempotency_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the stored result if this request was already answered (a retry or double submit)"""
+        if idempotency_key and idempotency_key in session.replies:
+            self.locks.note_replay()
+            print(f"[Controller] Replaying result for idempotency key {idempotency_key}")
+            return dict(session.replies[idempotency_key])
+        return None
+    
+    def _record_turn(
+        self,
+        session: SessionState,
+        user_input: str,
+        result: Dict[str, Any],
+        idempotency_key: Optional[str] = None
+    ) -> None:
+        """Update the conversation context with the completed turn and save the session once"""
+        conversation = session.conversation
+        self._context(session).add_turn(user_input, result["response"])
+        conversation["current_agent"] = result["agent"]
+        
+        # Hand cards from DisplayResults to this turn's response (sent only once),
+        # before the save so the stored session never holds stale ones
+        if session.display_data:
+            result["display_data"] = session.display_data
+            session.display_data = {}
+        
+        if idempotency_key:
+            session.replies[idempotency_key] = dict(result)
+            while len(session.replies) > Config.IDEMPOTENCY_KEYS_PER_SESSION:
+                session.replies.pop(next(iter(session.replies)))
+        
+        self.sessions.save(session)
+    
+    @staticmethod
+    def _busy_response() -> Dict[str, Any]:
+        return {
+            "success": False,
+            "agent": None,
+            "response": "I'm still working on your previous message. Please wait a moment and try again.",
+            "error": "Session busy"
+        }
+    
+    def _error_response(self, error: Exception) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "agent": None,
+            "response": "An error occurred processing your request.",
+            "error": str(error)
+        }
+    
+    def process_request(
+        self,
+        user_input: str,
+        session_id: str = "default",
+        callbacks: Optional[list] = None,
+        deadline: Optional[Deadline] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Process user request and return formatted response
         
-        try:
-            # Get or create conversation history for this session
-            if session_id not in self.conversations:
-                self.conversations[session_id] = {
-                    "history": [],
-                    "current_agent": None,
-                    "collected_data": {}
-                }
+        Turns of one session are serialised; other sessions run in parallel.
+        
+        Args:
+            user_input: Message from the user
+            session_id: User session identifier
+            callbacks: Optional LangChain callback handlers (e.g. for token streaming)
+            deadline: Time budget for the whole request (default: Config.AGENT_TIMEOUT from now)
+            idempotency_key: Client-chosen id for this message; a repeat gets the first result without re-running it
+        """
+        invalid = self._validate_input(user_input)
+        if invalid:
+            return invalid
+        
+        deadline = deadline or Deadline(Config.AGENT_TIMEOUT)
+        with self.locks.hold(session_id, deadline.cap(Config.SESSION_LOCK_TIMEOUT)) as acquired:
+            if not acquired:
+                return self._busy_response()
             
-            conversation = self.conversations[session_id]
+            try:
+                session = self._get_session_state(session_id)
+                replay = self._replay(session, idempotency_key)
+                if replay:
+                    return replay
+                conversation = session.conversation
             
-            # Build context from conversation history
-            context = self._build_context(conversation["history"], user_input)
+                # Recent turns (compacted, within the token budget) plus the current message
+                context = self._context(session).render(user_input)
             
-            # Get router for this session
-            router = self._get_router(session_id)
+                # Route with context
+                result = self.router.route(
+                    context,
+                    conversation.get("current_agent"),
+                    callbacks=callbacks,
+                    session=session,
+                    deadline=deadline
+                )
             
-            # Route with context
-            result = router.route(context, conversation.get("current_agent"))
+                self._record_turn(session, user_input, result, idempotency_key)
+                
+                return result
+            except Exception as e:
+                return self._error_response(e)
+    
+    async def aprocess_request(
+        self,
+        user_input: str,
+        session_id: str = "default",
+        callbacks: Optional[list] = None,
+        deadline: Optional[Deadline] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async variant of process_request; the LLM chain never blocks a thread"""
+        invalid = self._validate_input(user_input)
+        if invalid:
+            return invalid
+        
+        deadline = deadline or Deadline(Config.AGENT_TIMEOUT)
+        async with self.locks.ahold(session_id, deadline.cap(Config.SESSION_LOCK_TIMEOUT)) as acquired:
+            if not acquired:
+                return self._busy_response()
             
-            # Update conversation history
-            conversation["history"].append({
-                "user": user_input,
-                "agent": result["agent"],
-                "response": result["response"]
-            })
-            conversation["current_agent"] = result["agent"]
+            try:
+                session = self._get_session_state(session_id)
+                replay = self._replay(session, idempotency_key)
+                if replay:
+                    return replay
+                conversation = session.conversation
+                context = self._context(session).render(user_input)
+                result = await self.router.aroute(
+                    context,
+                    conversation.get("current_agent"),
+                    callbacks=callbacks,
+                    session=session,
+                    deadline=deadline
+                )
             
-            return result
-        except Exception as e:
-            return {
-                "success": False,
-                "agent": None,
-                "response": "An error occurred processing your request.",
-                "error": str(e)
-            }
+                self._record_turn(session, user_input, result, idempotency_key)
+                
+                return result
+            except Exception as e:
+                return self._error_response(e)
     
-    def _build_context(self, history: list, current_input: str) -> str:
-        """Build context string from conversation history"""
-        if not history:
-            return current_input
-        
-        # Include last few messages for context
-        context_parts = []
-        for msg in history[-3:]:  # Last 3 exchanges
-            context_parts.append(f"User: {msg['user']}")
-            context_parts.append(f"Assistant: {msg['response']}")
-        
-        context_parts.append(f"User: {current_input}")
-        
-        return "\n".join(context_parts)
+    @staticmethod
+    def _context(session: SessionState) -> ContextBuffer:
+        """The session's rolling conversation context"""
+        return ContextBuffer(session.conversation.setdefault("context", {}))
     
     def clear_conversation(self, session_id: str = "default"):
         """Clear conversation history for a session"""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
+        self.sessions.delete(session_id)
     
     def get_agent_info(self) -> Dict[str, str]:
         """Get information about available agents"""
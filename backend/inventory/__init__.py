@@ -0,0 +1,7 @@
+"""
+Searchable hotel, restaurant and flight inventory
+"""
+from .ranking import InvalidCursor, StaleCursor
+from .store import InventoryStore, SearchResult, get_inventory
+
+__all__ = ['InventoryStore', 'SearchResult', 'get_inventory', 'InvalidCursor', 'StaleCursor']
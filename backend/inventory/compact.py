@@ -0,0 +1,237 @@
+"""
+Compiled catalog files: one per inventory kind, memory-mapped by the server instead of parsed
+
+Layout (all sections 8-byte aligned, numbers in the writer's byte order):
+    
+    MAGIC
+    per partition:
+        records     every record as compact UTF-8 JSON, back to back
+        offsets     int64[rows + 1]; record i is records[offsets[i]:offsets[i + 1]]
+        per indexed field:
+            column      float64[rows] with NaN if missing, or for text int32[rows]
+                        codes into a sorted dictionary with -1 if missing
+            index keys  [n] of the column's type, the set values in sorted order
+            index rows  int64[n], the row each key came from
+    footer      JSON: partition keys, row counts, section offsets and dictionaries
+    int64 footer length, MAGIC
+"""
+from array import array
+from collections.abc import Sequence as SequenceABC
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+from inventory.indexes import MISSING_CODE, Partition, SortedIndex, field_value, index_key
+
+
+MAGIC = b"INVCAT02"
+CATALOG_SUFFIX = ".inv"
+_TAIL = struct.Struct("<q8s")
+
+PartitionKey = Tuple[str, ...]
+
+
+class MappedRecords(SequenceABC):
+    """A partition's records, decoded from the mapped file only when one is read"""
+    
+    def __init__(self, data: memoryview, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+    
+    def raw(self, row: int) -> bytes:
+        """The record's encoded JSON"""
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return bytes(self._data[int(self._offsets[row]):int(self._offsets[row + 1])])
+    
+    def __getitem__(self, row: int) -> Dict[str, Any]:  # type: ignore[override]
+        return json.loads(self.raw(row))
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class _PendingPartition:
+    """Row positions in the spill file plus the encoded indexed values, ~40 bytes a row"""
+    
+    def __init__(self, fields: int):
+        self.starts = array("q")
+        self.lengths = array("q")
+        self.columns = [array("d") for _ in range(fields)]
+        self.texts: List[Dict[str, int]] = [{} for _ in range(fields)]  # text -> code in first-seen order
+
+
+class CatalogWriter:
+    """
+    Streams records into a compiled catalog in bounded memory
+    
+    Encoded records go straight to a spill file; only their positions and
+    indexed values stay in memory until close(), which writes partition by
+    partition and atomically replaces the output file.
+    """
+    
+    def __init__(self, path: str, kind: str, indexed_fields: Iterable[str]):
+        self.path = path
+        self.kind = kind
+        self.indexed_fields = tuple(indexed_fields)
+        self.rows = 0
+        self._spill = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path)))
+        self._spilled = 0
+        self._partitions: Dict[PartitionKey, _PendingPartition] = {}
+    
+    @property
+    def partitions(self) -> int:
+        return len(self._partitions)
+    
+    def add(self, key: PartitionKey, record: Dict[str, Any]) -> None:
+        data = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.add_encoded(key, data, [field_value(record, name) for name in self.indexed_fields])
+    
+    def add_encoded(self, key: PartitionKey, data: bytes, values: List[Any]) -> None:
+        """Add a record that is already encoded, with its indexed values"""
+        pending = self._partitions.get(key)
+        if pending is None:
+            pending = self._partitions[key] = _PendingPartition(len(self.indexed_fields))
+        pending.starts.append(self._spilled)
+        pending.lengths.append(len(data))
+        self._spill.write(data)
+        self._spilled += len(data)
+        self.rows += 1
+        
+        for column, texts, value in zip(pending.columns, pending.texts, values):
+            value = index_key(value)
+            if value is None:
+                column.append(math.nan)
+            elif isinstance(value, str):
+                column.append(float(texts.setdefault(value, len(texts))))
+            else:
+                column.append(float(value))
+    
+    def close(self) -> int:
+        """Write the catalog; returns its size in bytes"""
+        self._spill.flush()
+        spilled = mmap.mmap(self._spill.fileno(), 0, access=mmap.ACCESS_READ) if self._spilled else b""
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "wb") as out:
+                out.write(MAGIC)
+                footer = {"kind": self.kind, "byteorder": sys.byteorder, "fields": list(self.indexed_fields), "partitions": []}
+                for key, pending in self._partitions.items():
+                    footer["partitions"].append(self._write_partition(out, spilled, key, pending))
+                
+                encoded = json.dumps(footer, separators=(",", ":")).encode("utf-8")
+                out.write(encoded)
+                out.write(_TAIL.pack(len(encoded), MAGIC))
+                out.flush()
+                os.fsync(out.fileno())
+                size = out.tell()
+            os.replace(temp_path, self.path)
+        finally:
+            if isinstance(spilled, mmap.mmap):
+                spilled.close()
+            self._spill.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return size
+    
+    @staticmethod
+    def _align(out) -> int:
+        padding = -out.tell() % 8
+        out.write(b"\0" * padding)
+        return out.tell()
+    
+    def _write_partition(self, out, spilled, key: PartitionKey, pending: _PendingPartition) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"key": list(key), "rows": len(pending.starts), "columns": {}, "dictionaries": {}}
+        
+        entry["records"] = self._align(out)
+        offsets = array("q", [0])
+        for start, length in zip(pending.starts, pending.lengths):
+            out.write(spilled[start:start + length])
+            offsets.append(offsets[-1] + length)
+        entry["offsets"] = self._align(out)
+        out.write(offsets.tobytes())
+        
+        for name, column, texts in zip(self.indexed_fields, pending.columns, pending.texts):
+            values = np.frombuffer(column, dtype=np.float64)
+            if texts:
+                # Renumber so code order is text order, with missing text as MISSING_CODE
+                dictionary = sorted(texts)
+                recode = np.empty(len(texts) + 1, dtype=np.int32)
+                recode[[texts[text] for text in dictionary]] = np.arange(len(dictionary), dtype=np.int32)
+                recode[-1] = MISSING_CODE
+                values = recode[np.where(np.isnan(values), -1, values).astype(np.int64)]
+                entry["dictionaries"][name] = dictionary
+            index = SortedIndex.build(values)
+            section = {"count": len(index), "dtype": values.dtype.str}
+            section["column"] = self._align(out)
+            out.write(values.tobytes())
+            section["keys"] = self._align(out)
+            out.write(index.keys.tobytes())
+            section["rows"] = self._align(out)
+            out.write(index.row_ids.tobytes())
+            entry["columns"][name] = section
+        return entry
+
+
+def open_catalog(path: str) -> Tuple[str, Dict[PartitionKey, Partition]]:
+    """
+    Memory-map a compiled catalog
+    
+    Nothing is decoded up front beyond the footer: columns and indexes are
+    NumPy arrays over the mapping (no copy) and records are parsed when a
+    search returns them.
+    
+    Returns:
+        (kind, partitions by key)
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    size = len(mapped)
+    if size < len(MAGIC) + _TAIL.size or mapped[:len(MAGIC) - 2] != MAGIC[:-2]:
+        raise ValueError(f"{path} is not a compiled catalog")
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is an older catalog format; recompile it with scripts.load_inventory")
+    footer_size, magic = _TAIL.unpack_from(mapped, size - _TAIL.size)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is truncated")
+    footer = json.loads(mapped[size - _TAIL.size - footer_size:size - _TAIL.size])
+    if footer["byteorder"] != sys.byteorder:
+        raise ValueError(f"{path} was written on a {footer['byteorder']}-endian machine")
+    
+    view = memoryview(mapped)
+    fields = footer["fields"]
+    partitions: Dict[PartitionKey, Partition] = {}
+    for entry in footer["partitions"]:
+        rows = entry["rows"]
+        offsets = np.frombuffer(mapped, dtype=np.int64, count=rows + 1, offset=entry["offsets"])
+        records = MappedRecords(view[entry["records"]:entry["records"] + int(offsets[rows])], offsets)
+        columns, indexes = {}, {}
+        for name, section in entry["columns"].items():
+            count, dtype = section["count"], np.dtype(section["dtype"])
+            columns[name] = np.frombuffer(mapped, dtype=dtype, count=rows, offset=section["column"])
+            indexes[name] = SortedIndex(
+                np.frombuffer(mapped, dtype=dtype, count=count, offset=section["keys"]),
+                np.frombuffer(mapped, dtype=np.int64, count=count, offset=section["rows"])
+            )
+        partitions[tuple(entry["key"])] = Partition.compiled(fields, records, columns, indexes, entry["dictionaries"])
+    return footer["kind"], partitions
+
+
+def decoded_values(partition: Partition, row: int) -> List[Optional[Any]]:
+    """A row's indexed values as they were written (text decoded from its dictionary code)"""
+    values = []
+    for name in partition.indexed_fields:
+        value = partition.columns[name][row]
+        dictionary = partition.dictionaries.get(name)
+        if dictionary is not None:
+            values.append(None if value == MISSING_CODE else dictionary[int(value)])
+        else:
+            values.append(None if math.isnan(value) else float(value))
+    return values
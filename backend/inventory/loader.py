@@ -0,0 +1,215 @@
+"""
+Bulk ingestion: stream CSV/JSONL catalogs, validate them and compile them for the server
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import csv
+import json
+import os
+import time
+
+from inventory.compact import CatalogWriter, decoded_values, open_catalog
+from inventory.indexes import index_key
+from inventory.store import SCHEMAS, partition_key
+
+
+def _text(value: Any) -> str:
+    text = str(value).strip()
+    if not text:
+        raise ValueError("is empty")
+    return text
+
+
+def _number(value: Any) -> float:
+    number = float(str(value).replace("$", "").replace(",", "").strip()) if isinstance(value, str) else float(value)
+    if number != number or number < 0:
+        raise ValueError(f"must be a non-negative number, got {value!r}")
+    return number
+
+
+def _price(value: Any) -> float:
+    """A number, kept whole if it is ("$150", not "$150.0", on the cards)"""
+    number = _number(value)
+    return int(number) if number.is_integer() else number
+
+
+def _whole(value: Any) -> int:
+    number = _number(value)
+    if number != int(number):
+        raise ValueError(f"must be a whole number, got {value!r}")
+    return int(number)
+
+
+def _list(value: Any) -> List[Any]:
+    """Lists arrive as JSON arrays, or in CSV as "a;b;c" """
+    if isinstance(value, list):
+        return value
+    text = str(value).strip()
+    if text.startswith("["):
+        parsed = json.loads(text)
+        if not isinstance(parsed, list):
+            raise ValueError("must be a list")
+        return parsed
+    return [item.strip() for item in text.split(";") if item.strip()]
+
+
+def _between(low: float, high: float, convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def check(value: Any) -> Any:
+        converted = convert(value)
+        if not low <= converted <= high:
+            raise ValueError(f"must be between {low:g} and {high:g}, got {value!r}")
+        return converted
+    return check
+
+
+# Fields DisplayResults cards and create_chat_response read, by kind: all required
+FIELDS: Dict[str, Dict[str, Callable[[Any], Any]]] = {
+    "hotels": {
+        "id": _text, "name": _text, "city": _text,
+        "price_per_night": _price, "rating": _between(0, 5, _number), "stars": _between(1, 5, _whole),
+        "available_rooms": _whole
+    },
+    "restaurants": {
+        "id": _text, "name": _text, "city": _text, "cuisine": _text,
+        "price_range": _between(1, 4, _whole), "rating": _between(0, 5, _number), "available_times": _list
+    },
+    "flights": {
+        "id": _text, "airline": _text, "flight_number": _text, "from": _text, "to": _text,
+        "departure_time": _text, "arrival_time": _text, "duration": _text,
+        "price": _price, "class": _text, "stops": _whole, "available_seats": _whole
+    },
+}
+
+# Optional fields that are lists (CSV cells hold them as "a;b;c")
+LIST_FIELDS = ("amenities", "specialties", "coordinates")
+
+
+class InvalidRecord(ValueError):
+    """A catalog record missing a required field or holding a value of the wrong type"""
+
+
+def validate_record(kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check a record against its kind's required fields and coerce their types
+    
+    Blank CSV cells count as missing. Fields beyond the required ones are
+    kept as they are, apart from list fields given as text.
+    
+    Raises:
+        InvalidRecord: Naming the first field that is missing or invalid
+    """
+    record = {name: value for name, value in record.items() if value is not None and value != ""}
+    for name, convert in FIELDS[kind].items():
+        if name not in record:
+            raise InvalidRecord(f"missing {name}")
+        try:
+            record[name] = convert(record[name])
+        except (TypeError, ValueError) as e:
+            raise InvalidRecord(f"{name} {e}")
+    for name in LIST_FIELDS:
+        if name in record:
+            try:
+                record[name] = _list(record[name])
+            except ValueError as e:
+                raise InvalidRecord(f"{name} {e}")
+    if kind in ("hotels", "restaurants") and "coordinates" in record:
+        try:
+            latitude, longitude = (float(value) for value in record["coordinates"])
+        except (TypeError, ValueError):
+            raise InvalidRecord("coordinates must be [latitude, longitude]")
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise InvalidRecord(f"coordinates out of range: {record['coordinates']!r}")
+        record["coordinates"] = [latitude, longitude]
+    return record
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from a .csv (header row) or .jsonl file, one at a time"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif extension in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield {"_error": f"line {number}: {e}"}
+    else:
+        raise ValueError(f"Unsupported catalog format: {path} (use .csv or .jsonl)")
+
+
+@dataclass
+class LoadReport:
+    read: int = 0
+    written: int = 0
+    kept: int = 0  # rows carried over from the existing catalog (with city)
+    rejected: int = 0
+    errors: List[str] = field(default_factory=list)  # first few rejections
+    partitions: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+def compile_catalog(
+    kind: str,
+    sources: Iterable[str],
+    output: str,
+    city: Optional[str] = None,
+    max_errors: int = 20
+) -> LoadReport:
+    """
+    Validate catalog files and compile them into one memory-mappable catalog
+    
+    Args:
+        kind: "hotels", "restaurants" or "flights"
+        sources: CSV/JSONL files, streamed in order
+        output: Compiled catalog to (re)write
+        city: Only replace this city's records (departure city, for flights);
+            every other partition is copied over from the existing output
+        max_errors: Rejections kept in the report (all are counted)
+    """
+    if kind not in SCHEMAS:
+        raise ValueError(f"Unknown inventory type: {kind}")
+    schema = SCHEMAS[kind]
+    report = LoadReport()
+    start = time.perf_counter()
+    writer = CatalogWriter(output, kind, schema.indexed)
+    only = index_key(city) if city else None
+    
+    if only is not None and os.path.exists(output):
+        existing_kind, partitions = open_catalog(output)
+        if existing_kind != kind:
+            raise ValueError(f"{output} holds {existing_kind}, not {kind}")
+        for key, partition in partitions.items():
+            if key[0] == only:
+                continue
+            records = partition.records
+            for row in range(len(records)):
+                writer.add_encoded(key, records.raw(row), decoded_values(partition, row))  # type: ignore
+                report.kept += 1
+    
+    for source in sources:
+        for number, raw in enumerate(read_records(source), 1):
+            report.read += 1
+            try:
+                if "_error" in raw:
+                    raise InvalidRecord(raw["_error"])
+                record = validate_record(kind, raw)
+            except InvalidRecord as e:
+                report.rejected += 1
+                if len(report.errors) < max_errors:
+                    report.errors.append(f"{os.path.basename(source)} record {number}: {e}")
+                continue
+            key = partition_key(kind, record)
+            if only is not None and key[0] != only:
+                continue
+            writer.add(key, record)
+            report.written += 1
+    
+    report.partitions = writer.partitions
+    report.bytes = writer.close()
+    report.seconds = time.perf_counter() - start
+    return report
@@ -0,0 +1,161 @@
+"""
+Sort orders, top-k selection and page cursors for inventory searches
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import base64
+import binascii
+import json
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """An order results can be ranked in"""
+    
+    name: str
+    field: str  # indexed field the order reads
+    descending: bool = False
+    
+    @property
+    def label(self) -> str:
+        """How the order reads in a reply, e.g. "price (lowest first)" """
+        ascending, descending = _ORDER_WORDS.get(self.name, ("lowest", "highest"))
+        return f"{self.name} ({descending if self.descending else ascending} first)"
+
+
+_ORDER_WORDS = {"duration": ("shortest", "longest"), "departure": ("earliest", "latest"), "distance": ("closest", "farthest")}
+
+
+def _keys(*keys: SortKey) -> Dict[str, SortKey]:
+    return {key.name: key for key in keys}
+
+
+# The orders each kind can be sorted in; the first is the default
+SORT_KEYS: Dict[str, Dict[str, SortKey]] = {
+    "hotels": _keys(
+        SortKey("rating", "rating", descending=True),
+        SortKey("price", "price_per_night"),
+        SortKey("stars", "stars", descending=True),
+        SortKey("distance", "distance")  # from the near filter's point
+    ),
+    "restaurants": _keys(
+        SortKey("rating", "rating", descending=True),
+        SortKey("price", "price_range"),
+        SortKey("distance", "distance")
+    ),
+    "flights": _keys(
+        SortKey("price", "price"),
+        SortKey("duration", "duration_minutes"),
+        SortKey("departure", "departure_minutes")
+    ),
+}
+
+# What the LLM tends to write for a sort order
+_ALIASES = {"cheapest": "price", "price_per_night": "price", "price_range": "price", "fastest": "duration",
+            "shortest": "duration", "departure_time": "departure", "earliest": "departure", "best": "rating",
+            "closest": "distance", "nearest": "distance"}
+
+
+def resolve_sort(kind: str, sort_by: Any) -> SortKey:
+    """
+    The sort order named by a DisplayResults sort_by filter
+    
+    A leading "-" reverses the order ("-price" is most expensive first).
+    Names the kind cannot be sorted by fall back to its default order.
+    """
+    keys = SORT_KEYS[kind]
+    name = str(sort_by or "").strip().lower()
+    reverse = name.startswith("-")
+    name = _ALIASES.get(name.lstrip("-"), name.lstrip("-"))
+    key = keys.get(name) or next(iter(keys.values()))
+    if reverse and name in keys:
+        return SortKey(key.name, key.field, not key.descending)
+    return key
+
+
+def sort_values(values: Optional[np.ndarray], count: int, key: SortKey) -> np.ndarray:
+    """
+    Ascending sort keys from the rows' values: negated for descending orders, +inf where a value is missing
+    
+    Without values (a column an older compiled catalog lacks, or distances
+    with nothing to measure them on) every row sorts equally, leaving them
+    in catalog order.
+    """
+    if values is None:
+        return np.zeros(count)
+    values = values.astype(np.float64)
+    if key.descending:
+        values = -values
+    values[np.isnan(values)] = np.inf
+    return values
+
+
+def top_k(
+    values: np.ndarray,
+    rows: np.ndarray,
+    k: int,
+    after: Optional[Tuple[float, int]] = None
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Select the k rows with the smallest (value, row) pairs, in order
+    
+    Only the candidates that can reach the top k are sorted: a partial
+    selection finds the k-th value, and rows beyond it are never ordered,
+    so a page costs O(n + k log k) instead of a full sort.
+    
+    Args:
+        values: Sort keys, aligned with rows
+        rows: Matching row ids
+        k: Page size
+        after: The last (value, row) of the previous page; only rows ranked after it are considered
+    
+    Returns:
+        (row ids, their sort keys, rows ranked after `after` including this page)
+    """
+    if after is not None:
+        last_value, last_row = after
+        later = (values > last_value) | ((values == last_value) & (rows > last_row))
+        values, rows = values[later], rows[later]
+    remaining = len(rows)
+    if k <= 0 or remaining == 0:
+        return rows[:0], values[:0], remaining
+    
+    if remaining > k:
+        kth = np.partition(values, k - 1)[k - 1]
+        candidates = values <= kth  # ties at the k-th value are broken by row below
+        values, rows = values[candidates], rows[candidates]
+    order = np.lexsort((rows, values))[:k]
+    return rows[order], values[order], remaining
+
+
+class InvalidCursor(ValueError):
+    """A page cursor that could not be decoded"""
+
+
+class StaleCursor(InvalidCursor):
+    """A page cursor for a catalog that has since been reloaded"""
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Pack what the next page's search needs into an opaque URL-safe token"""
+    data = json.dumps(state, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Unpack a cursor made by encode_cursor
+    
+    Raises:
+        InvalidCursor: If the token is malformed
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(data)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+    if not isinstance(state, dict) or not {"kind", "filters", "limit", "after", "offset", "generation"} <= set(state):
+        raise InvalidCursor("Malformed cursor")
+    return state
@@ -0,0 +1,553 @@
+"""
+Hotel, restaurant and flight inventory, partitioned by city and searched through sorted indexes
+"""
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import heapq
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from config.config import Config
+from inventory.compact import CATALOG_SUFFIX, PartitionKey, open_catalog
+from inventory.indexes import Partition, Range, index_key
+from inventory.ranking import (
+    SORT_KEYS, InvalidCursor, SortKey, StaleCursor, decode_cursor, encode_cursor, resolve_sort, sort_values, top_k
+)
+from inventory.spatial import EARTH_RADIUS_KM, Area, BoundingBox, Circle, haversine_km
+
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "inventory")
+
+# Partition value of demo entries, served for any city (or route) with no inventory of its own
+WILDCARD = "*"
+
+
+@dataclass(frozen=True)
+class KindSchema:
+    """How one kind of record is partitioned and indexed"""
+    
+    partition_by: Tuple[str, ...]
+    indexed: Tuple[str, ...]
+
+
+SCHEMAS: Dict[str, KindSchema] = {
+    "hotels": KindSchema(partition_by=("city",), indexed=("price_per_night", "rating", "stars", "latitude", "longitude")),
+    "restaurants": KindSchema(
+        partition_by=("city",),
+        indexed=("price_range", "rating", "cuisine", "latitude", "longitude")
+    ),
+    "flights": KindSchema(
+        partition_by=("from", "to"),
+        indexed=("price", "airline", "duration_minutes", "departure_minutes")
+    ),
+}
+
+# Where a search lands when the filters don't name one
+DEFAULT_PLACE = {"city": "New York", "from": "Boston", "to": "New York"}
+
+
+def partition_key(kind: str, record: Dict[str, Any]) -> PartitionKey:
+    """The partition a record belongs to: its city, or its route for flights"""
+    return tuple(index_key(record.get(name) or WILDCARD) for name in SCHEMAS[kind].partition_by)
+
+
+def catalog_path(kind: str, directory: str) -> Optional[str]:
+    """A kind's catalog in directory: the compiled <kind>.inv if there is one, else <kind>.jsonl"""
+    for suffix in (CATALOG_SUFFIX, ".jsonl"):
+        path = os.path.join(directory, f"{kind}{suffix}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_partitions(kind: str, path: str) -> Dict[PartitionKey, Partition]:
+    """Open a compiled catalog, or parse a JSONL one and build its indexes"""
+    if path.endswith(CATALOG_SUFFIX):
+        compiled_kind, partitions = open_catalog(path)
+        if compiled_kind != kind:
+            raise ValueError(f"{path} holds {compiled_kind}, not {kind}")
+        return partitions
+    
+    partitions: Dict[PartitionKey, Partition] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                key = partition_key(kind, record)
+                if key not in partitions:
+                    partitions[key] = Partition(SCHEMAS[kind].indexed)
+                partitions[key].add(record)
+    for partition in partitions.values():
+        partition.build()
+    return partitions
+
+
+@dataclass
+class SearchResult:
+    items: List[Dict[str, Any]]
+    total: int  # matches before the limit
+    index: Optional[str] = None  # field whose index drove the scan
+    scanned: int = 0
+    partition: Dict[str, str] = field(default_factory=dict)
+    sort: Optional[str] = None  # label of the order items are ranked in
+    offset: int = 0  # matches ranked before these items (earlier pages)
+    next_cursor: Optional[str] = None  # token for the page after this one, if there is one
+
+
+def _number(value: Any) -> Optional[float]:
+    """Read a numeric filter the LLM may have written as "$150" or "150" """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def _price_range(value: Any) -> Optional[float]:
+    """Restaurant price level: 1-4, or "$".."$$$$" """
+    if isinstance(value, str) and value.strip().startswith("$"):
+        return float(len(value.strip()))
+    return _number(value)
+
+
+def filter_ranges(kind: str, filters: Dict[str, Any]) -> List[Range]:
+    """Translate DisplayResults filters into index ranges for a kind"""
+    ranges = []
+    max_price = _number(filters.get("max_price"))
+    min_rating = _number(filters.get("min_rating"))
+    if kind == "hotels":
+        if max_price is not None:
+            ranges.append(Range("price_per_night", high=max_price))
+        min_stars = _number(filters.get("min_stars"))
+        if min_stars is not None:
+            ranges.append(Range("stars", low=min_stars))
+    elif kind == "restaurants":
+        max_level = _price_range(filters.get("max_price_range"))
+        if max_level is not None:
+            ranges.append(Range("price_range", high=max_level))
+        cuisine = filters.get("cuisine")
+        if cuisine:
+            ranges.append(Range("cuisine", low=index_key(cuisine), high=index_key(cuisine)))
+    elif kind == "flights":
+        if max_price is not None:
+            ranges.append(Range("price", high=max_price))
+        airline = filters.get("airline")
+        if airline:
+            ranges.append(Range("airline", low=index_key(airline), high=index_key(airline)))
+    if min_rating is not None and "rating" in SCHEMAS[kind].indexed:
+        ranges.append(Range("rating", low=min_rating))
+    return ranges
+
+
+def _numbers(value: Any, count: int) -> Optional[List[float]]:
+    """count numbers given as a list or as "a, b" text, e.g. a [latitude, longitude] point"""
+    if isinstance(value, dict) and count == 2:
+        value = [value.get("lat", value.get("latitude")), value.get("lng", value.get("lon", value.get("longitude")))]
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, (list, tuple)) or len(value) != count:
+        return None
+    numbers = [_number(item) for item in value]
+    return None if any(number is None for number in numbers) else numbers  # type: ignore
+
+
+# Radius the nearest-k search starts from, growing fourfold until it holds k matches
+NEAREST_START_KM = 1.0
+
+
+@dataclass(frozen=True)
+class Location:
+    """Where a search is limited to, and the point distances are measured from"""
+    
+    areas: Tuple[Area, ...] = ()
+    point: Optional[Tuple[float, float]] = None
+    nearest: Optional[int] = None  # only the k matches closest to point
+
+
+def filter_location(kind: str, filters: Dict[str, Any]) -> Location:
+    """Translate the near/radius_km/nearest/bbox filters for a kind whose records have coordinates"""
+    if "latitude" not in SCHEMAS[kind].indexed:
+        return Location()
+    near = _numbers(filters.get("near"), 2)
+    radius = _number(filters.get("radius_km"))
+    box = _numbers(filters.get("bbox"), 4)
+    nearest = _number(filters.get("nearest"))
+    
+    areas: List[Area] = []
+    if near and radius is not None and radius > 0:
+        areas.append(Circle(near[0], near[1], radius))
+    if box:
+        areas.append(BoundingBox(*box))
+    return Location(
+        areas=tuple(areas),
+        point=(near[0], near[1]) if near else None,
+        nearest=int(nearest) if near and nearest is not None and nearest >= 1 else None
+    )
+
+
+class InventoryStore:
+    """
+    Every kind's records, split into partitions by city (by route for flights)
+    
+    A search only touches one partition, and within it uses the sorted index
+    of whichever filtered field narrows the rows most, masking what that
+    range scan returns with the other filters' columns. The matches are
+    ranked with a top-k selection and only that page of rows is turned
+    back into dicts; a cursor resumes the ranking for the next page.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._partitions: Dict[str, Dict[Tuple[str, ...], Partition]] = {kind: {} for kind in SCHEMAS}
+        self._generations: Dict[str, int] = {kind: 0 for kind in SCHEMAS}  # bumped when a kind's records change
+        
+        self.searches = 0
+        self.pages = 0
+        self.rows_scanned = 0
+        self.search_seconds = 0.0
+        self.index_hits: Dict[str, int] = {}
+        self._names: Tuple[Tuple[int, ...], frozenset] = ((), frozenset())  # (generations, venue names)
+    
+    @staticmethod
+    def _schema(kind: str) -> KindSchema:
+        if kind not in SCHEMAS:
+            raise ValueError(f"Unknown inventory type: {kind}")
+        return SCHEMAS[kind]
+    
+    def add(self, kind: str, record: Dict[str, Any]) -> None:
+        """Add one record; its partition's indexes are rebuilt on the next search"""
+        schema = self._schema(kind)
+        key = partition_key(kind, record)
+        with self._lock:
+            partition = self._partitions[kind].get(key)
+            if partition is None:
+                partition = self._partitions[kind][key] = Partition(schema.indexed)
+            partition.add(record)
+            self._generations[kind] += 1
+    
+    def add_many(self, kind: str, records: Iterable[Dict[str, Any]]) -> int:
+        """Bulk load records and build their indexes; returns how many were added"""
+        count = 0
+        for record in records:
+            self.add(kind, record)
+            count += 1
+        self.build()
+        return count
+    
+    def build(self) -> None:
+        """Build every stale partition's indexes now rather than on its first search"""
+        with self._lock:
+            partitions = [partition for kind in self._partitions.values() for partition in kind.values()]
+        for partition in partitions:
+            partition.prepare()
+    
+    def load(self, kind: str, path: str, city: Optional[str] = None) -> int:
+        """
+        Swap in a kind's catalog from a compiled (.inv) or JSONL file while serving
+        
+        Searches keep using the old partitions until the swap, which is one
+        assignment under the lock.
+        
+        Args:
+            city: Only replace this city's partitions (departure city, for flights)
+        
+        Returns:
+            Records now served from the swapped-in partitions
+        """
+        self._schema(kind)
+        partitions = read_partitions(kind, path)
+        if city:
+            only = index_key(city)
+            partitions = {key: partition for key, partition in partitions.items() if key[0] == only}
+        
+        with self._lock:
+            if city:
+                current = {key: partition for key, partition in self._partitions[kind].items() if key[0] != only}
+                self._partitions[kind] = {**current, **partitions}
+            else:
+                self._partitions[kind] = partitions
+            self._generations[kind] += 1
+        
+        count = sum(len(partition.records) for partition in partitions.values())
+        print(f"[Inventory] Loaded {count} {kind}{f' in {city}' if city else ''} from {path}")
+        return count
+    
+    def _partition(self, kind: str, place: Dict[str, str]) -> Tuple[int, Optional[Partition]]:
+        """
+        The kind's generation and the partition for a place, or the demo one if it has none
+        
+        The store lock is only held for these lookups. Searches then run on
+        the partition without it; a load swaps in new partition objects
+        rather than changing these, and each partition guards its own builds.
+        """
+        key = tuple(index_key(place[name]) for name in SCHEMAS[kind].partition_by)
+        with self._lock:
+            partitions = self._partitions[kind]
+            partition = partitions.get(key)
+            if partition is None:
+                partition = partitions.get((WILDCARD,) * len(key))
+            return self._generations[kind], partition
+    
+    @staticmethod
+    def _distances(partition: Partition, rows: np.ndarray, location: Location) -> Optional[np.ndarray]:
+        if location.point is None or not partition.located:
+            return None
+        return haversine_km(partition.columns["latitude"][rows], partition.columns["longitude"][rows], *location.point)
+    
+    def _locate(self, partition: Partition, ranges: List[Range], location: Location) -> Tuple[np.ndarray, Optional[str], int]:
+        """
+        Query a partition, keeping only the k matches nearest the point when asked to
+        
+        A match count of at least k inside some radius means the k nearest
+        are all inside it, so the radius grows until it holds k (or spans the
+        globe) and only those candidates are ranked.
+        """
+        if location.nearest is None:
+            return partition.query(ranges, location.areas)
+        if not partition.located:
+            return np.empty(0, dtype=np.int64), None, 0
+        
+        radius, scanned = NEAREST_START_KM, 0
+        while True:
+            circle = Circle(location.point[0], location.point[1], radius)  # type: ignore
+            rows, index, count = partition.query(ranges, (circle,) + location.areas)
+            scanned += count
+            if len(rows) >= location.nearest or radius >= math.pi * EARTH_RADIUS_KM:
+                break
+            radius *= 4
+        closest, _, _ = top_k(self._distances(partition, rows, location), rows, location.nearest)  # type: ignore
+        return np.sort(closest), index, scanned
+    
+    def _rank(self, partition: Partition, rows: np.ndarray, sort: SortKey, location: Location) -> np.ndarray:
+        if sort.field == "distance":
+            return sort_values(self._distances(partition, rows, location), len(rows), sort)
+        column = partition.columns.get(sort.field)
+        return sort_values(None if column is None else column[rows], len(rows), sort)
+    
+    def _items(self, kind: str, partition: Partition, rows: np.ndarray, place: Dict[str, str], location: Location) -> List[Dict[str, Any]]:
+        """Turn rows into records; demo entries take on the place searched for, and distances are added"""
+        items = [partition.records[int(row)] for row in rows]
+        partition_by = SCHEMAS[kind].partition_by
+        if any(item.get(name) == WILDCARD for item in items for name in partition_by):
+            items = [{**item, **{name: place[name] for name in partition_by if item.get(name) == WILDCARD}} for item in items]
+        distances = self._distances(partition, rows, location)
+        if distances is not None:
+            items = [
+                item if math.isnan(distance) else {**item, "distance_km": round(float(distance), 2)}
+                for item, distance in zip(items, distances)
+            ]
+        return items
+    
+    def _sort(self, kind: str, filters: Dict[str, Any], location: Location) -> SortKey:
+        """The sort_by order, by distance when there is a point to measure from and none is named"""
+        sort = resolve_sort(kind, filters.get("sort_by") or ("distance" if location.point else None))
+        return resolve_sort(kind, None) if sort.field == "distance" and location.point is None else sort
+    
+    def _count(self, elapsed: float, scanned: int, index: Optional[str], page: bool = False) -> None:
+        with self._lock:
+            self.searches += 1
+            self.pages += page
+            self.rows_scanned += scanned
+            self.search_seconds += elapsed
+            self.index_hits[index or "none"] = self.index_hits.get(index or "none", 0) + 1
+    
+    def search(
+        self,
+        kind: str,
+        filters: Dict[str, Any],
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None,
+        offset: int = 0
+    ) -> SearchResult:
+        """
+        Find the top-ranked records of a kind matching DisplayResults filters
+        
+        Args:
+            kind: "hotels", "restaurants" or "flights"
+            filters: DisplayResults filters (city, max_price, min_rating, min_stars, cuisine,
+                max_price_range, from, to, airline, sort_by, and for hotels and
+                restaurants near, radius_km, nearest, bbox)
+            limit: Most items to return (default: INVENTORY_MAX_RESULTS); total counts every match
+            after: Resume the ranking after this (sort key, row) - what page() passes from a cursor
+            offset: Matches ranked before `after`, echoed back in the result
+        
+        Returns:
+            One page of matches in sort_by order (the kind's default order, or
+            distance from near, if unset), ties in catalog order
+        """
+        schema = self._schema(kind)
+        limit = Config.INVENTORY_MAX_RESULTS if limit is None else limit
+        place = {name: filters.get(name) or DEFAULT_PLACE[name] for name in schema.partition_by}
+        location = filter_location(kind, filters)
+        sort = self._sort(kind, filters, location)
+        start = time.perf_counter()
+        
+        generation, partition = self._partition(kind, place)
+        if partition is None:
+            return SearchResult(items=[], total=0, partition=place, sort=sort.label, offset=offset)
+        rows, index, scanned = self._locate(partition, filter_ranges(kind, filters), location)
+        page, page_values, remaining = top_k(self._rank(partition, rows, sort, location), rows, limit, after)
+        items = self._items(kind, partition, page, place, location)
+        
+        next_cursor = None
+        if remaining > len(items) > 0:
+            next_cursor = encode_cursor({
+                "kind": kind,
+                "filters": filters,
+                "limit": limit,
+                "after": [float(page_values[-1]), int(page[-1])],
+                "offset": offset + len(items),
+                "generation": generation
+            })
+        
+        self._count(time.perf_counter() - start, scanned, index, page=after is not None)
+        return SearchResult(
+            items=items, total=len(rows), index=index, scanned=scanned, partition=place,
+            sort=sort.label, offset=offset, next_cursor=next_cursor
+        )
+    
+    def viewport(self, kind: str, filters: Dict[str, Any], limit: Optional[int] = None) -> SearchResult:
+        """
+        Find the top-ranked records inside a map viewport, across every city
+        
+        Each partition the box could touch is ranked on its own with a top-k
+        selection, and their pages are merged with a heap.
+        
+        Args:
+            kind: "hotels" or "restaurants"
+            filters: bbox [south, west, north, east] plus any DisplayResults filters;
+                city limits the search to that city's partition
+            limit: Most items to return (default: INVENTORY_MAX_RESULTS)
+        
+        Raises:
+            ValueError: If the kind has no coordinates or bbox is missing or malformed
+        """
+        schema = self._schema(kind)
+        if "latitude" not in schema.indexed:
+            raise ValueError(f"{kind} have no locations to search")
+        limit = Config.INVENTORY_MAX_RESULTS if limit is None else limit
+        location = filter_location(kind, filters)
+        if _numbers(filters.get("bbox"), 4) is None:
+            raise ValueError("bbox must be south,west,north,east")
+        place = {name: filters.get(name) or DEFAULT_PLACE[name] for name in schema.partition_by}
+        sort = self._sort(kind, filters, location)
+        ranges = filter_ranges(kind, filters)
+        start = time.perf_counter()
+        
+        if filters.get("city"):
+            partitions = [partition for partition in [self._partition(kind, place)[1]] if partition is not None]
+        else:
+            with self._lock:
+                partitions = list(self._partitions[kind].values())
+        candidates, total, scanned = [], 0, 0
+        for number, partition in enumerate(partitions):
+            rows, _, count = partition.query(ranges, location.areas)
+            page, page_values, _ = top_k(self._rank(partition, rows, sort, location), rows, limit)
+            candidates.extend(zip(page_values.tolist(), repeat(number), page.tolist()))
+            total += len(rows)
+            scanned += count
+        items = []
+        for _, number, row in heapq.nsmallest(limit, candidates):
+            items.extend(self._items(kind, partitions[number], np.array([row]), place, location))
+        
+        self._count(time.perf_counter() - start, scanned, "location")
+        return SearchResult(items=items, total=total, index="location", scanned=scanned, partition=place, sort=sort.label)
+    
+    def page(self, cursor: str) -> Tuple[str, SearchResult]:
+        """
+        Fetch the page after the one a cursor came with, without re-running the agent
+        
+        Returns:
+            (kind, the page)
+        
+        Raises:
+            InvalidCursor: If the cursor is malformed (or asks for no rows)
+            StaleCursor: If the kind's catalog changed since the cursor was made
+        """
+        state = decode_cursor(cursor)
+        kind = state["kind"]
+        try:
+            value, row = float(state["after"][0]), int(state["after"][1])
+            limit, offset, filters = int(state["limit"]), int(state["offset"]), dict(state["filters"])
+        except (TypeError, ValueError, IndexError) as e:
+            raise InvalidCursor(f"Malformed cursor: {e}")
+        if kind not in SORT_KEYS:
+            raise InvalidCursor(f"Unknown inventory type in cursor: {kind}")
+        if limit <= 0 or offset < 0:
+            raise InvalidCursor("Malformed cursor: limit and offset out of range")
+        limit = min(limit, Config.INVENTORY_MAX_RESULTS)  # clients can forge cursors; the page size stays ours
+        with self._lock:
+            if state["generation"] != self._generations[kind]:
+                raise StaleCursor(f"The {kind} catalog has changed; search again")
+        return kind, self.search(kind, filters, limit=limit, after=(value, row), offset=offset)
+    
+    def venue_names(self) -> frozenset:
+        """
+        Every hotel and restaurant name, lower-cased, for telling venues apart from guest names
+        
+        Built on first use after each load (one pass over the records) and cached until the next.
+        """
+        kinds = ("hotels", "restaurants")
+        with self._lock:
+            generations = tuple(self._generations[kind] for kind in kinds)
+            if self._names[0] == generations:
+                return self._names[1]
+            partitions = [partition for kind in kinds for partition in self._partitions[kind].values()]
+        
+        names = frozenset(
+            str(record.get("name", "")).strip().lower()
+            for partition in partitions for record in partition.records
+        ) - {""}
+        with self._lock:
+            self._names = (generations, names)
+        return names
+    
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return sum(len(partition.records) for partition in self._partitions[kind].values())
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get catalog size and search cost"""
+        with self._lock:
+            return {
+                "records": {kind: sum(len(p.records) for p in partitions.values()) for kind, partitions in self._partitions.items()},
+                "partitions": {kind: len(partitions) for kind, partitions in self._partitions.items()},
+                "searches": self.searches,
+                "cursor_pages": self.pages,
+                "avg_search_ms": round(self.search_seconds / self.searches * 1000, 3) if self.searches else 0.0,
+                "avg_rows_scanned": round(self.rows_scanned / self.searches, 1) if self.searches else 0.0,
+                "index_hits": dict(self.index_hits)
+            }
+
+
+def load_inventory(directory: str) -> InventoryStore:
+    """Build a store from the catalog of every kind that has one in directory"""
+    store = InventoryStore()
+    for kind in SCHEMAS:
+        path = catalog_path(kind, directory)
+        if path:
+            store.load(kind, path)
+    return store
+
+
+_store: Optional[InventoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_inventory() -> InventoryStore:
+    """Get the process-wide inventory, loading INVENTORY_DATA_DIR on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_inventory(Config.INVENTORY_DATA_DIR or DEFAULT_DATA_DIR)
+    return _store
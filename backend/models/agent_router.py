@@ -2,27 +2,48 @@ from agents.qa_agent import QAAgent
 from agents.reservation_agent import EnhancedReservationAgent
 from agents.trip_booking_agent import TripBookingAgent
 from agents.fallback_agent import FallbackAgent
+from agents.base_agent import BaseAgent, latest_user_message
+from agents.session_state import SessionState
+from models.deadline import Deadline, deadline_scope
 from models.groq_llm import GroqLLM
-from typing import Dict, Any
+from models.intent_classifier import get_intent_classifier
+from config.config import Config
+from typing import Dict, Any, Optional
+import threading
 
 
 class AgentRouter:
     """Routes user requests to the appropriate agent"""
     
-    def __init__(self, session_id: str = "default"):
-        self.session_id = session_id
-        self.agents = {
-            "qa": QAAgent(session_id=session_id),
-            "reservation": EnhancedReservationAgent(session_id=session_id),
-            "trip_booking": TripBookingAgent(),
-            "fallback": FallbackAgent()
-        }
-        self.llm = GroqLLM()
+    # Process-wide routing counters
+    _routing_stats = {"local": 0, "llm": 0}
+    _stats_lock = threading.Lock()
     
-    def _classify_intent(self, user_input: str) -> str:
-        """Classify user intent to route to appropriate agent"""
-        
-        classification_prompt = f"""Classify the following user request into one of these categories:
+    # Agents and their executors are stateless, so one set serves every session
+    _shared_agents: Optional[Dict[str, BaseAgent]] = None
+    _agents_lock = threading.Lock()
+    
+    def __init__(self):
+        self.agents = self._get_shared_agents()
+        self.llm = GroqLLM.for_role("router")
+    
+    @classmethod
+    def _get_shared_agents(cls) -> Dict[str, BaseAgent]:
+        """Build the agent pool on first use"""
+        if cls._shared_agents is None:
+            with cls._agents_lock:
+                if cls._shared_agents is None:
+                    cls._shared_agents = {
+                        "qa": QAAgent(),
+                        "reservation": EnhancedReservationAgent(),
+                        "trip_booking": TripBookingAgent(),
+                        "fallback": FallbackAgent()
+                    }
+        return cls._shared_agents
+    
+    def _classification_prompt(self, user_input: str) -> str:
+        """Build the prompt used to classify user intent"""
+        return f"""Classify the following user request into one of these categories:
 
 - reservation: Booking a SINGLE travel item (one hotel, one restaurant, or one flight)
   Examples: "book a hotel", "reserve a restaurant", "book a flight", "I need a hotel in NYC"
@@ -44,57 +65,149 @@ For ANY non-travel topic, classify as fallback.
 Respond with ONLY the category name: reservation, trip_booking, qa, or fallback
 """
         
-        try:
-            intent = self.llm._call(classification_prompt).strip().lower()
-            
-            # Validate the intent
-            if intent not in self.agents:
-                # Default to fallback for unclear queries
-                if any(word in user_input.lower() for word in ['hotel', 'flight', 'restaurant', 'book', 'reserve', 'reservation', 'trip', 'travel']):
-                    return "reservation"
-                return "fallback"
-            
+    def _parse_intent(self, raw_intent: str, user_input: str) -> str:
+        """Validate the LLM's classification, falling back to keyword matching"""
+        intent = raw_intent.strip().lower().strip(".'\"")
+        
+        # Validate the intent
+        if intent not in self.agents:
+            # Default to fallback for unclear queries
+            if any(word in user_input.lower() for word in ['hotel', 'flight', 'restaurant', 'book', 'reserve', 'reservation', 'trip', 'travel']):
+                return "reservation"
+            return "fallback"
+        
+        return intent
+    
+    @staticmethod
+    def _latest_user_message(context: str) -> str:
+        """Pull the current message out of a context string built from history"""
+        return latest_user_message(context)
+    
+    def _classify_locally(self, user_input: str) -> Optional[str]:
+        """Return the local classifier's intent if it is confident enough, else None"""
+        if not Config.INTENT_FASTPATH_ENABLED:
+            return None
+        
+        intent, confidence = get_intent_classifier().predict(self._latest_user_message(user_input))
+        confident = confidence >= Config.INTENT_CONFIDENCE_THRESHOLD and intent in self.agents
+        
+        with AgentRouter._stats_lock:
+            AgentRouter._routing_stats["local" if confident else "llm"] += 1
+        
+        if confident:
+            print(f"[Router] Local classifier: {intent} ({confidence:.2f})")
+            return intent
+        return None
+    
+    @staticmethod
+    def get_routing_stats() -> Dict[str, Any]:
+        """Get how much classification traffic skipped the LLM"""
+        with AgentRouter._stats_lock:
+            local = AgentRouter._routing_stats["local"]
+            llm = AgentRouter._routing_stats["llm"]
+        total = local + llm
+        return {
+            "classified_locally": local,
+            "classified_by_llm": llm,
+            "llm_skip_ratio": round(local / total, 3) if total else 0.0,
+            "confidence_threshold": Config.INTENT_CONFIDENCE_THRESHOLD
+        }
+    
+    def _classify_intent(self, user_input: str) -> str:
+        """Classify user intent to route to appropriate agent"""
+        intent = self._classify_locally(user_input)
+        if intent:
             return intent
+        
+        try:
+            return self._parse_intent(self.llm._call(self._classification_prompt(user_input)), user_input)
         except Exception as e:
             print(f"Error classifying intent: {e}")
             return "fallback"  # Default to fallback on errors
     
-    def route(self, user_input: str, current_agent: str = None) -> Dict[str, Any]: # type: ignore
-        """Route user input to appropriate agent and return response"""
+    async def _aclassify_intent(self, user_input: str) -> str:
+        """Classify user intent without blocking the event loop"""
+        intent = self._classify_locally(user_input)
+        if intent:
+            return intent
+        
+        try:
+            return self._parse_intent(await self.llm._acall(self._classification_prompt(user_input)), user_input)
+        except Exception as e:
+            print(f"Error classifying intent: {e}")
+            return "fallback"  # Default to fallback on errors
         
-        # If we have a current agent in conversation, stick with it unless user explicitly switches
-        if current_agent:
+    def _continuing_agent(self, user_input: str, current_agent: Optional[str]) -> Optional[str]:
+        """Return the current agent if the conversation should stay with it"""
+        # If we have a current agent in conversation, stick with it unless user explicitly switches.
+        # A fallback turn doesn't start a flow, so the next message is classified afresh
+        if current_agent and current_agent != "fallback":
             # Check if user is trying to switch topics
             switch_keywords = ["new", "different", "instead", "switch", "change topic"]
-            is_switching = any(keyword in user_input.lower() for keyword in switch_keywords)
+            # Only the latest message counts; earlier turns mention e.g. "New York"
+            message = self._latest_user_message(user_input).lower()
+            is_switching = any(keyword in message for keyword in switch_keywords)
             
             if not is_switching:
                 # Continue with same agent
                 print(f"[Router] Continuing with: {current_agent}")
-                agent = self.agents.get(current_agent)
-                result = agent.execute({"input": user_input}) # type: ignore
+                return current_agent
                 
-                return {
-                    "agent": current_agent,
-                    "success": result["success"],
-                    "response": result["output"],
-                    "error": result["error"]
-                }
-        
-        # Classify the intent for new conversations
-        intent = self._classify_intent(user_input)
-        print(f"[Router] Classified intent as: {intent}")
-        
-        # Get the appropriate agent
-        agent = self.agents.get(intent)
-        print(f"[Router] Using agent: {agent.__class__.__name__}")
-        
-        # Execute the agent
-        result = agent.execute({"input": user_input}) # type: ignore
+        return None
         
+    def _format_result(self, intent: str, result: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "agent": intent,
             "success": result["success"],
             "response": result["output"],
             "error": result["error"]
-        }
\ No newline at end of file
+        }
+    
+    def route(
+        self,
+        user_input: str,
+        current_agent: str = None, # type: ignore
+        callbacks: Optional[list] = None,
+        session: Optional[SessionState] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Route user input to appropriate agent and return response within the request's deadline"""
+        with deadline_scope(deadline):
+            intent = self._continuing_agent(user_input, current_agent)
+        
+            if intent is None:
+                # Classify the intent for new conversations
+                intent = self._classify_intent(user_input)
+                print(f"[Router] Classified intent as: {intent}")
+        
+            # Get the appropriate agent
+            agent = self.agents.get(intent)
+            print(f"[Router] Using agent: {agent.__class__.__name__}")
+        
+            # Execute the agent
+            result = agent.execute({"input": user_input}, callbacks=callbacks, session=session, deadline=deadline) # type: ignore
+        
+        return self._format_result(intent, result)
+    
+    async def aroute(
+        self,
+        user_input: str,
+        current_agent: str = None, # type: ignore
+        callbacks: Optional[list] = None,
+        session: Optional[SessionState] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Async variant of route"""
+        with deadline_scope(deadline):
+            intent = self._continuing_agent(user_input, current_agent)
+        
+            if intent is None:
+                intent = await self._aclassify_intent(user_input)
+                print(f"[Router] Classified intent as: {intent}")
+        
+            agent = self.agents.get(intent)
+            print(f"[Router] Using agent: {agent.__class__.__name__}")
+        
+            result = await agent.aexecute({"input": user_input}, callbacks=callbacks, session=session, deadline=deadline) # type: ignore
+        
+        return self._format_result(intent, result)
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Rolling, token-budgeted conversation context that agents receive as their input
+"""
+from typing import Any, Dict, List
+import re
+
+from config.config import Config
+
+
+_LIST_ITEM = re.compile(r"^\s*\d+\.\s+(.*)$")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def _clip(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+
+def compact_message(text: str, max_chars: int = Config.CONTEXT_MESSAGE_CHARS) -> str:
+    """
+    Shrink a message for the context
+    
+    List answers (DisplayResults cards rendered as text) become a reference:
+    their opening line, the item names and the closing question, which is
+    all later turns need to resolve "the second one" or "book the Grand Plaza".
+    """
+    lines = [line for line in (text or "").strip().splitlines() if line.strip()]
+    items = [_LIST_ITEM.match(line) for line in lines]
+    names = [match.group(1) for match in items if match]
+    if len(names) >= 2:
+        names = [(_BOLD.search(name) or re.match(r"(.*?)(?: - |$)", name)).group(1).strip() for name in names]  # type: ignore
+        question = lines[-1] if lines[-1].rstrip().endswith("?") and not items[-1] else ""
+        text = f"{lines[0]} [{len(names)} listed: {', '.join(names)}] {question}"
+    return _clip(text, max_chars)
+
+
+class ContextBuffer:
+    """
+    Conversation context kept up to date turn by turn, within a token budget
+    
+    Operates on a plain dict stored in the session (so it persists with it):
+    "turns" holds compacted (user, assistant) pairs, newest last; "summary"
+    holds the user's messages from turns that no longer fit, which carry the
+    facts (cities, dates, names) a booking flow needs to remember.
+    """
+    
+    SUMMARY_PREFIX = "Earlier in this conversation the user said: "
+    
+    def __init__(
+        self,
+        state: Dict[str, Any],
+        max_tokens: int = Config.CONTEXT_MAX_TOKENS,
+        max_turns: int = Config.CONTEXT_MAX_TURNS,
+        summarize: bool = Config.CONTEXT_SUMMARY_ENABLED
+    ):
+        """
+        Args:
+            state: The session's buffer dict, filled in place
+            max_tokens: Budget for everything before the current message
+            max_turns: Most recent turns kept as exchanges
+            summarize: Fold the user's side of older turns into a summary line instead of dropping them
+        """
+        self.state = state
+        self.turns: List[List[str]] = state.setdefault("turns", [])
+        self.summary: List[str] = state.setdefault("summary", [])
+        self.max_tokens = max_tokens
+        self.max_turns = max_turns
+        self.summarize = summarize
+    
+    def _lines(self) -> List[str]:
+        lines = [self.SUMMARY_PREFIX + " | ".join(self.summary)] if self.summary else []
+        for user, assistant in self.turns:
+            lines.append(f"User: {user}")
+            lines.append(f"Assistant: {assistant}")
+        return lines
+    
+    def tokens(self) -> int:
+        """Approximate size of the context before the current message"""
+        return _tokens("\n".join(self._lines()))
+    
+    def add_turn(self, user_input: str, response: str) -> None:
+        """Append a finished turn, then fold or drop the oldest turns until the buffer fits"""
+        self.turns.append([compact_message(user_input), compact_message(response)])
+        
+        while len(self.turns) > 1 and (len(self.turns) > self.max_turns or self.tokens() > self.max_tokens):
+            user, _ = self.turns.pop(0)
+            if self.summarize:
+                self.summary.append(_clip(user, Config.CONTEXT_SUMMARY_MESSAGE_CHARS))
+                self._trim_summary(self.max_tokens // 4)
+        self._trim_summary(self.max_tokens - _tokens("\n".join(self._lines()[1 if self.summary else 0:])))
+    
+    def _trim_summary(self, max_tokens: int) -> None:
+        """Drop the oldest summary entries until the summary fits in max_tokens"""
+        while self.summary and _tokens(self.SUMMARY_PREFIX + " | ".join(self.summary)) > max_tokens:
+            self.summary.pop(0)
+    
+    def render(self, current_input: str) -> str:
+        """Context string for the router and agents, ending with the current message"""
+        lines = self._lines()
+        if not lines:
+            return current_input
+        return "\n".join(lines + [f"User: {current_input}"])
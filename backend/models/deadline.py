@@ -0,0 +1,55 @@
+"""
+Per-request time budget shared by every step of the agent stack
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+import time
+
+
+class Deadline:
+    """A point in time by which a request must have produced its answer"""
+    
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds: Budget from now
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+    
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self, margin: float = 0.0) -> bool:
+        """True once fewer than margin seconds remain"""
+        return self.remaining() <= margin
+    
+    def cap(self, seconds: float) -> float:
+        """Shrink a timeout so it ends no later than the deadline"""
+        return min(seconds, self.remaining())
+
+
+# The deadline is set once per request and read by GroqLLM and the executors;
+# LangChain copies the context into the threads it runs tools on.
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the request currently running, if it has one"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make deadline current for the enclosed block; None keeps any enclosing deadline"""
+    if deadline is None:
+        yield current_deadline()
+        return
+    
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
@@ -1,9 +1,23 @@
 from langchain_core.language_models.llms import LLM
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
-from typing import Any, List, Optional
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.outputs import GenerationChunk
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+import httpx
 import requests
+import json
 import time
 from config.config import Config
+from models.deadline import Deadline, current_deadline
+from models.http_transport import get_async_transport, get_transport
+from models.llm_cache import get_llm_cache, make_cache_key
+from models.rate_limiter import get_rate_limiter
+from models.single_flight import get_single_flight
+from models.streaming import wants_tokens
+from models.usage_meter import record_usage
+
+
+# Returned instead of calling upstream once the request's deadline is too close
+OUT_OF_TIME = "I ran out of time on this request. Please try again."
 
 
 class GroqLLM(LLM):
@@ -15,54 +29,162 @@ class GroqLLM(LLM):
     temperature: float = 0.7
     max_tokens: int = 1024
     max_retries: int = 3
+    # None caches only deterministic (temperature 0) calls; per call: invoke(prompt, use_cache=False)
+    use_cache: Optional[bool] = None
+    coalesce: bool = Config.LLM_COALESCE_ENABLED  # share identical in-flight calls
+    
+    @classmethod
+    def for_role(cls, role: str) -> "GroqLLM":
+        """Create an LLM with the model, max_tokens and temperature configured for a role"""
+        return cls(**Config.MODEL_ROLES[role])
     
     @property
     def _llm_type(self) -> str:
         return "groq"
     
-    def _call(
-        self,
-        prompt: str,
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> str:
-        """Call the Groq API with retry logic"""
-        headers = {
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+    
+    def _caches(self, **kwargs: Any) -> bool:
+        """
+        Whether this call may be answered from the cache or shared with an identical one in flight
         
+        Unless the LLM or the call says otherwise, only temperature-0 calls
+        (the router) are: a sampled reply is one draw of many, and the
+        agents' ReAct and tool-calling steps rely on getting a fresh one.
+        """
+        use_cache = kwargs.get("use_cache", self.use_cache)
+        if use_cache is None:
+            use_cache = self.temperature == 0
+        return bool(use_cache) and Config.LLM_CACHE_ENABLED
+    
+    def _cache_key(self, prompt: str, stop: Optional[List[str]], **kwargs: Any) -> Optional[str]:
+        """
+        Return the response-cache key for this call, or None if caching is off for it
+        
+        The same key drives single-flight coalescing: both assume identical
+        inputs give interchangeable outputs, so use_cache=False opts out of both.
+        """
+        if not self._caches(**kwargs):
+            return None
+        return make_cache_key(self.model, prompt, stop, self.temperature, self.max_tokens)
+        
+    def _build_payload(self, prompt: str, stop: Optional[List[str]], stream: bool) -> Dict[str, Any]:
+        return self._build_chat_payload([{"role": "user", "content": prompt}], stop, stream)
+    
+    def _build_chat_payload(
+        self,
+        messages: List[Dict[str, Any]],
+        stop: Optional[List[str]],
+        stream: bool,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: str = "auto"
+    ) -> Dict[str, Any]:
         payload = {
             "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": messages,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
-            "stream": False
+            "stream": stream
         }
         
         if stop:
             payload["stop"] = stop
+        if tools:
+            payload["tools"] = tools
+            payload["tool_choice"] = tool_choice
         
-        # Retry logic with exponential backoff
+        return payload
+    
+    @staticmethod
+    def _prompt_chars(payload: Dict[str, Any]) -> int:
+        chars = sum(len(message.get("content") or "") for message in payload["messages"])
+        if payload.get("tools"):
+            chars += len(json.dumps(payload["tools"]))
+        return chars
+    
+    def _estimate_tokens(self, payload: Dict[str, Any]) -> int:
+        """
+        Rough token cost for rate limiting: ~4 characters per prompt token plus
+        a quarter of the completion cap (settle() corrects it from usage)
+        """
+        return self._prompt_chars(payload) // 4 + payload["max_tokens"] // 4
+    
+    def _settle_usage(
+        self,
+        limiter: Any,
+        estimate: int,
+        response: Union[requests.Response, httpx.Response],
+        payload: Dict[str, Any],
+        latency_ms: float
+    ) -> None:
+        """Correct the limiter's estimate, then report the call's token usage and latency"""
+        usage = None
+        if not payload["stream"]:  # usage only arrives at the end of the stream
+            try:
+                usage = response.json()["usage"]
+            except Exception:
+                usage = None
+        
+        if usage is None:
+            prompt_tokens, completion_tokens = self._prompt_chars(payload) // 4, 0
+            record_usage(prompt_tokens, estimated=True, latency_ms=latency_ms, model=self.model)
+        else:
+            limiter.settle(estimate, usage.get("total_tokens"))
+            prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+            record_usage(prompt_tokens, completion_tokens, latency_ms=latency_ms, model=self.model)
+        
+        estimated = " (estimated)" if usage is None else ""
+        print(f"[LLM] {self.model}: {prompt_tokens} prompt{estimated} + {completion_tokens} completion tokens, {latency_ms:.0f}ms")
+    
+    @staticmethod
+    def _max_wait(deadline: Optional[Deadline]) -> Optional[float]:
+        """How long an attempt may queue in the limiter and still leave time for the call"""
+        if deadline is None:
+            return None
+        return deadline.remaining() - Config.LLM_MIN_CALL_SECONDS
+    
+    @staticmethod
+    def _http_timeout(deadline: Optional[Deadline]) -> float:
+        return deadline.cap(Config.LLM_TIMEOUT_SECONDS) if deadline else Config.LLM_TIMEOUT_SECONDS
+    
+    def _send(self, payload: Dict[str, Any]) -> Union[requests.Response, str]:
+        """POST the payload with retry logic, returning the response or an error message"""
+        limiter = get_rate_limiter(self.model)
+        estimate = self._estimate_tokens(payload)
+        deadline = current_deadline()
+        
+        # Retries queue behind the shared limiter instead of sleeping blindly,
+        # and only while the request's deadline leaves room for another call
         for attempt in range(self.max_retries):
+            if deadline and deadline.expired(margin=Config.LLM_MIN_CALL_SECONDS):
+                return OUT_OF_TIME
+            response = None
             try:
-                response = requests.post(
+                if limiter.acquire(estimate, timeout=self._max_wait(deadline)) is None:
+                    return OUT_OF_TIME
+                started = time.perf_counter()
+                response = get_transport().post(
                     f"{self.api_base}/chat/completions",
-                    headers=headers,
+                    headers=self._headers(),
                     json=payload,
-                    timeout=30
+                    timeout=self._http_timeout(deadline),
+                    stream=payload["stream"]
                 )
+                limiter.observe(response.headers, throttled=response.status_code == 429, backoff=2 ** attempt)
                 response.raise_for_status()
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
+                self._settle_usage(limiter, estimate, response, payload, (time.perf_counter() - started) * 1000)
+                return response
                 
             except requests.exceptions.HTTPError as e:
+                if payload["stream"] and response is not None:
+                    response.close()  # release the pooled connection before retrying
                 if e.response.status_code == 429:  # Rate limit
                     if attempt < self.max_retries - 1:
-                        wait_time = (2 ** attempt) * 1  # 1s, 2s, 4s
-                        print(f"Rate limit hit. Waiting {wait_time}s before retry {attempt + 1}/{self.max_retries}")
-                        time.sleep(wait_time)
+                        print(f"Rate limit hit. Queueing retry {attempt + 1}/{self.max_retries} behind the shared limiter")
                         continue
                     else:
                         return "I'm experiencing high API usage right now. Please try again in a moment, or rephrase your question more simply."
@@ -74,6 +196,300 @@ class GroqLLM(LLM):
         
         return "Unable to process request after multiple attempts. Please try again."
     
+    async def _asend(self, payload: Dict[str, Any]) -> Union[httpx.Response, str]:
+        """Non-blocking counterpart of _send"""
+        transport = get_async_transport()
+        limiter = get_rate_limiter(self.model)
+        estimate = self._estimate_tokens(payload)
+        url = f"{self.api_base}/chat/completions"
+        deadline = current_deadline()
+        
+        for attempt in range(self.max_retries):
+            if deadline and deadline.expired(margin=Config.LLM_MIN_CALL_SECONDS):
+                return OUT_OF_TIME
+            response = None
+            try:
+                if await limiter.aacquire(estimate, timeout=self._max_wait(deadline)) is None:
+                    return OUT_OF_TIME
+                timeout = self._http_timeout(deadline)
+                started = time.perf_counter()
+                if payload["stream"]:
+                    response = await transport.stream(url, headers=self._headers(), json=payload, timeout=timeout)
+                else:
+                    response = await transport.post(url, headers=self._headers(), json=payload, timeout=timeout)
+                limiter.observe(response.headers, throttled=response.status_code == 429, backoff=2 ** attempt)
+                response.raise_for_status()
+                self._settle_usage(limiter, estimate, response, payload, (time.perf_counter() - started) * 1000)
+                return response
+            
+            except httpx.HTTPStatusError as e:
+                if payload["stream"] and response is not None:
+                    await response.aclose()
+                if e.response.status_code == 429:  # Rate limit
+                    if attempt < self.max_retries - 1:
+                        print(f"Rate limit hit. Queueing retry {attempt + 1}/{self.max_retries} behind the shared limiter")
+                        continue
+                    else:
+                        return "I'm experiencing high API usage right now. Please try again in a moment, or rephrase your question more simply."
+                else:
+                    return f"Error calling Groq API: {str(e)}"
+            
+            except Exception as e:
+                return f"Error calling Groq API: {str(e)}"
+        
+        return "Unable to process request after multiple attempts. Please try again."
+    
+    @staticmethod
+    def _parse_sse_line(line: str) -> Tuple[str, bool]:
+        """
+        Read one SSE line as (content delta, whether the completion finished)
+        
+        A completion has finished at [DONE] or a finish_reason of "stop";
+        a stream that ends before either was cut off and must not be cached.
+        """
+        if not line or not line.startswith("data:"):
+            return "", False
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return "", True
+        
+        choice = (json.loads(data).get("choices") or [{}])[0]
+        return choice.get("delta", {}).get("content") or "", choice.get("finish_reason") == "stop"
+    
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call the Groq API with retry logic"""
+        key = self._cache_key(prompt, stop, **kwargs)
+        if key:
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                return cached
+            if self.coalesce:
+                return get_single_flight().do(key, lambda: self._fetch(prompt, stop, key))
+        
+        return self._fetch(prompt, stop, key)
+    
+    def _fetch(self, prompt: str, stop: Optional[List[str]], key: Optional[str]) -> str:
+        """Make the upstream call and cache a successful completion"""
+        response = self._send(self._build_payload(prompt, stop, stream=False))
+        if isinstance(response, str):
+            return response  # error messages are never cached
+        
+        try:
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+        except Exception as e:
+            return f"Error calling Groq API: {str(e)}"
+        
+        if key:
+            get_llm_cache().set(key, content)
+        return content
+    
+    def _chat_cache_key(self, payload: Dict[str, Any], **kwargs: Any) -> Optional[str]:
+        """Cache/coalescing key for a chat turn; the serialised messages and tools stand in for the prompt"""
+        if not self._caches(**kwargs):
+            return None
+        material = json.dumps(
+            {"messages": payload["messages"], "tools": payload.get("tools"), "tool_choice": payload.get("tool_choice")},
+            sort_keys=True
+        )
+        return make_cache_key(self.model, material, None, self.temperature, self.max_tokens)
+    
+    def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: str = "auto",
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        Run one chat-completions turn, letting the model call tools
+        
+        Args:
+            messages: Chat messages, including earlier assistant tool calls and tool results
+            tools: Function schemas the model may call
+            tool_choice: "auto", or "none" to force a text reply; a history
+                with tool calls in it must still send the tools to be accepted
+        
+        Returns:
+            The assistant message; requested calls are under "tool_calls". On
+            failure the error text is the content and "error" is set.
+        """
+        payload = self._build_chat_payload(messages, None, stream=False, tools=tools, tool_choice=tool_choice)
+        key = self._chat_cache_key(payload, **kwargs)
+        if key:
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                return json.loads(cached)
+            if self.coalesce:
+                return get_single_flight().do(key, lambda: self._read_message(self._send(payload), key))
+        
+        return self._read_message(self._send(payload), key)
+    
+    async def achat(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: str = "auto",
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Async counterpart of chat"""
+        payload = self._build_chat_payload(messages, None, stream=False, tools=tools, tool_choice=tool_choice)
+        key = self._chat_cache_key(payload, **kwargs)
+        
+        async def fetch() -> Dict[str, Any]:
+            return self._read_message(await self._asend(payload), key)
+        
+        if key:
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                return json.loads(cached)
+            if self.coalesce:
+                return await get_single_flight().ado(key, fetch)
+        
+        return await fetch()
+    
+    @staticmethod
+    def _read_message(response: Union[requests.Response, httpx.Response, str], key: Optional[str]) -> Dict[str, Any]:
+        """Extract the assistant message from a chat response and cache it on success"""
+        if isinstance(response, str):
+            return {"role": "assistant", "content": response, "error": True}
+        
+        try:
+            reply = response.json()["choices"][0]["message"]
+        except Exception as e:
+            return {"role": "assistant", "content": f"Error calling Groq API: {str(e)}", "error": True}
+        
+        message = {"role": "assistant", "content": reply.get("content")}
+        if reply.get("tool_calls"):
+            message["tool_calls"] = reply["tool_calls"]
+        if key:
+            get_llm_cache().set(key, json.dumps(message))
+        return message
+    
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        """
+        Stream completion tokens from the Groq API.
+        
+        AgentExecutor always drives the LLM through stream(), so token-level
+        streaming is only requested upstream when a TokenStreamHandler is
+        attached to the run; otherwise this yields the blocking result once.
+        """
+        if not wants_tokens(run_manager):
+            yield GenerationChunk(text=self._call(prompt, stop, run_manager, **kwargs))
+            return
+        
+        key = self._cache_key(prompt, stop, **kwargs)
+        cached = get_llm_cache().get(key) if key else None
+        response = cached if cached is not None else self._send(self._build_payload(prompt, stop, stream=True))
+        if isinstance(response, str):
+            chunk = GenerationChunk(text=response)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            return
+        
+        tokens, complete = [], False
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                token, complete = self._parse_sse_line(line)
+                if token:
+                    tokens.append(token)
+                    chunk = GenerationChunk(text=token)
+                    if run_manager:
+                        run_manager.on_llm_new_token(token, chunk=chunk)
+                    yield chunk
+                if complete:
+                    break
+                
+        if key and complete:
+            get_llm_cache().set(key, "".join(tokens))
+    
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call the Groq API without blocking the event loop"""
+        key = self._cache_key(prompt, stop, **kwargs)
+        if key:
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                return cached
+            if self.coalesce:
+                return await get_single_flight().ado(key, lambda: self._afetch(prompt, stop, key))
+        
+        return await self._afetch(prompt, stop, key)
+    
+    async def _afetch(self, prompt: str, stop: Optional[List[str]], key: Optional[str]) -> str:
+        """Async counterpart of _fetch"""
+        response = await self._asend(self._build_payload(prompt, stop, stream=False))
+        if isinstance(response, str):
+            return response  # error messages are never cached
+        
+        try:
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+        except Exception as e:
+            return f"Error calling Groq API: {str(e)}"
+        
+        if key:
+            get_llm_cache().set(key, content)
+        return content
+    
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Async counterpart of _stream (without it LangChain would run _stream in a thread)"""
+        if not wants_tokens(run_manager):
+            yield GenerationChunk(text=await self._acall(prompt, stop, run_manager, **kwargs))
+            return
+        
+        key = self._cache_key(prompt, stop, **kwargs)
+        cached = get_llm_cache().get(key) if key else None
+        response = cached if cached is not None else await self._asend(self._build_payload(prompt, stop, stream=True))
+        if isinstance(response, str):
+            chunk = GenerationChunk(text=response)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            return
+        
+        tokens, complete = [], False
+        try:
+            async for line in response.aiter_lines():
+                token, complete = self._parse_sse_line(line)
+                if token:
+                    tokens.append(token)
+                    chunk = GenerationChunk(text=token)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(token, chunk=chunk)
+                    yield chunk
+                if complete:
+                    break
+        finally:
+            await response.aclose()
+        
+        if key and complete:
+            get_llm_cache().set(key, "".join(tokens))
+    
     @property
     def _identifying_params(self) -> dict:
         """Get identifying parameters"""
@@ -81,4 +497,4 @@ class GroqLLM(LLM):
             "model": self.model,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens
-        }
\ No newline at end of file
+        }
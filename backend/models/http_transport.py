@@ -0,0 +1,285 @@
+"""
+Process-wide pooled HTTP transport shared by every GroqLLM instance
+"""
+from collections import deque
+from typing import Any, Dict, Optional
+import asyncio
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config.config import Config
+
+
+class TransportStats:
+    """Thread-safe counters for connection reuse, pool waits and handshakes"""
+    
+    # Waits on the pool shorter than this are just queue overhead, not contention
+    POOL_WAIT_THRESHOLD = 0.001
+    
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._request_times = deque(maxlen=window)
+        self.reset()
+    
+    def reset(self) -> None:
+        """Zero all counters"""
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.connections_opened = 0
+            self.reuse_hits = 0
+            self.pool_waits = 0
+            self.pool_wait_time = 0.0
+            self.handshake_time = 0.0
+            self._request_times.clear()
+    
+    def record_checkout(self, reused: bool, waited: float) -> None:
+        with self._lock:
+            if reused:
+                self.reuse_hits += 1
+            if waited >= self.POOL_WAIT_THRESHOLD:
+                self.pool_waits += 1
+                self.pool_wait_time += waited
+    
+    def record_handshake(self, elapsed: float) -> None:
+        with self._lock:
+            self.connections_opened += 1
+            self.handshake_time += elapsed
+    
+    def record_request(self, elapsed: float, failed: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.errors += 1
+            self._request_times.append(elapsed)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable copy of the counters"""
+        with self._lock:
+            times = sorted(self._request_times)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "connections_opened": self.connections_opened,
+                "reuse_hits": self.reuse_hits,
+                "reuse_ratio": round(self.reuse_hits / self.requests, 3) if self.requests else 0.0,
+                "pool_waits": self.pool_waits,
+                "pool_wait_ms_total": round(self.pool_wait_time * 1000, 2),
+                "handshake_ms_total": round(self.handshake_time * 1000, 2),
+                "handshake_ms_avg": round(self.handshake_time * 1000 / self.connections_opened, 2) if self.connections_opened else 0.0,
+                "request_ms_p50": round(_percentile(times, 0.50) * 1000, 2),
+                "request_ms_p95": round(_percentile(times, 0.95) * 1000, 2),
+            }
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# Shared stats instance the instrumented connection classes report into
+_stats = TransportStats()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self) -> None:
+        start = time.perf_counter()
+        super().connect()
+        _stats.record_handshake(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self) -> None:
+        start = time.perf_counter()
+        super().connect()
+        _stats.record_handshake(time.perf_counter() - start)
+
+
+class _InstrumentedPoolMixin:
+    """Records whether a checked-out connection is warm and how long we waited for it"""
+    
+    def _get_conn(self, timeout: Optional[float] = None):
+        start = time.perf_counter()
+        conn = super()._get_conn(timeout)  # type: ignore
+        waited = time.perf_counter() - start
+        _stats.record_checkout(reused=getattr(conn, "sock", None) is not None, waited=waited)
+        return conn
+
+
+class _InstrumentedHTTPConnectionPool(_InstrumentedPoolMixin, HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _InstrumentedHTTPSConnectionPool(_InstrumentedPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _InstrumentedHTTPConnectionPool,
+            "https": _InstrumentedHTTPSConnectionPool,
+        }
+
+
+class PooledTransport:
+    """Keep-alive requests.Session with a bounded per-host connection pool"""
+    
+    def __init__(
+        self,
+        pool_connections: int = Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = Config.HTTP_POOL_MAXSIZE,
+        pool_block: bool = Config.HTTP_POOL_BLOCK,
+    ):
+        """
+        Args:
+            pool_connections: Number of distinct hosts to keep pools for
+            pool_maxsize: Maximum open connections per host
+            pool_block: Wait for a free connection instead of opening extra ones
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.stats = _stats
+        
+        self.session = requests.Session()
+        adapter = _PooledAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=0,  # GroqLLM owns retry policy
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """POST through the shared pool, recording latency"""
+        start = time.perf_counter()
+        failed = False
+        try:
+            return self.session.post(url, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.stats.record_request(time.perf_counter() - start, failed=failed)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool configuration and usage counters"""
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "pool_block": self.pool_block,
+            **self.stats.snapshot(),
+        }
+    
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncPooledTransport:
+    """Non-blocking counterpart of PooledTransport built on httpx.AsyncClient"""
+    
+    def __init__(
+        self,
+        pool_maxsize: int = Config.HTTP_POOL_MAXSIZE,
+    ):
+        """
+        Args:
+            pool_maxsize: Maximum open connections (httpx pools per host internally)
+        """
+        self.pool_maxsize = pool_maxsize
+        self.stats = _stats
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_maxsize,
+                max_keepalive_connections=pool_maxsize,
+            )
+        )
+    
+    async def _trace(self, connect: Dict[str, float], event: str, info: Dict[str, Any]) -> None:
+        """httpcore trace hook used to time fresh TCP/TLS handshakes"""
+        if event == "connection.connect_tcp.started":
+            connect["start"] = time.perf_counter()
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete") and "start" in connect:
+            connect["elapsed"] = time.perf_counter() - connect["start"]
+    
+    def _record(self, connect: Dict[str, float], start: float, failed: bool) -> None:
+        if "elapsed" in connect:
+            self.stats.record_handshake(connect["elapsed"])
+        self.stats.record_checkout(reused="start" not in connect, waited=0.0)
+        self.stats.record_request(time.perf_counter() - start, failed=failed)
+    
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        """POST through the shared async pool, recording latency"""
+        connect: Dict[str, float] = {}
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await self.client.post(
+                url,
+                extensions={"trace": lambda event, info: self._trace(connect, event, info)},
+                **kwargs
+            )
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(connect, start, failed)
+    
+    async def stream(self, url: str, **kwargs: Any) -> httpx.Response:
+        """Open a streaming POST; the caller must aclose() the response"""
+        connect: Dict[str, float] = {}
+        start = time.perf_counter()
+        failed = False
+        try:
+            request = self.client.build_request(
+                "POST",
+                url,
+                extensions={"trace": lambda event, info: self._trace(connect, event, info)},
+                **kwargs
+            )
+            return await self.client.send(request, stream=True)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(connect, start, failed)
+
+
+_transport: Optional[PooledTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> PooledTransport:
+    """Get the process-wide transport, creating it on first use"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = PooledTransport()
+    return _transport
+
+
+# httpx clients are bound to the event loop that first uses them
+_async_transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncPooledTransport]" = weakref.WeakKeyDictionary()
+
+
+def get_async_transport() -> AsyncPooledTransport:
+    """Get the async transport for the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    transport = _async_transports.get(loop)
+    if transport is None:
+        transport = AsyncPooledTransport()
+        _async_transports[loop] = transport
+    return transport
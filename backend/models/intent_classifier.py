@@ -0,0 +1,126 @@
+"""
+Local intent classifier used as a fast path in front of the LLM router
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import math
+import os
+import random
+import re
+import threading
+import zlib
+
+from config.config import Config
+
+
+EXAMPLES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "intent_examples.jsonl")
+
+_TOKEN = re.compile(r"[a-z0-9$']+")
+
+
+def load_examples(path: str = EXAMPLES_PATH) -> List[Tuple[str, str]]:
+    """Load (text, label) pairs from a JSONL file"""
+    examples = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                examples.append((record["text"], record["label"]))
+    return examples
+
+
+def featurize(text: str, buckets: int = Config.INTENT_HASH_BUCKETS) -> Dict[int, float]:
+    """
+    Hash word unigrams, word bigrams and character trigrams into a sparse vector
+    
+    crc32 is used instead of hash() so feature indexes are stable across processes.
+    """
+    tokens = _TOKEN.findall(text.lower())
+    grams = [f"w:{token}" for token in tokens]
+    grams += [f"b:{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+    for token in tokens:
+        padded = f"#{token}#"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    
+    features: Dict[int, float] = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode("utf-8")) % buckets
+        features[index] = features.get(index, 0.0) + 1.0
+    
+    # L2-normalise so long messages don't produce overconfident scores
+    norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+    return {index: value / norm for index, value in features.items()}
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over hashed n-gram features"""
+    
+    def __init__(self, labels: Iterable[str], buckets: int = Config.INTENT_HASH_BUCKETS):
+        self.labels = sorted(set(labels))
+        self.buckets = buckets
+        self.weights: Dict[str, Dict[int, float]] = {label: {} for label in self.labels}
+        self.bias: Dict[str, float] = {label: 0.0 for label in self.labels}
+    
+    def _scores(self, features: Dict[int, float]) -> Dict[str, float]:
+        scores = {}
+        for label in self.labels:
+            weights = self.weights[label]
+            scores[label] = self.bias[label] + sum(weights.get(i, 0.0) * v for i, v in features.items())
+        return scores
+    
+    @staticmethod
+    def _softmax(scores: Dict[str, float]) -> Dict[str, float]:
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+    
+    def fit(
+        self,
+        examples: List[Tuple[str, str]],
+        epochs: int = 30,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        seed: int = 13
+    ) -> "IntentClassifier":
+        """Train with plain SGD on the cross-entropy loss"""
+        data = [(featurize(text, self.buckets), label) for text, label in examples]
+        rng = random.Random(seed)
+        
+        for _ in range(epochs):
+            rng.shuffle(data)
+            for features, target in data:
+                probs = self._softmax(self._scores(features))
+                for label in self.labels:
+                    gradient = probs[label] - (1.0 if label == target else 0.0)
+                    weights = self.weights[label]
+                    for index, value in features.items():
+                        current = weights.get(index, 0.0)
+                        weights[index] = current - learning_rate * (gradient * value + l2 * current)
+                    self.bias[label] -= learning_rate * gradient
+        return self
+    
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Get the probability of each label"""
+        return self._softmax(self._scores(featurize(text, self.buckets)))
+    
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Return the most likely label and its probability"""
+        probs = self.predict_proba(text)
+        label = max(probs, key=probs.get)  # type: ignore
+        return label, probs[label]
+
+
+_classifier: Optional[IntentClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Get the process-wide classifier, training it from the bundled examples on first use"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                examples = load_examples()
+                _classifier = IntentClassifier(label for _, label in examples).fit(examples)
+    return _classifier
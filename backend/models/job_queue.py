@@ -0,0 +1,211 @@
+"""
+Background jobs for long agent runs: submit, then long-poll or subscribe for progress
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+import uuid
+
+from config.config import Config
+from models.streaming import FinalAnswerStreamHandler
+
+
+class QueueFull(Exception):
+    """Raised when JOB_QUEUE_MAX jobs are already waiting for a worker"""
+
+
+class _JobOutputHandler(FinalAnswerStreamHandler):
+    """Appends the streamed Final Answer to the job instead of queueing events"""
+    
+    def __init__(self, job: "Job"):
+        super().__init__()
+        self.job = job
+    
+    def emit(self, event: str, data: Any) -> None:
+        if event == "token":
+            self.job.update(partial=self.job.partial + data)
+
+
+class Job:
+    """
+    One agent run and everything a client can ask about it
+    
+    Every change bumps version, so a poller passes the last version it saw
+    and is woken as soon as there is something new.
+    """
+    
+    def __init__(self, session_id: str, user_input: str):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.user_input = user_input
+        self.status = "queued"  # queued -> running -> done | failed
+        self.partial = ""
+        self.result: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._changed = threading.Condition()
+    
+    def update(self, **fields: Any) -> None:
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+    
+    def wait(self, since: int, timeout: float) -> None:
+        """Block until the job changes after version since, it finishes, or timeout passes"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > since or self.finished is not None, timeout=max(timeout, 0.0))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-ready view: the result (with any display_data) once finished, the partial answer until then"""
+        with self._changed:
+            snapshot: Dict[str, Any] = {
+                "job_id": self.id,
+                "status": self.status,
+                "version": self.version,
+                "partial": self.partial
+            }
+            if self.result is not None:
+                snapshot["result"] = self.result
+            end = self.finished or time.time()
+            snapshot["elapsed_ms"] = round((end - self.created) * 1000)
+            return snapshot
+
+
+class JobQueue:
+    """
+    A bounded pool of worker threads running agent turns in the background
+    
+    /api/process keeps the HTTP connection (and a server thread) for the
+    whole agent run; a job returns at once and the client comes back for
+    the result. At most max_pending jobs wait for a worker, beyond which
+    submissions are refused so callers can back off. Finished jobs are
+    kept for ttl_seconds to be collected.
+    """
+    
+    def __init__(
+        self,
+        workers: int = Config.JOB_WORKERS,
+        max_pending: int = Config.JOB_QUEUE_MAX,
+        ttl_seconds: float = Config.JOB_RESULT_TTL_SECONDS
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-job")
+        
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self.pending = 0
+        self.running = 0
+        
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_latency = 0.0
+    
+    def submit(self, session_id: str, user_input: str, run: Callable[[List[Any]], Dict[str, Any]]) -> Job:
+        """
+        Queue an agent turn
+        
+        Args:
+            session_id: Session the turn belongs to
+            user_input: Message from the user
+            run: Runs the turn given LangChain callbacks, e.g. a process_request partial
+        
+        Raises:
+            QueueFull: If max_pending jobs are already waiting
+        """
+        self._expire()
+        job = Job(session_id, user_input)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self.pending} jobs are already waiting")
+            self.pending += 1
+            self.submitted += 1
+            self._jobs[job.id] = job
+        
+        self._pool.submit(self._run, job, run)
+        print(f"[Jobs] Queued {job.id} for session {session_id}")
+        return job
+    
+    def _run(self, job: Job, run: Callable[[List[Any]], Dict[str, Any]]) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.running += 1
+        job.update(status="running", started=time.time())
+        
+        status = "done"
+        try:
+            result = run([_JobOutputHandler(job)])
+        except Exception as e:
+            print(f"[Jobs] {job.id} failed: {e}")
+            status = "failed"
+            result = {
+                "success": False,
+                "agent": None,
+                "response": "An error occurred processing your request.",
+                "error": str(e)
+            }
+        job.update(status=status, result=result, finished=time.time())
+        
+        with self._lock:
+            self.running -= 1
+            self.completed += status == "done"
+            self.failed += status == "failed"
+            self.total_wait += job.started - job.created  # type: ignore
+            self.total_run += job.finished - job.started  # type: ignore
+            self.max_latency = max(self.max_latency, job.finished - job.created)  # type: ignore
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def _expire(self) -> None:
+        """Forget finished jobs nobody collected within ttl_seconds"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and job latency"""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "queue_depth": self.pending,
+                "running": self.running,
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / finished * 1000) if finished else 0,
+                "avg_run_ms": round(self.total_run / finished * 1000) if finished else 0,
+                "max_latency_ms": round(self.max_latency * 1000),
+                "tracked_jobs": len(self._jobs)
+            }
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue, creating its worker pool on first use"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
@@ -0,0 +1,165 @@
+"""
+Content-addressed cache for LLM completions
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from config.config import Config
+
+
+def make_cache_key(model: str, prompt: str, stop: Optional[List[str]], temperature: float, max_tokens: int) -> str:
+    """Hash everything that can change a completion into a stable key"""
+    material = json.dumps({
+        "model": model,
+        "prompt": prompt,
+        "stop": list(stop) if stop else None,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """In-memory LRU with TTL, optionally backed by a SQLite tier that survives restarts"""
+    
+    def __init__(
+        self,
+        max_entries: int = Config.LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = Config.LLM_CACHE_TTL_SECONDS,
+        db_path: Optional[str] = Config.LLM_CACHE_DB_PATH
+    ):
+        """
+        Args:
+            max_entries: Entries kept in memory before least-recently-used eviction
+            ttl_seconds: Age after which an entry is treated as a miss (0 disables expiry)
+            db_path: SQLite file for the disk tier, or None/"" for memory only
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path or None
+        
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._db = self._open_db(self.db_path) if self.db_path else None
+        
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def _open_db(path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        db.commit()
+        return db
+    
+    def _expired(self, created: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - created > self.ttl_seconds
+    
+    def _remember(self, key: str, value: str, created: float) -> None:
+        """Insert into the memory tier, evicting the LRU entry if full (lock held)"""
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created, now):
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created, now):
+                        self._remember(key, value, created)
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.expirations += 1
+            
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, value: str) -> None:
+        """Store a completion in every tier"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self.stores += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created) VALUES (?, ?, ?)",
+                    (key, value, now)
+                )
+                self._db.commit()
+    
+    def clear(self) -> None:
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": Config.LLM_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_tier": self.db_path,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "completions_saved": hits
+            }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Get the process-wide LLM cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
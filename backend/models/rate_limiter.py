@@ -0,0 +1,247 @@
+"""
+Process-wide client-side rate limiter for Groq API calls
+"""
+from typing import Any, Dict, Mapping, Optional
+import asyncio
+import re
+import threading
+import time
+
+from config.config import Config
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Groq reset header such as "2m59.56s", "7.66s" or "450ms" into seconds
+    
+    Plain numbers (as used by Retry-After) are treated as seconds.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Per-minute token bucket whose level may go negative to queue reservations"""
+    
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount from the bucket and return how long the caller must wait for it"""
+        self._refill(now)
+        # An oversized request must still get through eventually
+        self.level -= min(amount, self.capacity)
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate
+    
+    def clamp(self, remaining: float, now: float) -> None:
+        """Never believe we have more headroom than the provider says we do"""
+        self._refill(now)
+        self.level = min(self.level, remaining)
+    
+    def refund(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Shared requests/min and tokens/min limiter
+    
+    Callers reserve capacity before sending, so bursts queue locally instead
+    of stampeding into 429s. x-ratelimit-* and Retry-After response headers
+    correct the local estimate.
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: int = Config.GROQ_RPM_LIMIT,
+        tokens_per_minute: int = Config.GROQ_TPM_LIMIT
+    ):
+        """
+        Args:
+            requests_per_minute: Request budget (0 disables the request bucket)
+            tokens_per_minute: Token budget (0 disables the token bucket)
+        """
+        self._lock = threading.Lock()
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.blocked_until = 0.0
+        
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+        self.header_updates = 0
+        self.timed_out = 0
+    
+    def _reserve(self, estimated_tokens: int, timeout: Optional[float]) -> Optional[float]:
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self.blocked_until - now)
+            if self.requests:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens:
+                delay = max(delay, self.tokens.reserve(estimated_tokens, now))
+            
+            if timeout is not None and delay > timeout:
+                # Give the capacity back so callers behind us don't wait for a call that won't happen
+                if self.requests:
+                    self.requests.refund(1)
+                if self.tokens:
+                    self.tokens.refund(min(estimated_tokens, self.tokens.capacity))
+                self.timed_out += 1
+                return None
+            
+            self.acquired += 1
+            if delay > 0:
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            return delay
+    
+    def _done_waiting(self, delay: float) -> None:
+        with self._lock:
+            self.queue_depth -= 1
+            self.waits += 1
+            self.wait_time += delay
+            self.max_wait = max(self.max_wait, delay)
+    
+    def acquire(self, estimated_tokens: int, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Block until the call may be sent; returns the seconds waited
+        
+        Returns None without waiting (or reserving) if the wait would exceed timeout.
+        """
+        delay = self._reserve(estimated_tokens, timeout)
+        if delay is None:
+            return None
+        if delay > 0:
+            try:
+                time.sleep(delay)
+            finally:
+                self._done_waiting(delay)
+        return delay
+    
+    async def aacquire(self, estimated_tokens: int, timeout: Optional[float] = None) -> Optional[float]:
+        """Async counterpart of acquire"""
+        delay = self._reserve(estimated_tokens, timeout)
+        if delay is None:
+            return None
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._done_waiting(delay)
+        return delay
+    
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Return over-reserved tokens once the real usage is known"""
+        if self.tokens is None or actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+    
+    def observe(self, headers: Mapping[str, str], throttled: bool = False, backoff: float = 0.0) -> None:
+        """
+        Feed response headers back into the limiter
+        
+        Args:
+            headers: Response headers (case-insensitive mapping)
+            throttled: True if the response was a 429
+            backoff: Pause to apply on a 429 without Retry-After
+        """
+        with self._lock:
+            now = time.monotonic()
+            updated = False
+            
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is None:
+                    continue
+                updated = True
+                try:
+                    remaining_value = float(remaining)
+                except ValueError:
+                    continue
+                if bucket:
+                    bucket.clamp(remaining_value, now)
+                if remaining_value <= 0:
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self.blocked_until = max(self.blocked_until, now + reset)
+            
+            if throttled:
+                self.throttled += 1
+                retry_after = parse_duration(headers.get("retry-after"))
+                pause = retry_after if retry_after is not None else backoff
+                self.blocked_until = max(self.blocked_until, now + pause)
+            
+            if updated:
+                self.header_updates += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and bucket levels"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "requests_per_minute": self.requests.capacity if self.requests else None,
+                "tokens_per_minute": self.tokens.capacity if self.tokens else None,
+                "requests_available": round(self.requests.level, 2) if self.requests else None,
+                "tokens_available": round(self.tokens.level, 2) if self.tokens else None,
+                "blocked_for_ms": round(max(0.0, self.blocked_until - now) * 1000, 2),
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "acquired": self.acquired,
+                "waits": self.waits,
+                "wait_ms_total": round(self.wait_time * 1000, 2),
+                "wait_ms_max": round(self.max_wait * 1000, 2),
+                "wait_ms_avg": round(self.wait_time * 1000 / self.waits, 2) if self.waits else 0.0,
+                "throttled_429s": self.throttled,
+                "deadline_timeouts": self.timed_out,
+                "header_updates": self.header_updates
+            }
+
+
+# Groq enforces limits per model, so each model gets its own buckets
+_limiters: Dict[str, RateLimiter] = {}
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str = Config.GROQ_MODEL) -> RateLimiter:
+    """Get the process-wide rate limiter for a model, creating it on first use"""
+    limiter = _limiters.get(model)
+    if limiter is None:
+        with _limiter_lock:
+            limiter = _limiters.setdefault(model, RateLimiter())
+    return limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Get limiter stats for every model that has been called"""
+    with _limiter_lock:
+        limiters = dict(_limiters)
+    return {model: limiter.get_stats() for model, limiter in limiters.items()}
@@ -0,0 +1,156 @@
+"""
+Where session state is kept between turns: this process only, or a SQLite file shared by workers
+"""
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from typing import Optional, Tuple
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from agents.session_state import SessionState
+from config.config import Config
+
+
+def encode_state(state: SessionState) -> bytes:
+    """Serialise a session as compact JSON, deflated (history and display data compress well)"""
+    return zlib.compress(json.dumps(asdict(state), separators=(",", ":")).encode("utf-8"), 1)
+
+
+def decode_state(data: bytes) -> SessionState:
+    return SessionState(**json.loads(zlib.decompress(data).decode("utf-8")))
+
+
+class SessionBackend(ABC):
+    """
+    Storage behind SessionStore's in-process cache
+    
+    Versions let a worker tell whether its cached copy is current with a
+    single indexed read instead of loading and decoding the session. Saves
+    are compare-and-set on the version the writer started from, so two
+    workers that loaded the same version cannot both write the next one.
+    """
+    
+    # False: the cache is the only copy, so evicting a session loses it
+    persistent: bool = True
+    
+    @abstractmethod
+    def version(self, session_id: str) -> Optional[int]:
+        """Get the stored session's version, or None if it is not stored"""
+    
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[Tuple[int, bytes]]:
+        """Get (version, encoded state), or None if it is not stored"""
+    
+    @abstractmethod
+    def save(self, session_id: str, version: int, data: bytes) -> Optional[int]:
+        """
+        Store the encoded state if the stored version is still `version` (0: not stored yet)
+        
+        Returns:
+            The new version, or None if another writer saved or deleted the session since
+        """
+    
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        pass
+    
+    @abstractmethod
+    def sweep(self, idle_seconds: float) -> int:
+        """Drop sessions not saved for idle_seconds; returns how many were dropped"""
+    
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored sessions"""
+
+
+class MemorySessionBackend(SessionBackend):
+    """Keeps nothing beyond the cache: single-process deployments"""
+    
+    persistent = False
+    
+    def version(self, session_id: str) -> Optional[int]:
+        return None
+    
+    def load(self, session_id: str) -> Optional[Tuple[int, bytes]]:
+        return None
+    
+    def save(self, session_id: str, version: int, data: bytes) -> Optional[int]:
+        return version + 1
+    
+    def delete(self, session_id: str) -> None:
+        pass
+    
+    def sweep(self, idle_seconds: float) -> int:
+        return 0
+    
+    def count(self) -> int:
+        return 0
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """One row per session in a WAL-mode SQLite file that every local worker process opens"""
+    
+    def __init__(self, path: str = Config.SESSION_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; a power cut may lose the last turn
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, version INTEGER NOT NULL, data BLOB NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+        self._db.commit()
+    
+    def version(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+    
+    def load(self, session_id: str) -> Optional[Tuple[int, bytes]]:
+        with self._lock:
+            row = self._db.execute("SELECT version, data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return (row[0], row[1]) if row else None
+    
+    def save(self, session_id: str, version: int, data: bytes) -> Optional[int]:
+        with self._lock:
+            if version == 0:
+                cursor = self._db.execute(
+                    "INSERT INTO sessions (id, version, data, updated) VALUES (?, 1, ?, ?) ON CONFLICT(id) DO NOTHING",
+                    (session_id, data, time.time())
+                )
+            else:
+                cursor = self._db.execute(
+                    "UPDATE sessions SET version = version + 1, data = ?, updated = ? WHERE id = ? AND version = ?",
+                    (data, time.time(), session_id, version)
+                )
+            self._db.commit()
+        return version + 1 if cursor.rowcount == 1 else None
+    
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._db.commit()
+    
+    def sweep(self, idle_seconds: float) -> int:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - idle_seconds,))
+            self._db.commit()
+        return cursor.rowcount
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_backend(name: str = Config.SESSION_BACKEND) -> SessionBackend:
+    """Build the backend named by SESSION_BACKEND ("memory" or "sqlite")"""
+    if name == "sqlite":
+        return SQLiteSessionBackend()
+    if name != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND: {name}")
+    return MemorySessionBackend()
@@ -0,0 +1,129 @@
+"""
+Per-session locks so turns of one session run one at a time while sessions run in parallel
+"""
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import threading
+import time
+
+from config.config import Config
+
+
+class SessionLocks:
+    """
+    A lock per session id, created on demand and dropped when nobody holds or waits for it
+    
+    Threads and the event loop share the same locks, so a turn served by
+    the ASGI app and one served by a Flask thread still queue behind each
+    other. Waits are bounded: a caller that cannot get the lock in time is
+    told so rather than piling up behind a long agent run.
+    
+    The locks are per process. With SESSION_BACKEND=sqlite and several
+    workers, overlapping turns of one session are only serialised if the
+    load balancer routes each session to one worker.
+    """
+    
+    # How often the async path retries a contended lock
+    POLL_SECONDS = 0.01
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: Dict[str, List[Any]] = {}  # session id -> [lock, holders + waiters]
+        
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.replays = 0
+    
+    def _ref(self, session_id: str) -> threading.Lock:
+        with self._lock:
+            entry = self._locks.setdefault(session_id, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+    
+    def _unref(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._locks[session_id]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[session_id]
+    
+    def _count(self, acquired: bool, contended: bool) -> None:
+        with self._lock:
+            self.acquired += acquired
+            self.contended += contended
+            self.timeouts += not acquired
+    
+    @contextmanager
+    def hold(self, session_id: str, timeout: float) -> Iterator[bool]:
+        """
+        Hold the session's lock for the enclosed block
+        
+        Yields:
+            False if the lock could not be acquired within timeout seconds
+            (the block then runs without it and should bail out)
+        """
+        lock = self._ref(session_id)
+        acquired = contended = False
+        try:
+            acquired = lock.acquire(blocking=False)
+            if not acquired:
+                contended = True
+                acquired = lock.acquire(timeout=max(timeout, 0.0))
+            self._count(acquired, contended)
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+            self._unref(session_id)
+    
+    @asynccontextmanager
+    async def ahold(self, session_id: str, timeout: float) -> AsyncIterator[bool]:
+        """Async counterpart of hold that waits without blocking the event loop"""
+        lock = self._ref(session_id)
+        acquired = contended = False
+        try:
+            acquired = lock.acquire(blocking=False)
+            give_up = time.monotonic() + timeout
+            while not acquired and time.monotonic() < give_up:
+                contended = True
+                await asyncio.sleep(self.POLL_SECONDS)
+                acquired = lock.acquire(blocking=False)
+            self._count(acquired, contended)
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+            self._unref(session_id)
+    
+    def note_replay(self) -> None:
+        """Count a duplicate submission answered from its idempotency key"""
+        with self._lock:
+            self.replays += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get how often turns of one session collided"""
+        with self._lock:
+            return {
+                "active_sessions": len(self._locks),
+                "acquired": self.acquired,
+                "contended": self.contended,
+                "timeouts": self.timeouts,
+                "idempotent_replays": self.replays,
+                "wait_timeout_seconds": Config.SESSION_LOCK_TIMEOUT
+            }
+
+
+_locks: Optional[SessionLocks] = None
+_locks_lock = threading.Lock()
+
+
+def get_session_locks() -> SessionLocks:
+    """Get the process-wide session locks, creating them on first use"""
+    global _locks
+    if _locks is None:
+        with _locks_lock:
+            if _locks is None:
+                _locks = SessionLocks()
+    return _locks
@@ -0,0 +1,291 @@
+"""
+Bounded cache of live sessions over a pluggable backend: LRU eviction, idle expiry and a background sweeper
+"""
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, Optional, Tuple
+import sys
+import threading
+import time
+
+from agents.session_state import SessionState
+from config.config import Config
+from models.session_backends import SessionBackend, create_session_backend, decode_state, encode_state
+
+
+def approx_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Rough deep size in bytes of plain Python data (dicts, lists, strings, dataclasses)"""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(key, seen) + approx_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += approx_size(vars(obj), seen)
+    return size
+
+
+class SessionStore:
+    """
+    Every session's state (conversation, agent state, display data) in one LRU
+    
+    Browser tabs mint a new session id on every load and rarely call
+    /api/clear, so sessions are dropped once idle for ttl_seconds (by the
+    sweeper, or lazily on access) and the least recently used one goes
+    when max_sessions is reached.
+    
+    With a persistent backend the LRU is a read-through cache: a cached
+    session is used as long as the backend still holds the same version,
+    and the controller saves each session once at the end of its turn
+    (tools mutate it freely in memory until then). Evicting a session then
+    only drops the cached copy.
+    
+    Workers sharing a backend stay consistent between turns, but nothing
+    serialises one session's turns across processes: SessionLocks only
+    does so within one. Route each session to one worker (sticky sessions)
+    if a client can send overlapping turns. Otherwise, when two workers run
+    turns of the same session at once, the first save wins and the other
+    turn's changes are dropped (see save()).
+    """
+    
+    # Sessions sampled when estimating memory per session for get_stats()
+    SIZE_SAMPLE = 50
+    
+    def __init__(
+        self,
+        max_sessions: int = Config.SESSION_MAX_SESSIONS,
+        ttl_seconds: float = Config.SESSION_TTL_SECONDS,
+        sweep_interval: float = Config.SESSION_SWEEP_SECONDS,
+        backend: Optional[SessionBackend] = None
+    ):
+        """
+        Args:
+            max_sessions: Live sessions kept before least-recently-used eviction
+            ttl_seconds: Idle time after which a session is dropped (0 disables expiry)
+            sweep_interval: Seconds between background sweeps (0 disables the sweeper)
+            backend: Where sessions are kept between turns (default: SESSION_BACKEND)
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.backend = backend or create_session_backend()
+        
+        self._lock = threading.Lock()
+        # session id -> (state, last used, version last loaded or saved; 0 = never saved)
+        self._sessions: "OrderedDict[str, Tuple[SessionState, float, int]]" = OrderedDict()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.deletions = 0
+        self.sweeps = 0
+        self.loads = 0
+        self.writes = 0
+        self.conflicts = 0
+        self.bytes_written = 0
+    
+    def _expired(self, last_seen: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - last_seen > self.ttl_seconds
+    
+    def _lookup(self, session_id: str, now: float) -> Optional[Tuple[SessionState, int]]:
+        """Return a cached session and its version and mark it used, dropping it if it has expired (lock held)"""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        state, last_seen, version = entry
+        if self._expired(last_seen, now):
+            del self._sessions[session_id]
+            self.expirations += 1
+            return None
+        self._sessions[session_id] = (state, now, version)
+        self._sessions.move_to_end(session_id)
+        return state, version
+    
+    def _cache(self, state: SessionState, version: int) -> None:
+        """Insert into the cache, evicting the LRU session if full (lock held)"""
+        self._sessions[state.session_id] = (state, time.time(), version)
+        self._sessions.move_to_end(state.session_id)
+        while len(self._sessions) > self.max_sessions:
+            evicted, _ = self._sessions.popitem(last=False)
+            self.evictions += 1
+            if not self.backend.persistent:
+                print(f"[Sessions] Evicted least recently used session {evicted}")
+    
+    def _read(self, session_id: str) -> Optional[SessionState]:
+        """
+        Get the current state from the cache, or through it from the backend
+        
+        Current as of this read only: another worker may save the session
+        while this one runs a turn on it (see the class docstring).
+        """
+        with self._lock:
+            cached = self._lookup(session_id, time.time())
+        if not self.backend.persistent:
+            return cached[0] if cached else None
+        
+        stored = self.backend.version(session_id)
+        if cached and cached[1] == stored:
+            return cached[0]
+        if stored is None:
+            if cached and cached[1] == 0:
+                return cached[0]  # created here and not saved yet
+            self._uncache(session_id)  # deleted or expired by another worker
+            return None
+        
+        # Another worker has saved a newer version since this one was cached
+        row = self.backend.load(session_id)
+        if row is None:
+            return None
+        version, data = row
+        state = decode_state(data)
+        with self._lock:
+            self._cache(state, version)
+            self.loads += 1
+        return state
+    
+    def _uncache(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+    
+    def get(self, session_id: str) -> SessionState:
+        """Get the session's state, creating it (and evicting the LRU session if full) if needed"""
+        state = self._read(session_id)
+        if state is None:
+            state = SessionState(session_id=session_id)
+            with self._lock:
+                self._cache(state, 0)
+                self.created += 1
+        return state
+    
+    def peek(self, session_id: str) -> Optional[SessionState]:
+        """Get the session's state if it is live, without creating it"""
+        return self._read(session_id)
+    
+    def save(self, state: SessionState) -> bool:
+        """
+        Write the session to the backend: once per turn, after everything in it has run
+        
+        Returns:
+            False if another worker saved (or deleted) the session since this
+            copy was loaded. That worker's write stands; this copy is dropped
+            from the cache so the next turn loads the stored one.
+        """
+        if not self.backend.persistent:
+            return True  # the cached object is the only copy and is already up to date
+        
+        with self._lock:
+            entry = self._sessions.get(state.session_id)
+            loaded = entry[2] if entry else 0
+        data = encode_state(state)
+        version = self.backend.save(state.session_id, loaded, data)
+        if version is None:
+            self._uncache(state.session_id)
+            with self._lock:
+                self.conflicts += 1
+            print(f"[Sessions] Session {state.session_id} was saved by another worker since version {loaded}; this turn's changes were not stored")
+            return False
+        with self._lock:
+            self._cache(state, version)
+            self.writes += 1
+            self.bytes_written += len(data)
+        return True
+    
+    def delete(self, session_id: str) -> None:
+        """Forget a session (e.g. on /api/clear)"""
+        with self._lock:
+            if self._sessions.pop(session_id, None) is not None:
+                self.deletions += 1
+        self.backend.delete(session_id)
+    
+    def sweep(self) -> int:
+        """Drop every idle session; returns how many were dropped"""
+        if not self.ttl_seconds:
+            return 0
+        now = time.time()
+        with self._lock:
+            # Entries are in last-used order, so the idle ones are all at the front
+            expired = []
+            for session_id, (_, last_seen, _) in self._sessions.items():
+                if not self._expired(last_seen, now):
+                    break
+                expired.append(session_id)
+            for session_id in expired:
+                del self._sessions[session_id]
+            self.expirations += len(expired)
+            self.sweeps += 1
+        
+        # Sessions are only written at the end of a turn, so "updated" is last activity
+        swept = self.backend.sweep(self.ttl_seconds)
+        if expired or swept:
+            print(f"[Sessions] Swept {len(expired)} idle cached and {swept} stored session(s)")
+        return len(expired) + swept
+    
+    def start_sweeper(self) -> None:
+        """Sweep idle sessions every sweep_interval seconds on a daemon thread"""
+        if not self.sweep_interval or self._sweeper is not None:
+            return
+        
+        def run():
+            while not self._stop.wait(self.sweep_interval):
+                self.sweep()
+        
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+    
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session counts and approximate memory held per session"""
+        with self._lock:
+            live = len(self._sessions)
+            recent = [state for state, _, _ in islice(reversed(self._sessions.values()), self.SIZE_SAMPLE)]
+            stats = {
+                "backend": type(self.backend).__name__,
+                "live_sessions": live,
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "created": self.created,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "deletions": self.deletions,
+                "sweeps": self.sweeps,
+                "backend_loads": self.loads,
+                "backend_writes": self.writes,
+                "write_conflicts": self.conflicts,
+                "bytes_per_write": round(self.bytes_written / self.writes) if self.writes else 0
+            }
+        
+        # Sized outside the lock; the sample is of the most recently used sessions
+        per_session = sum(approx_size(state) for state in recent) / len(recent) if recent else 0
+        stats["approx_bytes_per_session"] = round(per_session)
+        stats["approx_total_bytes"] = round(per_session * live)
+        if self.backend.persistent:
+            stats["stored_sessions"] = self.backend.count()
+        return stats
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Get the process-wide session store, starting its sweeper on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+                _store.start_sweeper()
+    return _store
@@ -0,0 +1,123 @@
+"""
+Single-flight coalescing of identical in-flight LLM calls
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import threading
+
+
+class _Flight:
+    """One in-flight upstream call that other threads can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one upstream call
+    
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait and receive the same result.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        # Futures are bound to one event loop, so async flights are keyed by loop too
+        self._async_flights: Dict[Tuple[int, str], "asyncio.Future[Any]"] = {}
+        
+        self.leaders = 0
+        self.collapsed = 0
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once for all concurrent callers sharing key"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.leaders += 1
+                leader = True
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+    
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async counterpart of do"""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            future = self._async_flights.get(flight_key)
+            if future is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                future = loop.create_future()
+                self._async_flights[flight_key] = future
+                self.leaders += 1
+                leader = True
+        
+        if not leader:
+            # shield so one cancelled waiter doesn't cancel the shared result
+            return await asyncio.shield(future)
+        
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unshared failure doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_flights.pop(flight_key, None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get how many upstream calls ran and how many were collapsed into them"""
+        with self._lock:
+            total = self.leaders + self.collapsed
+            return {
+                "upstream_calls": self.leaders,
+                "collapsed_calls": self.collapsed,
+                "collapse_ratio": round(self.collapsed / total, 3) if total else 0.0,
+                "in_flight": len(self._flights) + len(self._async_flights)
+            }
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight group, creating it on first use"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
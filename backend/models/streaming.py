@@ -0,0 +1,88 @@
+"""
+Callback handlers for streaming agent output to the client
+"""
+from langchain_core.callbacks import BaseCallbackHandler
+from typing import Any, Iterator, Optional, Tuple
+import queue
+
+
+def wants_tokens(run_manager: Optional[Any]) -> bool:
+    """Check whether any handler attached to an LLM run consumes tokens"""
+    if run_manager is None:
+        return False
+    return any(isinstance(handler, TokenStreamHandler) for handler in run_manager.handlers)
+
+
+def emit_answer(callbacks: Optional[list], text: str) -> None:
+    """Send a reply that was produced without a streamed LLM call to any stream handlers"""
+    for handler in callbacks or []:
+        if isinstance(handler, TokenStreamHandler) and text:
+            handler.emit("token", text)
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """Base handler that turns LLM callbacks into a queue of (event, data) pairs"""
+    
+    _DONE = object()
+    
+    def __init__(self):
+        self._events = queue.Queue()
+    
+    def emit(self, event: str, data: Any) -> None:
+        self._events.put((event, data))
+    
+    def finish(self) -> None:
+        """Signal that no more events will be emitted"""
+        self._events.put(self._DONE)
+    
+    def events(self, timeout: Optional[float] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Yield events until finish() is called
+        
+        Args:
+            timeout: Seconds to wait for the next event before yielding a keep-alive
+        """
+        while True:
+            try:
+                item = self._events.get(timeout=timeout)
+            except queue.Empty:
+                yield ("ping", None)
+                continue
+            if item is self._DONE:
+                return
+            yield item
+
+
+class FinalAnswerStreamHandler(TokenStreamHandler):
+    """
+    Forwards only the text after "Final Answer:" in each ReAct step.
+    
+    Thought/Action lines stay server-side; the marker can be split across
+    tokens, so each LLM run is buffered until it is found.
+    """
+    
+    MARKER = "Final Answer:"
+    
+    def __init__(self):
+        super().__init__()
+        self._buffer = ""
+        self._in_answer = False
+    
+    def on_llm_start(self, serialized: Any, prompts: Any, **kwargs: Any) -> None:
+        self._buffer = ""
+        self._in_answer = False
+    
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self._in_answer:
+            self.emit("token", token)
+            return
+        
+        self._buffer += token
+        index = self._buffer.find(self.MARKER)
+        if index == -1:
+            return
+        
+        self._in_answer = True
+        remainder = self._buffer[index + len(self.MARKER):].lstrip()
+        if remainder:
+            self.emit("token", remainder)
@@ -0,0 +1,80 @@
+"""
+Per-scope accounting of upstream LLM calls and token usage
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, Optional
+import threading
+
+
+@dataclass
+class UsageMeter:
+    """Counts the upstream calls made inside one usage_scope()"""
+    
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    estimated_calls: int = 0  # streamed calls report no usage, so their prompt size is estimated
+    latency_ms: float = 0.0  # time until upstream responded, summed over calls
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_current_meter: ContextVar[Optional[UsageMeter]] = ContextVar("current_usage_meter", default=None)
+
+# Process-wide totals per model, for /api/stats
+_totals: Dict[str, UsageMeter] = {}
+_totals_lock = threading.Lock()
+
+
+@contextmanager
+def usage_scope() -> Iterator[UsageMeter]:
+    """Count every LLM call made in the enclosed block (including tool threads it spawns)"""
+    meter = UsageMeter()
+    token = _current_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _current_meter.reset(token)
+
+
+def _add(meter: UsageMeter, prompt_tokens: int, completion_tokens: int, estimated: bool, latency_ms: float) -> None:
+    meter.calls += 1
+    meter.prompt_tokens += prompt_tokens
+    meter.completion_tokens += completion_tokens
+    meter.latency_ms += latency_ms
+    if estimated:
+        meter.estimated_calls += 1
+
+
+def record_usage(
+    prompt_tokens: int,
+    completion_tokens: int = 0,
+    estimated: bool = False,
+    latency_ms: float = 0.0,
+    model: str = ""
+) -> None:
+    """Add one upstream call to the process totals and to the active usage scope, if any"""
+    with _totals_lock:
+        _add(_totals.setdefault(model, UsageMeter()), prompt_tokens, completion_tokens, estimated, latency_ms)
+    
+    meter = _current_meter.get()
+    if meter is not None:
+        _add(meter, prompt_tokens, completion_tokens, estimated, latency_ms)
+
+
+def get_usage_stats() -> Dict[str, Any]:
+    """Get upstream token usage and latency per model since startup"""
+    with _totals_lock:
+        totals = {model: UsageMeter(**meter.as_dict()) for model, meter in _totals.items()}
+    return {
+        model: {
+            **meter.as_dict(),
+            "latency_ms": round(meter.latency_ms, 1),
+            "prompt_tokens_per_call": round(meter.prompt_tokens / meter.calls, 1),
+            "latency_ms_per_call": round(meter.latency_ms / meter.calls, 1)
+        }
+        for model, meter in totals.items()
+    }
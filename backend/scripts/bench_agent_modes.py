@@ -0,0 +1,190 @@
+"""
+Compare ReAct and tool-calling agent modes: LLM calls and prompt tokens per resolved turn
+
+By default the model is a local script that plays the ideal trajectory for
+each turn in both modes (ReAct never produces a parse error here), so the
+numbers isolate what each mode re-sends per step. Prompt tokens are then
+estimated at ~4 characters per token. --react-malformed makes the scripted
+ReAct model open every turn with an "Action: None" step, the failure the
+reservation prompt warns about, to show what one parse error costs. With
+--live the turns go to the Groq API and the counts come from its usage reports.
+--all-examples puts every worked example in each prompt instead of the few
+selected for the turn, to show what few-shot selection saves.
+
+Usage (from backend/):
+    python -m scripts.bench_agent_modes [--live | --react-malformed] [--all-examples] [--repeat 1]
+"""
+import argparse
+import json
+import os
+
+
+# (agent role, user input, tool calls the scripted model makes, final reply)
+TURNS = [
+    ("qa", "Show me hotels in New York under $150",
+     [("DisplayResults", {"type": "hotels", "filters": {"city": "New York", "max_price": 150}})],
+     "Here are hotels in New York under $150. Would you like to book one?"),
+    ("qa", "What's the best time of year to visit Lisbon?",
+     [("SearchKnowledge", {"query": "best time to visit Lisbon"})],
+     "Spring and early autumn are ideal: warm, sunny and less crowded."),
+    ("reservation", "Previous conversation:\nUser: Book a hotel in NYC\nAssistant: How many people will be staying?\n\nCurrent message: 2 people",
+     [],
+     "Perfect! What is your check-in date? (Format: YYYY-MM-DD)"),
+    ("reservation", "Previous conversation:\nUser: 2026-02-18\nAssistant: What name should the reservation be under?\n\nCurrent message: John Smith",
+     [("ConfirmReservation", {"type": "hotel", "city": "NYC", "people": "2", "checkin": "2026-02-15",
+                              "checkout": "2026-02-18", "name": "John Smith"})],
+     "Your hotel reservation is confirmed!"),
+    ("trip_booking", "Plan a trip to NYC for 3 days",
+     [("PlanTrip", {"details": "Plan a trip to NYC for 3 days"}), ("StartReservation", {"reservation_type": "flight"})],
+     "Great! Let's start with your flight. How many tickets do you need?"),
+    ("fallback", "What's 2 + 2?",
+     [],
+     "I'm a travel assistant, so I can't help with math. Can I help you plan a trip?"),
+]
+
+
+class _ScriptedResponse:
+    """Just enough of requests.Response for GroqLLM._send"""
+    
+    status_code = 200
+    headers = {}
+    
+    def __init__(self, body):
+        self._body = body
+    
+    def json(self):
+        return self._body
+    
+    def raise_for_status(self):
+        pass
+
+
+class ScriptedTransport:
+    """Stands in for the pooled transport and answers as the current turn's ideal trajectory"""
+    
+    def __init__(self, react_malformed: bool = False):
+        self.turn = None
+        self.react_malformed = react_malformed
+    
+    def _reply(self, payload):
+        user_input, calls, final = self.turn[1], self.turn[2], self.turn[3]
+        
+        if payload.get("tools"):
+            done = sum(1 for message in payload["messages"] if message.get("tool_calls"))
+            if done < len(calls):
+                name, args = calls[done]
+                return {"role": "assistant", "content": None, "tool_calls": [{
+                    "id": f"call_{done}", "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(args)}
+                }]}
+            return {"role": "assistant", "content": final}
+        
+        scratchpad = payload["messages"][0]["content"]
+        scratchpad = scratchpad[scratchpad.rfind(user_input):]
+        invalid = scratchpad.count("is not a valid tool")
+        if self.react_malformed and not invalid:
+            return {"role": "assistant", "content": "Thought: I'll just ask the user.\nAction: None\nAction Input: none"}
+        
+        done = scratchpad.count("Observation:") - invalid
+        if done < len(calls):
+            name, args = calls[done]
+            action_input = next(iter(args.values())) if len(args) == 1 else json.dumps(args)
+            return {"role": "assistant", "content": f"Thought: I should use {name}.\nAction: {name}\nAction Input: {action_input}"}
+        return {"role": "assistant", "content": f"Thought: I now know the final answer\nFinal Answer: {final}"}
+    
+    def post(self, url, headers=None, json=None, timeout=None, stream=False):
+        from models.groq_llm import GroqLLM
+        
+        message = self._reply(json)
+        return _ScriptedResponse({
+            "choices": [{"message": message}],
+            "usage": {
+                "prompt_tokens": GroqLLM._prompt_chars(json) // 4,
+                "completion_tokens": len(message["content"] or "") // 4,
+                "total_tokens": None
+            }
+        })
+
+
+def _resolved(result) -> bool:
+    output = result.get("output") or ""
+    return result["success"] and bool(output) and not output.startswith(("Agent stopped", "Error", "I'm experiencing"))
+
+
+def run_mode(mode: str, transport, repeat: int):
+    """Run every turn through freshly built agents in one mode; returns per-turn usage rows"""
+    from agents.fallback_agent import FallbackAgent
+    from agents.qa_agent import QAAgent
+    from agents.reservation_agent import EnhancedReservationAgent
+    from agents.session_state import SessionState
+    from agents.trip_booking_agent import TripBookingAgent
+    from config.config import Config
+    from models.usage_meter import usage_scope
+    
+    for role in Config.AGENT_MODES:
+        Config.AGENT_MODES[role] = mode
+    agents = {
+        "qa": QAAgent(),
+        "reservation": EnhancedReservationAgent(),
+        "trip_booking": TripBookingAgent(),
+        "fallback": FallbackAgent()
+    }
+    for agent in agents.values():
+        if not hasattr(agent, "agent"):
+            continue  # a fallback agent with templated replies builds no executor
+        agent.llm.use_cache = False  # every call must reach the (scripted) upstream
+        if hasattr(agent.agent, "verbose"):
+            agent.agent.verbose = False
+    
+    rows = []
+    for _ in range(repeat):
+        for turn in TURNS:
+            if transport:
+                transport.turn = turn
+            with usage_scope() as meter:
+                result = agents[turn[0]].execute({"input": turn[1]}, session=SessionState(session_id="bench"))
+            rows.append((turn[0], _resolved(result), meter))
+    return rows
+
+
+def report(mode: str, rows) -> None:
+    resolved = [meter for _, ok, meter in rows if ok]
+    calls = sum(meter.calls for _, _, meter in rows)
+    prompt_tokens = sum(meter.prompt_tokens for _, _, meter in rows)
+    print(f"{mode}:")
+    print(f"  turns resolved:           {len(resolved)}/{len(rows)}")
+    if resolved:
+        print(f"  LLM calls / resolved:     {calls / len(resolved):.2f}")
+        print(f"  prompt tokens / resolved: {prompt_tokens / len(resolved):.0f}")
+    for role in dict.fromkeys(role for role, _, _ in rows):
+        meters = [meter for r, _, meter in rows if r == role]
+        print(f"    {role:<13} calls {sum(m.calls for m in meters) / len(meters):.2f}"
+              f"  prompt tokens {sum(m.prompt_tokens for m in meters) / len(meters):.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="call the Groq API instead of the scripted model")
+    parser.add_argument("--react-malformed", action="store_true", help="scripted ReAct model makes one invalid step per turn")
+    parser.add_argument("--all-examples", action="store_true", help="disable few-shot example selection")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    
+    if args.all_examples:
+        os.environ["FEW_SHOT_ENABLED"] = "False"
+    
+    transport = None
+    if not args.live:
+        # The scripted model answers instantly, so don't let the client-side limiter pace it
+        os.environ["GROQ_RPM_LIMIT"] = "0"
+        os.environ["GROQ_TPM_LIMIT"] = "0"
+        import models.groq_llm
+        transport = ScriptedTransport(args.react_malformed)
+        models.groq_llm.get_transport = lambda: transport  # type: ignore
+    
+    for mode in ("react", "tools"):
+        report(mode, run_mode(mode, transport, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
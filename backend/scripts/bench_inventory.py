@@ -0,0 +1,139 @@
+"""
+Benchmark DisplayResults searches over a synthetic catalog: indexed store vs a linear scan
+
+Hotels and restaurants are spread over --cities cities. Each query picks
+a city and a random mix of the filters the agents send (max price,
+minimum rating, stars, cuisine, price level). The linear scan is what the
+old generate_* functions did: one list comprehension over every record.
+
+Usage (from backend/):
+    python -m scripts.bench_inventory [--sizes 10000,100000,1000000] [--cities 100] [--queries 500]
+"""
+import argparse
+import gc
+import random
+import statistics
+import time
+
+from inventory.store import InventoryStore
+
+
+CUISINES = ["Italian", "Japanese", "American", "French", "Indian", "Mexican", "Thai", "Chinese"]
+
+
+def synthetic_hotels(count: int, cities: int, rng: random.Random):
+    for i in range(count):
+        yield {
+            "id": f"hotel_{i}",
+            "name": f"Hotel {i}",
+            "city": f"City {i % cities}",
+            "price_per_night": rng.randint(40, 600),
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "stars": rng.randint(1, 5)
+        }
+
+
+def synthetic_restaurants(count: int, cities: int, rng: random.Random):
+    for i in range(count):
+        yield {
+            "id": f"rest_{i}",
+            "name": f"Restaurant {i}",
+            "city": f"City {i % cities}",
+            "cuisine": rng.choice(CUISINES),
+            "price_range": rng.randint(1, 4),
+            "rating": round(rng.uniform(2.5, 5.0), 1)
+        }
+
+
+def random_filters(kind: str, cities: int, rng: random.Random) -> dict:
+    filters = {"city": f"City {rng.randrange(cities)}"}
+    if kind == "hotels":
+        if rng.random() < 0.8:
+            filters["max_price"] = rng.choice([100, 150, 200, 300])
+        if rng.random() < 0.5:
+            filters["min_rating"] = rng.choice([4.0, 4.5])
+        if rng.random() < 0.3:
+            filters["min_stars"] = rng.choice([4, 5])
+    else:
+        if rng.random() < 0.6:
+            filters["cuisine"] = rng.choice(CUISINES)
+        if rng.random() < 0.6:
+            filters["max_price_range"] = rng.randint(1, 3)
+        if rng.random() < 0.3:
+            filters["min_rating"] = 4.5
+    return filters
+
+
+def linear_scan(records: list, kind: str, filters: dict) -> list:
+    """The pre-index approach: test every record against every filter"""
+    city = filters["city"].lower()
+    if kind == "hotels":
+        return [
+            r for r in records
+            if r["city"].lower() == city
+            and r["price_per_night"] <= filters.get("max_price", float("inf"))
+            and r["rating"] >= filters.get("min_rating", 0)
+            and r["stars"] >= filters.get("min_stars", 0)
+        ]
+    cuisine = (filters.get("cuisine") or "").lower()
+    return [
+        r for r in records
+        if r["city"].lower() == city
+        and (not cuisine or r["cuisine"].lower() == cuisine)
+        and r["price_range"] <= filters.get("max_price_range", 4)
+        and r["rating"] >= filters.get("min_rating", 0)
+    ]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+
+def bench(size: int, cities: int, queries: int, linear_queries: int) -> None:
+    rng = random.Random(size)
+    for kind, generate in (("hotels", synthetic_hotels), ("restaurants", synthetic_restaurants)):
+        records = list(generate(size, cities, rng))
+        store = InventoryStore()
+        start = time.perf_counter()
+        store.add_many(kind, records)
+        build_s = time.perf_counter() - start
+        
+        workload = [random_filters(kind, cities, rng) for _ in range(queries)]
+        indexed, matches = [], []
+        for filters in workload:
+            start = time.perf_counter()
+            result = store.search(kind, filters, limit=10)
+            indexed.append((time.perf_counter() - start) * 1000)
+            matches.append(result.total)
+        
+        linear = []
+        for filters in workload[:linear_queries]:
+            start = time.perf_counter()
+            linear_scan(records, kind, filters)
+            linear.append((time.perf_counter() - start) * 1000)
+        
+        stats = store.get_stats()
+        print(f"{kind:12} n={size:<8} build {build_s:6.2f}s | "
+              f"indexed p50 {statistics.median(indexed):7.3f} ms p95 {percentile(indexed, 0.95):7.3f} ms | "
+              f"linear p50 {statistics.median(linear):8.2f} ms | "
+              f"avg matches {statistics.mean(matches):7.1f}, rows scanned {stats['avg_rows_scanned']:8.1f}")
+        
+        del records, store
+        gc.collect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated catalog sizes")
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--linear-queries", type=int, default=20, help="the linear scan is slow; time fewer")
+    args = parser.parse_args()
+    
+    for size in (int(value) for value in args.sizes.split(",")):
+        bench(size, args.cities, args.queries, args.linear_queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark session creation cost: first-message latency and memory per session
+
+The LLM is replaced by a canned reply so the numbers isolate the
+application's own overhead (agent/executor construction, routing, state).
+With --max-sessions below --sessions, the session store's LRU cap is
+exercised and memory should stay flat once it is reached.
+
+Usage (from backend/):
+    python -m scripts.bench_sessions [--sessions 200] [--max-sessions N]
+"""
+import argparse
+import gc
+import os
+import statistics
+import time
+
+
+MESSAGES = [
+    "what's the weather in Paris in spring",
+    "show me hotels in New York",
+    "plan a 3 day trip to Chicago",
+    "who won the Super Bowl",
+]
+
+
+def _canned_call(self, prompt, stop=None, run_manager=None, **kwargs):
+    return "Final Answer: Happy to help with that."
+
+
+def rss_kb() -> int:
+    """Current resident set size in KB (Linux), falling back to peak RSS"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--max-sessions", type=int, help="session store cap (default: SESSION_MAX_SESSIONS)")
+    args = parser.parse_args()
+    
+    if args.max_sessions:
+        os.environ["SESSION_MAX_SESSIONS"] = str(args.max_sessions)
+    from controllers.assistant_controller import AssistantController
+    from models.groq_llm import GroqLLM
+    from models.session_store import get_session_store
+    
+    GroqLLM._call = _canned_call  # type: ignore
+    controller = AssistantController()
+    
+    # Warm imports, the intent classifier and anything built once per process
+    controller.process_request(MESSAGES[0], "warmup")
+    gc.collect()
+    
+    base_rss = rss_kb()
+    latencies = []
+    for i in range(args.sessions):
+        start = time.perf_counter()
+        controller.process_request(MESSAGES[i % len(MESSAGES)], f"bench_{i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    gc.collect()
+    grown_kb = rss_kb() - base_rss
+    
+    latencies.sort()
+    print(f"sessions:                 {args.sessions}")
+    print(f"first-message p50:        {statistics.median(latencies):.2f} ms")
+    print(f"first-message p95:        {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms")
+    print(f"RSS growth:               {grown_kb / 1024:.1f} MB")
+    print(f"RSS per session:          {grown_kb / args.sessions:.1f} KB")
+
+    stats = get_session_store().get_stats()
+    print(f"live sessions:            {stats['live_sessions']} (evicted {stats['evictions']})")
+    print(f"approx. bytes / session:  {stats['approx_bytes_per_session']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark location searches over a synthetic city: grid index vs a linear distance scan
+
+Restaurants are scattered around a city centre (~10 km across). Each
+query picks a random point and runs one of the location filters the agents
+and the map send: near + radius_km, nearest-k, or a viewport bbox. The
+linear scan computes every restaurant's distance (or box test) in Python,
+as a search without an index would.
+
+Usage (from backend/):
+    python -m scripts.bench_spatial [--sizes 10000,100000,1000000] [--queries 300]
+"""
+import argparse
+import gc
+import math
+import random
+import statistics
+import time
+
+from inventory.store import InventoryStore
+from scripts.bench_inventory import CUISINES, percentile
+
+
+CENTRE = (40.7580, -73.9855)
+
+
+def synthetic_restaurants(count: int, rng: random.Random):
+    for i in range(count):
+        yield {
+            "id": f"rest_{i}",
+            "name": f"Restaurant {i}",
+            "city": "Bench City",
+            "cuisine": rng.choice(CUISINES),
+            "price_range": rng.randint(1, 4),
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "coordinates": [CENTRE[0] + rng.gauss(0, 0.03), CENTRE[1] + rng.gauss(0, 0.04)]
+        }
+
+
+def random_query(rng: random.Random) -> dict:
+    point = [CENTRE[0] + rng.uniform(-0.04, 0.04), CENTRE[1] + rng.uniform(-0.05, 0.05)]
+    filters = {"city": "Bench City"}
+    shape = rng.choice(["radius", "nearest", "bbox"])
+    if shape == "radius":
+        filters.update(near=point, radius_km=rng.choice([0.25, 0.5, 1.0]))
+    elif shape == "nearest":
+        filters.update(near=point, nearest=rng.choice([5, 10, 20]))
+    else:
+        filters["bbox"] = [point[0] - 0.005, point[1] - 0.007, point[0] + 0.005, point[1] + 0.007]
+    if rng.random() < 0.3:
+        filters["cuisine"] = rng.choice(CUISINES)
+    return filters
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    dlat, dlon = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def linear_scan(records: list, filters: dict) -> list:
+    """No index: test every record's coordinates"""
+    cuisine = (filters.get("cuisine") or "").lower()
+    records = [r for r in records if not cuisine or r["cuisine"].lower() == cuisine]
+    if "bbox" in filters:
+        south, west, north, east = filters["bbox"]
+        return [r for r in records if south <= r["coordinates"][0] <= north and west <= r["coordinates"][1] <= east]
+    scored = [(distance_km(*filters["near"], *r["coordinates"]), r) for r in records]
+    if "radius_km" in filters:
+        return sorted((pair for pair in scored if pair[0] <= filters["radius_km"]), key=lambda pair: pair[0])
+    return sorted(scored, key=lambda pair: pair[0])[:filters["nearest"]]
+
+
+def bench(size: int, queries: int, linear_queries: int) -> None:
+    rng = random.Random(size)
+    records = list(synthetic_restaurants(size, rng))
+    store = InventoryStore()
+    store.add_many("restaurants", records)
+    start = time.perf_counter()
+    store.search("restaurants", {"city": "Bench City", "bbox": [0, 0, 0, 0]})  # builds the grid
+    grid_s = time.perf_counter() - start
+    
+    workload = [random_query(rng) for _ in range(queries)]
+    timings, matches = {}, []
+    for filters in workload:
+        shape = "bbox" if "bbox" in filters else "nearest" if "nearest" in filters else "radius"
+        start = time.perf_counter()
+        result = store.search("restaurants", filters, limit=10)
+        timings.setdefault(shape, []).append((time.perf_counter() - start) * 1000)
+        matches.append(result.total)
+    
+    linear = []
+    for filters in workload[:linear_queries]:
+        start = time.perf_counter()
+        linear_scan(records, filters)
+        linear.append((time.perf_counter() - start) * 1000)
+    
+    stats = store.get_stats()
+    print(f"restaurants n={size:<8} grid build {grid_s:5.2f}s | "
+          + " | ".join(f"{shape} p50 {statistics.median(samples):6.3f} ms p95 {percentile(samples, 0.95):6.3f} ms"
+                       for shape, samples in sorted(timings.items()))
+          + f" | linear p50 {statistics.median(linear):8.2f} ms | "
+          f"avg matches {statistics.mean(matches):7.1f}, rows scanned {stats['avg_rows_scanned']:8.1f}")
+    
+    del records, store
+    gc.collect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated catalog sizes")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--linear-queries", type=int, default=10, help="the linear scan is slow; time fewer")
+    args = parser.parse_args()
+    
+    for size in (int(value) for value in args.sizes.split(",")):
+        bench(size, args.queries, args.linear_queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compile CSV/JSONL catalogs into the memory-mapped format the server loads
+
+Records are streamed and validated one at a time; only their positions
+and indexed values are held in memory, so catalogs much larger than RAM
+compile fine. The server picks up the result on its next start, or at
+once with --reload (POST /api/inventory/reload).
+
+Usage (from backend/):
+    python -m scripts.load_inventory hotels hotels.csv [more.jsonl ...]
+    python -m scripts.load_inventory restaurants paris.csv --city Paris --reload http://localhost:5000
+"""
+import argparse
+import os
+import resource
+
+from config.config import Config
+from inventory.loader import compile_catalog
+from inventory.store import DEFAULT_DATA_DIR, SCHEMAS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=sorted(SCHEMAS))
+    parser.add_argument("sources", nargs="+", help="CSV (with a header row) or JSONL files")
+    parser.add_argument("--city", help="only replace this city's records (departure city for flights)")
+    parser.add_argument("--output", help="compiled catalog (default: <INVENTORY_DATA_DIR>/<kind>.inv)")
+    parser.add_argument("--reload", metavar="URL", help="server to tell to swap the new catalog in")
+    args = parser.parse_args()
+    
+    output = args.output or os.path.join(Config.INVENTORY_DATA_DIR or DEFAULT_DATA_DIR, f"{args.kind}.inv")
+    report = compile_catalog(args.kind, args.sources, output, city=args.city)
+    
+    print(f"read:        {report.read}")
+    print(f"written:     {report.written} into {report.partitions} partition(s)"
+          + (f", {report.kept} kept from the existing catalog" if args.city else ""))
+    print(f"rejected:    {report.rejected}")
+    for error in report.errors:
+        print(f"  {error}")
+    print(f"output:      {output} ({report.bytes / 1024 / 1024:.1f} MB)")
+    print(f"time:        {report.seconds:.2f} s ({(report.read + report.kept) / report.seconds:.0f} records/s)")
+    print(f"peak RSS:    {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    
+    if args.reload:
+        import requests
+        
+        response = requests.post(
+            f"{args.reload.rstrip('/')}/api/inventory/reload",
+            json={"type": args.kind, "city": args.city},
+            headers={"X-Admin-Token": Config.INVENTORY_ADMIN_TOKEN},
+            timeout=60
+        )
+        print(f"reload:      {response.status_code} {response.text.strip()}")
+
+
+if __name__ == "__main__":
+    main()
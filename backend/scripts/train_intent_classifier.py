@@ -0,0 +1,73 @@
+"""
+Train and evaluate the local intent classifier
+
+Runs k-fold cross-validation over the bundled examples and reports, for a
+range of confidence thresholds, how much traffic would skip the LLM and how
+accurate those local decisions are.
+
+Usage (from backend/):
+    python -m scripts.train_intent_classifier [--folds 5] [--examples data/intent_examples.jsonl]
+"""
+import argparse
+import random
+import time
+
+from config.config import Config
+from models.intent_classifier import EXAMPLES_PATH, IntentClassifier, load_examples
+
+
+THRESHOLDS = [0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+
+
+def cross_validate(examples, folds: int):
+    """Return (true_label, predicted_label, confidence) for every held-out example"""
+    shuffled = list(examples)
+    random.Random(7).shuffle(shuffled)
+    labels = {label for _, label in examples}
+    
+    predictions = []
+    for fold in range(folds):
+        test = shuffled[fold::folds]
+        train = [ex for i, ex in enumerate(shuffled) if i % folds != fold]
+        model = IntentClassifier(labels).fit(train)
+        for text, label in test:
+            predicted, confidence = model.predict(text)
+            predictions.append((label, predicted, confidence))
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--examples", default=EXAMPLES_PATH)
+    args = parser.parse_args()
+    
+    examples = load_examples(args.examples)
+    print(f"Loaded {len(examples)} examples from {args.examples}")
+    
+    predictions = cross_validate(examples, args.folds)
+    accuracy = sum(1 for label, predicted, _ in predictions if label == predicted) / len(predictions)
+    print(f"\n{args.folds}-fold accuracy (no threshold): {accuracy:.3f}\n")
+    
+    print(f"{'threshold':>10} {'skip_llm':>10} {'accuracy':>10}")
+    for threshold in THRESHOLDS:
+        covered = [(label, predicted) for label, predicted, confidence in predictions if confidence >= threshold]
+        coverage = len(covered) / len(predictions)
+        covered_accuracy = sum(1 for label, predicted in covered if label == predicted) / len(covered) if covered else 0.0
+        marker = "  <- configured" if threshold == Config.INTENT_CONFIDENCE_THRESHOLD else ""
+        print(f"{threshold:>10.2f} {coverage:>10.1%} {covered_accuracy:>10.1%}{marker}")
+    
+    start = time.perf_counter()
+    model = IntentClassifier(label for _, label in examples).fit(examples)
+    train_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    for text, _ in examples:
+        model.predict(text)
+    predict_us = (time.perf_counter() - start) * 1e6 / len(examples)
+    
+    print(f"\nFull training: {train_ms:.1f} ms | prediction: {predict_us:.1f} us/message")
+
+
+if __name__ == "__main__":
+    main()
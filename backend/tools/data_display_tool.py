@@ -1,36 +1,114 @@
 """
 Shared tools for displaying data to the frontend
 """
-from typing import Dict, Any, List
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Literal, Optional
 import json
 
+from config.config import Config
+from inventory.store import SCHEMAS, get_inventory
+from models.session_store import get_session_store
+
+
+class DisplayFilters(BaseModel):
+    """Search criteria for DisplayResults"""
+    city: Optional[str] = None
+    max_price: Optional[float] = Field(default=None, description="Hotels: max $/night. Flights: max fare")
+    min_rating: Optional[float] = Field(default=None, ge=0, le=5)
+    min_stars: Optional[int] = Field(default=None, ge=1, le=5, description="Hotels: minimum star class")
+    cuisine: Optional[str] = None
+    max_price_range: Optional[int] = Field(default=None, ge=1, le=4, description="Restaurants: 1=$ to 4=$$$$")
+    from_city: Optional[str] = Field(default=None, alias="from", description="Flights: departure city")
+    to: Optional[str] = Field(default=None, description="Flights: arrival city")
+    airline: Optional[str] = Field(default=None, description="Flights: only this airline")
+    sort_by: Optional[str] = Field(
+        default=None,
+        description="price, rating, stars (hotels), distance (from near), duration or departure (flights); prefix with - to reverse"
+    )
+    near: Optional[List[float]] = Field(
+        default=None, min_length=2, max_length=2,
+        description="Hotels/restaurants: [latitude, longitude] to search around; sorts by distance"
+    )
+    radius_km: Optional[float] = Field(default=None, gt=0, description="With near: only matches within this many km")
+    nearest: Optional[int] = Field(default=None, ge=1, le=50, description="With near: only the k closest matches")
+    bbox: Optional[List[float]] = Field(
+        default=None, min_length=4, max_length=4, description="Hotels/restaurants: [south, west, north, east] map area"
+    )
+
+
+class DisplayResultsArgs(BaseModel):
+    """Show hotels, restaurants or flights to the user as visual cards. Use whenever the user asks to show, find, search for or see options."""
+    type: Literal["hotels", "restaurants", "flights"]
+    filters: DisplayFilters = Field(default_factory=DisplayFilters)
+
 
 class DataDisplayTool:
     """Tool for sending structured data to frontend while responding in chat"""
     
-    # In-memory storage for the latest data to display
-    # In production, this could be Redis, database, or session storage
-    _display_data = {}
-    
     @staticmethod
-    def set_display_data(session_id: str, data_type: str, data: List[Dict[str, Any]]) -> None:
+    def set_display_data(
+        session_id: str,
+        data_type: str,
+        data: List[Dict[str, Any]],
+        total: Optional[int] = None,
+        sort: Optional[str] = None,
+        next_cursor: Optional[str] = None
+    ) -> None:
         """
         Store data to be sent to frontend
         
+        Written to the session of the agent turn running the tool when one
+        is bound, so the turn's own SessionState gets it even if the store
+        has since evicted or replaced that session's entry; the store is
+        only consulted outside a turn.
+        
         Args:
             session_id: User session identifier
             data_type: Type of data (hotels, restaurants, flights)
-            data: List of items to display
+            data: List of items to display (the first page)
+            total: Matches in the catalog, when there are more than data holds
+            sort: Order the items are ranked in
+            next_cursor: Token for /api/display-data?cursor= to fetch the next page
         """
-        if session_id not in DataDisplayTool._display_data:
-            DataDisplayTool._display_data[session_id] = {}
+        from agents.session_state import bound_session
         
-        DataDisplayTool._display_data[session_id] = {
+        session = bound_session()
+        if session is None or session.session_id != session_id:
+            session = get_session_store().get(session_id)
+        # Kept on the session so it is evicted along with it
+        session.display_data = {
             "type": data_type,
             "data": data,
+            "total": len(data) if total is None else total,
+            "sort": sort,
+            "next_cursor": next_cursor,
             "timestamp": json.dumps({"timestamp": "now"})  # In production, use actual timestamp
         }
     
+    @staticmethod
+    def next_page(cursor: str) -> Dict[str, Any]:
+        """
+        Fetch the page of results after the one a cursor came with
+        
+        Args:
+            cursor: next_cursor from display data or from a previous page
+        
+        Returns:
+            Dictionary with type, data, total, offset, sort and next_cursor
+        
+        Raises:
+            InvalidCursor: If the cursor is malformed or the catalog has changed since
+        """
+        data_type, result = get_inventory().page(cursor)
+        return {
+            "type": data_type,
+            "data": result.items,
+            "total": result.total,
+            "offset": result.offset,
+            "sort": result.sort,
+            "next_cursor": result.next_cursor
+        }
+    
     @staticmethod
     def get_display_data(session_id: str) -> Dict[str, Any]:
         """
@@ -42,26 +120,31 @@ class DataDisplayTool:
         Returns:
             Dictionary with type and data to display
         """
-        return DataDisplayTool._display_data.get(session_id, {})
+        session = get_session_store().peek(session_id)
+        return session.display_data if session else {}
     
     @staticmethod
     def clear_display_data(session_id: str) -> None:
         """Clear display data for a session"""
-        if session_id in DataDisplayTool._display_data:
-            del DataDisplayTool._display_data[session_id]
+        session = get_session_store().peek(session_id)
+        if session:
+            session.display_data = {}
     
     @staticmethod
-    def create_display_tool(session_id: str = "default"):
+    def create_display_tool(session_id: Optional[str] = None):
         """
         Create a tool function for displaying hotels/restaurants
         
         Args:
-            session_id: Session identifier for storing data
+            session_id: Session identifier for storing data. Leave unset for
+                tools on shared agents; the session running the agent is
+                then looked up on each call.
             
         Returns:
             Function that can be used as a LangChain tool
         """
         from langchain_core.tools import Tool
+        from agents.session_state import current_session
         
         def display_results(query_json: str) -> str:
             """
@@ -79,21 +162,22 @@ class DataDisplayTool:
                 data_type = query.get("type", "").lower()
                 filters = query.get("filters", {})
                 
-                # Generate dummy data based on type
-                if data_type == "hotels":
-                    data = generate_hotel_data(filters)
-                elif data_type == "restaurants":
-                    data = generate_restaurant_data(filters)
-                elif data_type == "flights":
-                    data = generate_flight_data(filters)
-                else:
+                if data_type not in SCHEMAS:
                     return "Invalid type. Use 'hotels', 'restaurants', or 'flights'"
                 
-                # Store data for frontend
-                DataDisplayTool.set_display_data(session_id, data_type, data)
+                result = get_inventory().search(data_type, filters)
+                data = result.items
+                
+                # Store data for frontend; it pages through the rest with the cursor
+                DataDisplayTool.set_display_data(
+                    session_id or current_session().session_id, data_type, data,
+                    total=result.total, sort=result.sort, next_cursor=result.next_cursor
+                )
                 
                 # Create chat response
-                response = create_chat_response(data_type, data, filters)
+                response = create_chat_response(
+                    data_type, data, {**filters, **result.partition}, total=result.total, sort=result.sort
+                )
                 
                 # Return the chat response directly so agent can use it
                 return response
@@ -116,295 +200,87 @@ class DataDisplayTool:
             - Restaurants (luxury): {{"type": "restaurants", "filters": {{"city": "New York", "max_price_range": 4}}}}
             - Restaurants by cuisine: {{"type": "restaurants", "filters": {{"city": "New York", "cuisine": "Italian"}}}}
             - Flights: {{"type": "flights", "filters": {{"from": "Boston", "to": "New York", "max_price": 300}}}}
+            - Flights by airline: {{"type": "flights", "filters": {{"from": "Boston", "to": "New York", "airline": "Delta"}}}}
+            - Cheapest first: {{"type": "hotels", "filters": {{"city": "New York", "sort_by": "price"}}}}
+            - Shortest flights: {{"type": "flights", "filters": {{"from": "Boston", "to": "New York", "sort_by": "duration"}}}}
+            - Near a point: {{"type": "restaurants", "filters": {{"city": "New York", "near": [40.758, -73.985], "radius_km": 2}}}}
             
             PRICE RANGE for restaurants: 1=cheap($), 2=moderate($$), 3=expensive($$$), 4=luxury($$$$)"""
         )
 
 
-def generate_hotel_data(filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Generate dummy hotel data based on filters"""
-    city = filters.get("city", "New York")
-    max_price = filters.get("max_price", 500)
-    min_rating = filters.get("min_rating", 0)
-    
-    all_hotels = [
-        {
-            "id": "hotel_1",
-            "name": "Grand Plaza Hotel",
-            "city": city,
-            "address": "123 Main Street",
-            "price_per_night": 150,
-            "rating": 4.5,
-            "stars": 4,
-            "amenities": ["WiFi", "Pool", "Gym", "Restaurant", "Spa"],
-            "image_url": "https://example.com/hotel1.jpg",
-            "available_rooms": 5,
-            "description": "Luxury hotel in the heart of downtown"
-        },
-        {
-            "id": "hotel_2",
-            "name": "Comfort Inn & Suites",
-            "city": city,
-            "address": "456 Oak Avenue",
-            "price_per_night": 95,
-            "rating": 4.0,
-            "stars": 3,
-            "amenities": ["WiFi", "Parking", "Breakfast", "Gym"],
-            "image_url": "https://example.com/hotel2.jpg",
-            "available_rooms": 12,
-            "description": "Comfortable and affordable accommodations"
-        },
-        {
-            "id": "hotel_3",
-            "name": "Luxury Resort & Casino",
-            "city": city,
-            "address": "789 Beach Boulevard",
-            "price_per_night": 275,
-            "rating": 4.8,
-            "stars": 5,
-            "amenities": ["WiFi", "Pool", "Spa", "Casino", "Beach Access", "Fine Dining"],
-            "image_url": "https://example.com/hotel3.jpg",
-            "available_rooms": 3,
-            "description": "5-star resort with world-class amenities"
-        },
-        {
-            "id": "hotel_4",
-            "name": "Budget Lodge",
-            "city": city,
-            "address": "321 Highway 1",
-            "price_per_night": 65,
-            "rating": 3.5,
-            "stars": 2,
-            "amenities": ["WiFi", "Parking"],
-            "image_url": "https://example.com/hotel4.jpg",
-            "available_rooms": 20,
-            "description": "Clean and simple budget accommodations"
-        },
-        {
-            "id": "hotel_5",
-            "name": "Business Executive Hotel",
-            "city": city,
-            "address": "555 Corporate Drive",
-            "price_per_night": 135,
-            "rating": 4.3,
-            "stars": 4,
-            "amenities": ["WiFi", "Business Center", "Meeting Rooms", "Gym"],
-            "image_url": "https://example.com/hotel5.jpg",
-            "available_rooms": 8,
-            "description": "Perfect for business travelers"
-        }
-    ]
-    
-    # Apply filters
-    filtered = [
-        h for h in all_hotels 
-        if h["price_per_night"] <= max_price and h["rating"] >= min_rating
-    ]
-    
-    return filtered
-
-
-def generate_restaurant_data(filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Generate dummy restaurant data based on filters"""
-    city = filters.get("city", "New York")
-    cuisine = filters.get("cuisine", None)
-    max_price_range = filters.get("max_price_range", 4)  # 1-4 scale
-    
-    # Handle different price filter formats
-    if isinstance(max_price_range, str):
-        # Convert "$" to 1, "$$" to 2, etc.
-        max_price_range = len(max_price_range) if max_price_range.startswith("$") else 4
-    
-    all_restaurants = [
-        {
-            "id": "rest_1",
-            "name": "The Italian Corner",
-            "city": city,
-            "address": "100 Pasta Lane",
-            "cuisine": "Italian",
-            "price_range": 2,  # 1=$ 2=$$ 3=$$$ 4=$$$$
-            "rating": 4.7,
-            "phone": "(555) 123-4567",
-            "image_url": "https://example.com/restaurant1.jpg",
-            "available_times": ["5:30 PM", "7:00 PM", "8:30 PM"],
-            "specialties": ["Handmade Pasta", "Wood-fired Pizza", "Tiramisu"],
-            "coordinates": [40.7589, -73.9851]
-        },
-        {
-            "id": "rest_2",
-            "name": "Sakura Sushi Bar",
-            "city": city,
-            "address": "200 Bamboo Street",
-            "cuisine": "Japanese",
-            "price_range": 3,
-            "rating": 4.8,
-            "phone": "(555) 234-5678",
-            "image_url": "https://example.com/restaurant2.jpg",
-            "available_times": ["6:00 PM", "7:30 PM", "9:00 PM"],
-            "specialties": ["Omakase", "Sashimi", "Sake Selection"],
-            "coordinates": [40.7614, -73.9776]
-        },
-        {
-            "id": "rest_3",
-            "name": "Burger Palace",
-            "city": city,
-            "address": "300 Grill Avenue",
-            "cuisine": "American",
-            "price_range": 1,
-            "rating": 4.2,
-            "phone": "(555) 345-6789",
-            "image_url": "https://example.com/restaurant3.jpg",
-            "available_times": ["5:00 PM", "6:00 PM", "7:00 PM", "8:00 PM"],
-            "specialties": ["Signature Burger", "Craft Beer", "Milkshakes"],
-            "coordinates": [40.7580, -73.9855]
-        },
-        {
-            "id": "rest_4",
-            "name": "Le Petit Bistro",
-            "city": city,
-            "address": "400 Croissant Circle",
-            "cuisine": "French",
-            "price_range": 4,
-            "rating": 4.9,
-            "phone": "(555) 456-7890",
-            "image_url": "https://example.com/restaurant4.jpg",
-            "available_times": ["7:00 PM", "8:30 PM"],
-            "specialties": ["Coq au Vin", "Crème Brûlée", "Wine Pairing"],
-            "coordinates": [40.7505, -73.9934]
-        },
-        {
-            "id": "rest_5",
-            "name": "Spice Garden",
-            "city": city,
-            "address": "500 Curry Court",
-            "cuisine": "Indian",
-            "price_range": 2,
-            "rating": 4.6,
-            "phone": "(555) 567-8901",
-            "image_url": "https://example.com/restaurant5.jpg",
-            "available_times": ["6:00 PM", "7:00 PM", "8:00 PM", "9:00 PM"],
-            "specialties": ["Butter Chicken", "Biryani", "Naan Bread"],
-            "coordinates": [40.7484, -73.9857]
-        }
-    ]
-    
-    # Apply filters
-    filtered = all_restaurants
-    if cuisine:
-        filtered = [r for r in filtered if r["cuisine"].lower() == cuisine.lower()]
-    if max_price_range:
-        filtered = [r for r in filtered if r["price_range"] <= max_price_range]
-    
-    return filtered
+def _distance(item: Dict[str, Any]) -> str:
+    """", 0.8 km away" for results of a search near a point"""
+    return f", {item['distance_km']:g} km away" if "distance_km" in item else ""
 
 
-def generate_flight_data(filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Generate dummy flight data based on filters"""
-    from_city = filters.get("from", "Boston")
-    to_city = filters.get("to", "New York")
-    max_price = filters.get("max_price", 1000)
-    
-    all_flights = [
-        {
-            "id": "flight_1",
-            "airline": "SkyHigh Airlines",
-            "flight_number": "SH123",
-            "from": from_city,
-            "to": to_city,
-            "departure_time": "10:30 AM",
-            "arrival_time": "2:45 PM",
-            "duration": "4h 15m",
-            "price": 350,
-            "class": "Economy",
-            "stops": 0,
-            "aircraft": "Boeing 737",
-            "available_seats": 45
-        },
-        {
-            "id": "flight_2",
-            "airline": "Budget Air",
-            "flight_number": "BA456",
-            "from": from_city,
-            "to": to_city,
-            "departure_time": "2:15 PM",
-            "arrival_time": "7:30 PM",
-            "duration": "5h 15m",
-            "price": 215,
-            "class": "Economy",
-            "stops": 1,
-            "aircraft": "Airbus A320",
-            "available_seats": 78
-        },
-        {
-            "id": "flight_3",
-            "airline": "Premium Airways",
-            "flight_number": "PA789",
-            "from": from_city,
-            "to": to_city,
-            "departure_time": "8:00 AM",
-            "arrival_time": "12:30 PM",
-            "duration": "4h 30m",
-            "price": 550,
-            "class": "Business",
-            "stops": 0,
-            "aircraft": "Boeing 787",
-            "available_seats": 12
-        }
-    ]
+def create_chat_response(
+    data_type: str,
+    data: List[Dict[str, Any]],
+    filters: Dict[str, Any],
+    total: Optional[int] = None,
+    sort: Optional[str] = None
+) -> str:
+    """
+    Create a natural language chat response
     
-    # Apply filters
-    filtered = [f for f in all_flights if f["price"] <= max_price]
+    The response is the agent's Observation, so it summarises only the top
+    few matches in a line each; the cards show the full page.
     
-    return filtered
-
-
-def create_chat_response(data_type: str, data: List[Dict[str, Any]], filters: Dict[str, Any]) -> str:
-    """Create a natural language chat response"""
+    Args:
+        total: Matches in the catalog when data is only the first of them
+        sort: Order the matches are ranked in
+    """
     count = len(data)
     
     if count == 0:
         return f"I couldn't find any {data_type} matching your criteria. Try adjusting your filters."
     
+    found = total if total and total > count else count
+    top = data[:Config.INVENTORY_SUMMARY_ITEMS]
+    
     # Create summary
     if data_type == "hotels":
         city = filters.get("city", "the area")
         max_price = filters.get("max_price", "any price")
-        response = f"I found {count} hotel(s) in {city}"
+        response = f"I found {found} hotel(s) in {city}"
         if max_price != "any price":
             response += f" under ${max_price} per night"
         response += ":\n\n"
         
-        # List all hotels
-        for i, hotel in enumerate(data, 1):
-            response += f"{i}. **{hotel['name']}** - ${hotel['price_per_night']}/night\n"
-            response += f"   ⭐ {hotel['rating']} stars | {hotel['stars']}-star hotel\n"
-            response += f"   🛏️ {hotel['available_rooms']} rooms available\n\n"
+        for i, hotel in enumerate(top, 1):
+            response += (f"{i}. **{hotel['name']}** - ${hotel['price_per_night']}/night, "
+                         f"⭐ {hotel['rating']}, {hotel['stars']}-star, {hotel['available_rooms']} rooms left"
+                         f"{_distance(hotel)}\n")
     
     elif data_type == "restaurants":
         city = filters.get("city", "the area")
         cuisine = filters.get("cuisine", "")
-        response = f"I found {count} restaurant(s)"
+        response = f"I found {found} restaurant(s)"
         if cuisine:
             response += f" serving {cuisine} cuisine"
         response += f" in {city}:\n\n"
         
-        # List all restaurants
-        for i, rest in enumerate(data, 1):
+        for i, rest in enumerate(top, 1):
             price_symbols = "$" * rest['price_range']
-            response += f"{i}. **{rest['name']}** - {rest['cuisine']}\n"
-            response += f"   🕒 Available: {', '.join(rest['available_times'][:3])}\n\n"
+            response += (f"{i}. **{rest['name']}** - {rest['cuisine']}, {price_symbols}, ⭐ {rest['rating']}, "
+                         f"🕒 {', '.join(rest['available_times'][:3])}{_distance(rest)}\n")
     
     elif data_type == "flights":
         from_city = filters.get("from", "your departure city")
         to_city = filters.get("to", "your destination")
-        response = f"I found {count} flight(s) from {from_city} to {to_city}:\n\n"
+        response = f"I found {found} flight(s) from {from_city} to {to_city}:\n\n"
         
-        # List all flights
-        for i, flight in enumerate(data, 1):
+        for i, flight in enumerate(top, 1):
             stops_text = "Nonstop" if flight['stops'] == 0 else f"{flight['stops']} stop(s)"
-            response += f"{i}. **{flight['airline']}** {flight['flight_number']} - ${flight['price']}\n"
-            response += f"   🛫 Departs: {flight['departure_time']} → Arrives: {flight['arrival_time']}\n"
-            response += f"   ⏱️ Duration: {flight['duration']} | {stops_text}\n"
-            response += f"   💺 {flight['class']} | {flight['available_seats']} seats available\n\n"
+            response += (f"{i}. **{flight['airline']}** {flight['flight_number']} - ${flight['price']}, "
+                         f"🛫 {flight['departure_time']} → {flight['arrival_time']} ({flight['duration']}, {stops_text}), "
+                         f"{flight['class']}\n")
+    
+    response += "\n"
+    if sort:
+        response += f"Sorted by {sort}. "
+    if found > len(top):
+        response += f"Showing the top {len(top)} of {found} here; the results panel pages through the rest."
     
-    return response.strip()
\ No newline at end of file
+    return response.strip()
@@ -3,7 +3,7 @@ import ChatInput from "./ChatInput";
 import StatusBar from "./StatusBar";
 import "./ChatStyle.css";
 import { useState, useEffect } from "react";
-import { processMessage, clearConversation } from "../services/api";
+import { processMessageStream, clearConversation } from "../services/api";
 
 
 export default function Chat() {
@@ -28,6 +28,13 @@ export default function Chat() {
     ]);
   };
 
+  const updateLastMessage = (update) => {
+    setMessages((prev) => [
+      ...prev.slice(0, -1),
+      { ...prev[prev.length - 1], ...update }
+    ]);
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     if (!input.trim()) return;
@@ -38,10 +45,28 @@ export default function Chat() {
     setStatus("Processing your request...");
     setStatusType("loading");
 
+    let streamed = "";
+    let streaming = false;
+
     try {
-      const data = await processMessage(input);
+      const data = await processMessageStream(input, {
+        onToken: (token) => {
+          streamed += token;
+          if (!streaming) {
+            streaming = true;
+            setStatus("Receiving response...");
+            addMessage(streamed, "assistant");
+          } else {
+            updateLastMessage({ text: streamed });
+          }
+        }
+      });
 
-      if (data.success) {
+      if (data.success && streaming) {
+        updateLastMessage({ text: data.response, agent: data.agent });
+        setStatus("Request completed successfully");
+        setStatusType("success");
+      } else if (data.success) {
         addMessage(data.response, "assistant", data.agent);
         setStatus("Request completed successfully");
         setStatusType("success");
@@ -27,6 +27,93 @@ export async function processMessage(input) {
   return res.json();
 }
 
+// Streams the Final Answer over server-sent events.
+// onToken receives each text fragment; resolves with the same shape as processMessage.
+export async function processMessageStream(input, { onToken, onDisplayData } = {}) {
+  const sessionId = getOrCreateSessionId();
+
+  const res = await fetch("/api/process/stream", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      input,
+      session_id: sessionId
+    }),
+  });
+
+  if (!res.ok || !res.body) {
+    throw new Error("Network error");
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+
+      const payload = JSON.parse(data);
+      if (event === "token" && onToken) onToken(payload);
+      else if (event === "display_data" && onDisplayData) onDisplayData(payload);
+      else if (event === "done") result = payload;
+    }
+  }
+
+  if (!result) {
+    throw new Error("Stream ended unexpectedly");
+  }
+
+  return result;
+}
+
+// Fetches the next page of search results; cursor is next_cursor from display_data or a previous page.
+// Resolves with { type, data, total, offset, sort, next_cursor }.
+export async function fetchMoreResults(cursor) {
+  const res = await fetch(`/api/display-data?cursor=${encodeURIComponent(cursor)}`);
+
+  if (res.status === 410) {
+    throw new Error("Results have changed; search again");
+  }
+  if (!res.ok) {
+    throw new Error("Failed to load more results");
+  }
+
+  return res.json();
+}
+
+// Fetches hotels or restaurants inside the map viewport for markers.
+// bounds is { south, west, north, east }; filters are optional DisplayResults filters (cuisine, city, ...).
+export async function fetchViewport(type, bounds, filters = {}) {
+  const params = new URLSearchParams({
+    type,
+    bbox: [bounds.south, bounds.west, bounds.north, bounds.east].join(","),
+    ...filters,
+  });
+  const res = await fetch(`/api/inventory/viewport?${params}`);
+
+  if (!res.ok) {
+    throw new Error("Failed to load places in view");
+  }
+
+  return res.json();
+}
+
 export async function clearConversation() {
   const sessionId = getOrCreateSessionId();
 